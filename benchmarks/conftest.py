@@ -0,0 +1,202 @@
+'''Fixtures for the benchmarks. Run them with ``make bench``, which compares
+the timings against the baseline in ``benchmarks/baselines``, see
+``benchmarks/timing.py``. Store a new one with ``make bench-save``.'''
+import sys
+import json
+import copy
+import pytest
+import requests
+import subprocess
+from pathlib import Path
+from typing import Optional
+from contextlib import contextmanager
+
+import photoprysm
+from photoprysm.testing import MockLibrary, MockServer
+
+from .memory import MemoryReport, measure
+from .timing import TimingReport, calibrate
+
+MOCK_RESPONSES = Path(__file__).resolve().parents[1]/'tests'/'mock_responses'
+# Page sizes to decode. The largest is about 100 MB of JSON.
+PAGE_SIZES = [1000, 10000, 100000]
+# Size of the files uploaded and downloaded by the memory benchmarks
+LARGE_FILE_SIZE = 64 * 1024 * 1024
+
+class _PageAdapter(requests.adapters.BaseAdapter):
+    # Answers every request with the same body, so that decoding a page can
+    # be measured without any network or server time
+    def __init__(self, body: bytes):
+        super().__init__()
+        self.body = body
+
+    def send(self, request, **kwargs):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.headers['Content-Type'] = 'application/json'
+        resp._content = self.body
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
+
+def pytest_addoption(parser):
+    group = parser.getgroup('memory', 'memory benchmarks')
+    group.addoption(
+        '--memory-save', action = 'store_true',
+        help = 'store the memory used as the new baseline')
+    group.addoption(
+        '--memory-compare-fail', type = float, default = 10.0, metavar = 'PERCENT',
+        help = 'fail memory benchmarks that use this much more memory than '
+        'the baseline (default: 10)')
+    group = parser.getgroup('timing', 'normalized timings of the benchmarks')
+    group.addoption(
+        '--timing-save', action = 'store_true',
+        help = 'store the normalized timings as the new baseline')
+    group.addoption(
+        '--timing-compare-fail', type = float, default = 200.0, metavar = 'PERCENT',
+        help = 'fail benchmarks that got this much slower than the baseline, '
+        'relative to the calibration workload (default: 200)')
+
+def pytest_configure(config):
+    config._memory_report = MemoryReport(
+        config.getoption('--memory-compare-fail') / 100,
+        save = config.getoption('--memory-save'))
+    config._timing_report = TimingReport(
+        config.getoption('--timing-compare-fail') / 100,
+        save = config.getoption('--timing-save'))
+
+@pytest.hookimpl(hookwrapper = True)
+def pytest_runtest_makereport(item, call):
+    # Fails benchmarks that got slower than the timing baseline. The check
+    # needs the stats of the benchmark, which only exist once it has run.
+    outcome = yield
+    report = outcome.get_result()
+    if call.when != 'call' or not report.passed: return
+    benchmark = getattr(item, 'funcargs', {}).get('benchmark')
+    stats = getattr(getattr(benchmark, 'stats', None), 'stats', None)
+    if stats is None or not stats.min: return
+    regression = item.config._timing_report.add(item.name, stats.min, calibrate())
+    if regression:
+        report.outcome = 'failed'
+        report.longrepr = f'{item.name} got slower than the baseline: {regression}'
+
+def pytest_terminal_summary(terminalreporter, config):
+    for title, report in [('memory', config._memory_report),
+                          ('timing', config._timing_report)]:
+        if not report.results: continue
+        terminalreporter.section(title)
+        for line in report.lines():
+            terminalreporter.write_line(line)
+        if report.save:
+            terminalreporter.write_line(f'Saved the baseline to {report.write()}')
+
+def record_rate(benchmark, name: str, amount: float) -> None:
+    '''Store amount per second as extra info of the benchmark. Does nothing
+    when the benchmarks are disabled, since there are no stats then.'''
+    stats = getattr(benchmark.stats, 'stats', None)
+    if stats is not None and stats.mean:
+        benchmark.extra_info[name] = amount / stats.mean
+
+def _mock_response(kind: str) -> dict:
+    return json.loads((MOCK_RESPONSES/kind/'body_00.json').read_text())
+
+@pytest.fixture(scope = 'session')
+def photo_json() -> dict:
+    '''Photo with its details and files, as sent by a real server'''
+    return _mock_response('photo')
+
+@pytest.fixture(scope = 'session')
+def file_json() -> dict:
+    '''File as sent by a real server'''
+    return _mock_response('file')
+
+@pytest.fixture(scope = 'session')
+def search_results() -> list[dict]:
+    '''Search results for the largest page size, in the shape the server
+    sends them for :func:`photoprysm.get_photos`'''
+    library = MockLibrary(1000, 0, seed = 0)
+    results = []
+    template = list(library.photos.values())
+    for i in range(max(PAGE_SIZES)):
+        photo = copy.deepcopy(template[i % len(template)])
+        photo['ID'] = i + 1
+        photo['UID'] = f'p{i:015d}'
+        results.append(photo)
+    return results
+
+@pytest.fixture(scope = 'session')
+def page_session():
+    '''Factory for sessions that answer every request with a page of the
+    given number of search results'''
+    cache: dict[int, bytes] = {}
+    def make(results: list[dict], size: int) -> requests.Session:
+        if size not in cache:
+            cache[size] = json.dumps(results[:size]).encode()
+        session = requests.Session()
+        session.mount('http://bench/', _PageAdapter(cache[size]))
+        return session
+    return make
+
+@pytest.fixture
+def memory(request):
+    '''Measure the memory used by a block with tracemalloc, and fail the test
+    if it grew past the baseline. Everything allocated in the block that is
+    still referenced at its end counts as the steady state.
+
+    >>> with memory():
+    ...     photos = photoprysm.get_photos(session, server_api, count = 10000)
+    '''
+    report = request.config._memory_report
+    @contextmanager
+    def run(name: Optional[str] = None):
+        with measure(name or request.node.name) as result:
+            yield result
+        regressions = report.add(result)
+        if regressions:
+            pytest.fail(f'{result.name} uses more memory than the baseline:\n  '
+                        + '\n  '.join(regressions), pytrace = False)
+    return run
+
+@pytest.fixture(scope = 'session')
+def mock_server():
+    with MockServer(photos = 1000, albums = 2, seed = 0) as server:
+        yield server
+
+@contextmanager
+def _server_process(*args: str):
+    # Runs the mock server in its own process, so that it doesn't count
+    # towards the memory of the client
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'photoprysm.testing', '--port', '0', *args],
+        stdout = subprocess.PIPE, text = True)
+    try:
+        server_api = proc.stdout.readline().split()[-1]
+        user = photoprysm.User('admin', 'photoprism')
+        with photoprysm.user_session(user, server_api) as session:
+            yield session, server_api
+    finally:
+        proc.terminate()
+        proc.wait()
+
+@pytest.fixture(scope = 'session')
+def catalog_server():
+    '''Session and API URL of a mock server with 2000 photos, running in
+    another process'''
+    with _server_process('--photos', '2000', '--albums', '0') as rv:
+        yield rv
+
+@pytest.fixture(scope = 'session')
+def transfer_server():
+    '''Session and API URL of a mock server with a single large photo,
+    running in another process'''
+    with _server_process('--photos', '1', '--albums', '0',
+                         '--file-size', str(LARGE_FILE_SIZE)) as rv:
+        yield rv
+
+@pytest.fixture(scope = 'session')
+def session(mock_server):
+    with photoprysm.user_session(mock_server.user, mock_server.server_api) as session:
+        yield session
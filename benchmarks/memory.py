@@ -0,0 +1,139 @@
+'''Memory measurements for the benchmarks, made with tracemalloc.
+
+Each measurement records the peak memory allocated while a block runs, the
+memory still held once it is done (the steady state), and which modules that
+memory was allocated in. Files of photoprysm are reported on their own and
+everything else by top-level package, so a regression in ``models/`` or
+``api/photos.py`` shows up by name.
+'''
+import gc
+import sys
+import json
+import platform
+import tracemalloc
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import photoprysm
+
+PACKAGE_DIR = Path(photoprysm.__file__).resolve().parent
+BASELINE_DIR = Path(__file__).resolve().parent/'baselines'
+# Differences smaller than this are noise from connection pools and threads
+SLACK = 256 * 1024
+
+@dataclass
+class MemoryResult:
+    '''Memory used by one measurement, in bytes'''
+    name: str
+    peak: int = 0
+    steady: int = 0
+    modules: dict[str, int] = field(default_factory = dict)
+
+def _module(filename: str) -> str:
+    path = Path(filename)
+    if path.is_relative_to(PACKAGE_DIR):
+        return 'photoprysm/' + path.relative_to(PACKAGE_DIR).as_posix()
+    # Longest matching entry of the path, so site-packages wins over the stdlib
+    roots = [Path(p) for p in sys.path if p and path.is_relative_to(p)]
+    if not roots: return filename
+    parts = path.relative_to(max(roots, key = lambda p: len(p.parts))).parts
+    return parts[0].removesuffix('.py')
+
+@contextmanager
+def measure(name: str) -> Iterator[MemoryResult]:
+    '''Measure the memory allocated while the block runs. The result is
+    filled in when the block exits, so keep whatever should count towards
+    the steady state referenced until then.
+
+    >>> with measure('hold') as result:
+    ...     photos = [Photo.fromjson(p) for p in raw_photos]
+    >>> result.steady
+    '''
+    if tracemalloc.is_tracing():
+        raise RuntimeError('tracemalloc is already tracing.')
+    result = MemoryResult(name)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        yield result
+        gc.collect()
+        result.steady, result.peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    for stat in snapshot.statistics('filename'):
+        module = _module(stat.traceback[0].filename)
+        result.modules[module] = result.modules.get(module, 0) + stat.size
+
+class MemoryReport:
+    '''Results of every measurement in a run, checked against the baseline
+    for the running Python version.
+
+    :param float tolerance: Fraction the peak, steady state or memory of a photoprysm module may grow by
+    :param bool save: Set to True to store the results as the new baseline at the end of the run
+    '''
+    def __init__(self, tolerance: float, save: bool = False):
+        self.tolerance = tolerance
+        self.save = save
+        self.results: dict[str, MemoryResult] = {}
+        self.path = BASELINE_DIR/(f'memory-{platform.python_implementation()}-'
+                                  f'{sys.version_info[0]}.{sys.version_info[1]}.json')
+        self.baseline: dict[str, dict] = {}
+        if self.path.exists():
+            self.baseline = json.loads(self.path.read_text())
+
+    def add(self, result: MemoryResult) -> list[str]:
+        '''Add a result and compare it against the baseline
+
+        :returns: Description of each value that grew past the tolerance
+        '''
+        self.results[result.name] = result
+        if self.save or result.name not in self.baseline: return []
+        base = self.baseline[result.name]
+        values = [('peak', base['peak'], result.peak),
+                  ('steady', base['steady'], result.steady)]
+        values += [(module, size, result.modules.get(module, 0))
+                   for module, size in base['modules'].items()
+                   if module.startswith('photoprysm/')]
+        return [f'{what}: {_size(old)} -> {_size(new)}'
+                for what, old, new in values
+                if new > old * (1 + self.tolerance) + SLACK]
+
+    def write(self) -> Path:
+        '''Store the results as the baseline'''
+        data = {name: asdict(result) for name, result in sorted(self.results.items())}
+        for result in data.values():
+            del result['name']
+            # Leave out the small stuff, it only makes the diffs noisy
+            result['modules'] = {module: size for module, size
+                                 in sorted(result['modules'].items())
+                                 if size >= SLACK or module.startswith('photoprysm/')}
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+        self.path.write_text(json.dumps(data, indent = 2) + '\n')
+        return self.path
+
+    def lines(self, top: int = 5) -> Iterator[str]:
+        '''Lines of the report, with the modules holding the most memory
+        under each measurement'''
+        yield f'{"Name":<40} {"Peak":>10} {"Steady":>10} {"vs. base":>10}'
+        for name, result in sorted(self.results.items()):
+            base: Optional[dict] = self.baseline.get(name)
+            change = ''
+            if base:
+                change = f'{_change(base["peak"], result.peak):>+9.1%}'
+            yield (f'{name:<40} {_size(result.peak):>10} '
+                   f'{_size(result.steady):>10} {change:>10}')
+            modules = sorted(result.modules.items(), key = lambda m: -m[1])
+            for module, size in modules[:top]:
+                yield f'    {module:<36} {"":>10} {_size(size):>10}'
+
+def _change(old: int, new: int) -> float:
+    return (new - old) / old if old else 0.0
+
+def _size(n: int) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(n) < 1024: return f'{n:.0f} {unit}' if unit == 'B' else f'{n:.1f} {unit}'
+        n /= 1024
+    return f'{n:.1f} GiB'
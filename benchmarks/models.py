@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+'''Measure how many objects per second the models decode and encode.
+
+Uses the mock responses from the test suite as payloads. Run from the root
+of the repository::
+
+    python benchmarks/models.py
+'''
+import json
+import timeit
+import argparse
+from pathlib import Path
+
+from photoprysm.models import base
+from photoprysm.models.albums import Album
+from photoprysm.models.photos import Photo, PhotoFile
+
+MOCK_RESPONSES = Path(__file__).resolve().parents[1]/'tests'/'mock_responses'
+
+def payloads():
+    yield 'PhotoFile', PhotoFile, json.loads(
+        (MOCK_RESPONSES/'file'/'body_00.json').read_text())
+    yield 'Photo', Photo, json.loads(
+        (MOCK_RESPONSES/'photo'/'body_00.json').read_text())
+    yield 'Album', Album, json.loads(
+        (MOCK_RESPONSES/'album'/'body_00.json').read_text())
+
+def report(label, timer, args):
+    best = min(timer.repeat(repeat = args.repeat, number = args.number))
+    print(f'{label:<20} {args.number / best:>12,.0f} objects/s '
+          f'{best / args.number * 1e6:>8.2f} us/object')
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--number', '-n', type = int, default = 20000,
+                        help = 'Number of objects to decode per run')
+    parser.add_argument('--repeat', '-r', type = int, default = 5,
+                        help = 'Number of runs to take the best of')
+    args = parser.parse_args()
+    backend = ('orjson' if base.orjson else
+               'msgspec' if base.msgspec else 'json')
+    print(f'JSON backend: {backend}')
+    for name, model, djson in payloads():
+        report(f'{name}.fromjson',
+               timeit.Timer(lambda: model.fromjson(dict(djson))), args)
+        inst = model.fromjson(dict(djson))
+        report(f'{name}.json', timeit.Timer(lambda: inst.json), args)
+
+if __name__ == '__main__':
+    main()
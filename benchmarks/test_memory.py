@@ -0,0 +1,68 @@
+'''Peak and steady state memory for large catalogs and large files. These are
+checked against the memory baseline, see ``benchmarks/memory.py``.'''
+import pytest
+
+import photoprysm
+from photoprysm.models.batch import PhotoBatch
+from photoprysm.models.photos import Photo, CompactPhoto, LazyPhoto
+from photoprysm.testing import fake_jpeg
+
+from .conftest import LARGE_FILE_SIZE
+
+SIZE = 10000
+MODELS = {'Photo': Photo.fromjson, 'CompactPhoto': CompactPhoto.fromjson,
+          'LazyPhoto': LazyPhoto.fromjson, 'PhotoBatch': None}
+
+@pytest.mark.parametrize('model', list(MODELS))
+def test_hold(memory, search_results, model):
+    raw = [dict(p) for p in search_results[:SIZE]]
+    with memory():
+        if model == 'PhotoBatch':
+            photos = PhotoBatch.fromjson(raw)
+        else:
+            photos = [MODELS[model](p) for p in raw]
+    assert len(photos) == SIZE
+
+@pytest.mark.parametrize('mode', ['models', 'lazy', 'batch'])
+def test_list(memory, page_session, search_results, mode):
+    session = page_session(search_results, SIZE)
+    kwargs = {mode: True} if mode != 'models' else {}
+    with memory():
+        photos = photoprysm.get_photos(
+            session, 'http://bench/api/v1/', count = SIZE, **kwargs)
+    assert len(photos) == SIZE
+
+def test_iter_pages(memory, catalog_server):
+    session, server_api = catalog_server
+    with memory():
+        # Only one page is held at a time
+        count = sum(len(page) for page in photoprysm.iter_photo_pages(
+            session, server_api, page_size = 500))
+    assert count == 2000
+
+def test_thumbnails(memory, catalog_server, tmp_path):
+    session, server_api = catalog_server
+    photos = photoprysm.get_photos(session, server_api, count = 1000)
+    with memory():
+        cache = photoprysm.DiskCache(tmp_path)
+        photoprysm.get_thumbnails(session, server_api, *photos, cache = cache)
+    # Everything is cached now, so nothing is requested again
+    with memory('test_thumbnails_cached'):
+        images = photoprysm.get_thumbnails(session, server_api, *photos, cache = cache)
+    assert len(images) == len(cache) == 1000
+
+def test_download(memory, transfer_server, tmp_path):
+    session, server_api = transfer_server
+    photo = photoprysm.get_photos(session, server_api, count = 1)[0]
+    with memory():
+        path = photoprysm.download_file(session, server_api, photo,
+                                        tmp_path/'photo.jpg')
+    assert path.stat().st_size == LARGE_FILE_SIZE
+
+def test_upload(memory, transfer_server, tmp_path):
+    session, server_api = transfer_server
+    path = tmp_path/'upload.jpg'
+    path.write_bytes(fake_jpeg(1, LARGE_FILE_SIZE))
+    with memory():
+        results = photoprysm.upload_files(session, server_api, [path])
+    assert results[0].ok
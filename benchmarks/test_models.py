@@ -0,0 +1,26 @@
+'''Decoding and encoding the models on the payloads of a real server'''
+import pytest
+
+from photoprysm.models.photos import (
+    Photo, PhotoFile, CompactPhoto, CompactPhotoFile, LazyPhoto, LazyPhotoFile)
+
+PHOTO_MODELS = [Photo, CompactPhoto, LazyPhoto]
+FILE_MODELS = [PhotoFile, CompactPhotoFile, LazyPhotoFile]
+
+@pytest.mark.parametrize('model', PHOTO_MODELS, ids = lambda m: m.__name__)
+def test_photo_fromjson(benchmark, model, photo_json):
+    benchmark(lambda: model.fromjson(dict(photo_json)))
+
+@pytest.mark.parametrize('model', PHOTO_MODELS, ids = lambda m: m.__name__)
+def test_photo_json(benchmark, model, photo_json):
+    photo = model.fromjson(dict(photo_json))
+    benchmark(lambda: photo.json)
+
+@pytest.mark.parametrize('model', FILE_MODELS, ids = lambda m: m.__name__)
+def test_file_fromjson(benchmark, model, file_json):
+    benchmark(lambda: model.fromjson(dict(file_json)))
+
+@pytest.mark.parametrize('model', FILE_MODELS, ids = lambda m: m.__name__)
+def test_file_json(benchmark, model, file_json):
+    f = model.fromjson(dict(file_json))
+    benchmark(lambda: f.json)
@@ -0,0 +1,58 @@
+'''Decoding search results and working with large selections of photos'''
+import itertools
+import pytest
+
+import photoprysm
+from photoprysm import core
+from photoprysm.models.photos import Photo, PhotoProperties
+
+from .conftest import PAGE_SIZES, record_rate
+
+@pytest.mark.parametrize('size', PAGE_SIZES)
+@pytest.mark.parametrize('mode', ['models', 'lazy', 'batch'])
+def test_get_page(benchmark, page_session, search_results, size, mode):
+    # Only the decoding is measured, the session answers without a server
+    session = page_session(search_results, size)
+    kwargs = {mode: True} if mode != 'models' else {}
+    rounds = 3 if size >= 100000 else 10
+    rv = benchmark.pedantic(
+        photoprysm.get_photos, args = (session, 'http://bench/api/v1/'),
+        kwargs = dict(count = size, **kwargs), rounds = rounds)
+    assert len(rv) == size
+    record_rate(benchmark, 'photos_per_second', size)
+
+@pytest.mark.parametrize('size', [10000, 100000])
+@pytest.mark.parametrize('kind', ['photos', 'uids'])
+def test_extract_uids(benchmark, search_results, size, kind):
+    if kind == 'photos':
+        selection = [Photo.fromjson(dict(p)) for p in search_results[:size]]
+    else:
+        selection = [p['UID'] for p in search_results[:size]]
+    uids = benchmark(core._extract_uids, selection)
+    assert len(uids) == size
+
+def test_update_many(benchmark, mock_server, session):
+    api = mock_server.server_api
+    photos = photoprysm.get_photos(session, api, count = 200)
+    titles = itertools.count()
+    def run():
+        # A new title every round, so that no update is skipped
+        updates = [(photo, PhotoProperties(title = f'Bench {next(titles)}'))
+                   for photo in photos]
+        return photoprysm.update_photos(session, api, updates)
+    results = benchmark.pedantic(run, rounds = 5)
+    assert all(r.ok for r in results)
+    record_rate(benchmark, 'updates_per_second', len(photos))
+
+def test_sync_members(benchmark, mock_server, session):
+    api = mock_server.server_api
+    album = photoprysm.create_album(session, api, 'Bench')
+    uids = [p.uid for p in photoprysm.get_photos(session, api, count = 1000)]
+    # Every round swaps the album over to the other half of the photos
+    halves = itertools.cycle([uids[:500], uids[500:]])
+    photoprysm.sync_album_members(session, api, album, next(halves))
+    results = benchmark.pedantic(
+        lambda: photoprysm.sync_album_members(session, api, album, next(halves)),
+        rounds = 5)
+    assert all(r.ok for r in results)
+    record_rate(benchmark, 'changes_per_second', len(uids))
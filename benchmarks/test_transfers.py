@@ -0,0 +1,44 @@
+'''Upload and download throughput against the mock server'''
+import pytest
+
+import photoprysm
+from photoprysm.testing import MockServer, fake_jpeg
+
+from .conftest import record_rate
+
+FILE_SIZE = 8 * 1024 * 1024
+
+@pytest.fixture(scope = 'module')
+def transfer_server():
+    with MockServer(photos = 1, albums = 0, file_size = FILE_SIZE) as server:
+        with photoprysm.user_session(server.user, server.server_api) as session:
+            yield server, session
+
+def test_download(benchmark, transfer_server, tmp_path):
+    server, session = transfer_server
+    api = server.server_api
+    photo = photoprysm.get_photos(session, api, count = 1)[0]
+    token = photoprysm.get_tokens_from_session(session, api)['download_token']
+    def run():
+        path = tmp_path/'photo.jpg'
+        path.unlink(missing_ok = True)
+        return photoprysm.download_file(session, api, photo, path,
+                                        download_token = token)
+    path = benchmark.pedantic(run, rounds = 10)
+    assert path.stat().st_size == FILE_SIZE
+    record_rate(benchmark, 'bytes_per_second', FILE_SIZE)
+
+def test_upload(benchmark, transfer_server, tmp_path):
+    server, session = transfer_server
+    api = server.server_api
+    seeds = iter(range(1000))
+    def setup():
+        # A new file every round, so each one becomes a new photo
+        path = tmp_path/'upload.jpg'
+        path.write_bytes(fake_jpeg(next(seeds), FILE_SIZE))
+        return ([path],), {}
+    def run(paths):
+        return photoprysm.upload_files(session, api, paths)
+    results = benchmark.pedantic(run, setup = setup, rounds = 10)
+    assert results[0].ok
+    record_rate(benchmark, 'bytes_per_second', FILE_SIZE)
@@ -0,0 +1,89 @@
+'''Timings for the benchmarks, normalized so that a baseline can be kept in
+the repository.
+
+Raw timings depend on the machine, so each benchmark is stored as the ratio
+of its fastest run to the fastest run of a fixed calibration workload, timed
+right after the benchmark. Both slow down together on a slower or busier
+machine, so the ratio mostly changes when the code does. It is still far
+noisier than the memory baseline, hence the loose tolerance.
+'''
+import sys
+import json
+import time
+import platform
+from pathlib import Path
+from typing import Iterator, Optional
+
+BASELINE_DIR = Path(__file__).resolve().parent/'baselines'
+# Runs of the calibration workload, the fastest one counts
+CALIBRATION_ROUNDS = 20
+
+def _calibration_workload() -> None:
+    # Pure Python work of the same kind as decoding a page: building dicts
+    # and strings, and a round trip through the json module
+    data = [{'UID': f'p{i:015d}', 'Width': i, 'Title': 'x' * (i % 32)}
+            for i in range(2000)]
+    json.loads(json.dumps(data))
+
+def calibrate() -> float:
+    '''Time of the fastest run of the calibration workload, in seconds'''
+    best = float('inf')
+    for _ in range(CALIBRATION_ROUNDS):
+        start = time.perf_counter()
+        _calibration_workload()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+class TimingReport:
+    '''Normalized timings of every benchmark in a run, checked against the
+    baseline for the running Python version.
+
+    :param float tolerance: Fraction the normalized time of a benchmark may grow by
+    :param bool save: Set to True to store the results as the new baseline at the end of the run
+    '''
+    def __init__(self, tolerance: float, save: bool = False):
+        self.tolerance = tolerance
+        self.save = save
+        self.results: dict[str, float] = {}
+        self.path = BASELINE_DIR/(f'timing-{platform.python_implementation()}-'
+                                  f'{sys.version_info[0]}.{sys.version_info[1]}.json')
+        self.baseline: dict[str, float] = {}
+        if self.path.exists():
+            self.baseline = json.loads(self.path.read_text())
+
+    def add(self, name: str, fastest: float, calibration: float) -> Optional[str]:
+        '''Add the fastest run of a benchmark and compare it against the
+        baseline
+
+        :param str name: Name of the benchmark
+        :param float fastest: Time of its fastest run, in seconds
+        :param float calibration: Time of the calibration workload timed right after it, in seconds
+        :returns: Description of the regression if it got slower than the tolerance allows
+        '''
+        ratio = fastest / calibration
+        self.results[name] = ratio
+        if self.save or name not in self.baseline: return None
+        old = self.baseline[name]
+        if ratio > old * (1 + self.tolerance):
+            return (f'{ratio:.4g} x calibration, was {old:.4g} '
+                    f'({_change(old, ratio):+.0%})')
+        return None
+
+    def write(self) -> Path:
+        '''Store the results as the baseline'''
+        data = {name: float(f'{ratio:.4g}')
+                for name, ratio in sorted(self.results.items())}
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+        self.path.write_text(json.dumps(data, indent = 2) + '\n')
+        return self.path
+
+    def lines(self) -> Iterator[str]:
+        '''Lines of the report'''
+        yield f'{"Name":<52} {"x calib.":>10} {"vs. base":>10}'
+        for name, ratio in sorted(self.results.items()):
+            old = self.baseline.get(name)
+            change = f'{_change(old, ratio):>+9.1%}' if old else ''
+            yield f'{name:<52} {ratio:>10.4g} {change:>10}'
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
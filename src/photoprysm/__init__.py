@@ -3,55 +3,163 @@ __author__ = """Rice Rodriguez"""
 __email__ = 'victoriarice@protonmail.com'
 __version__ = '0.1.1'
 
-# Make the public members of the core accessible from the top
-from .core import Client
-from .core import User
-from .core import user_session
-from .core import client_session
-from .core import get_api_url
-from .core import request
-from .core import start_index
-from .core import start_import
-from .core import get_tokens_from_session
+import importlib
 
-# Make the API accessible from the top
-from .api import albums
-from .api import photos
+# Everything below is imported on first use (PEP 562), so that importing the
+# package or starting the CLI doesn't pull in requests and every module up
+# front. Each entry maps the name at the top to its name in the module, or
+# None for the module itself.
+_EXPORTS: dict[str, dict[str, str | None]] = {
+    # Make the public members of the core accessible from the top
+    '.core': {
+        'Client': 'Client',
+        'User': 'User',
+        'user_session': 'user_session',
+        'client_session': 'client_session',
+        'get_api_url': 'get_api_url',
+        'request': 'request',
+        'start_index': 'start_index',
+        'start_import': 'start_import',
+        'get_tokens_from_session': 'get_tokens_from_session',
+        'BatchResult': 'BatchResult',
+        'Job': 'Job',
+    },
+    '.cache': {
+        'DiskCache': 'DiskCache',
+    },
+    '.cassette': {
+        'Cassette': 'Cassette',
+        'record_requests': 'record',
+        'replay_requests': 'replay',
+    },
+    '.staging': {
+        'stage_import': 'stage_import',
+        'StagingResult': 'StagingResult',
+    },
+    '.export': {
+        'export_photos': 'export',
+        'export_photo_columns': 'export_columns',
+        'to_numpy': 'to_numpy',
+        'to_arrow': 'to_arrow',
+    },
+    # Make the API accessible from the top
+    '.api.albums': {
+        'albums': None,
+        'get_albums': 'get',
+        'iter_albums': 'iter_all',
+        'AlbumIndex': 'AlbumIndex',
+        'get_album_by_uid': 'get_by_uid',
+        'get_album_by_name': 'get_by_name',
+        'create_album': 'create',
+        'create_albums': 'create_many',
+        'delete_album': 'delete',
+        'like_album': 'like',
+        'unlike_album': 'unlike',
+        'update_album': 'update',
+        'clone_album': 'clone',
+        'clone_albums': 'clone_many',
+        'iter_album_download': 'iter_download',
+        'download_album': 'download',
+        'add_album_photos': 'add_photos',
+        'remove_album_photos': 'remove_photos',
+        'get_album_member_uids': 'get_member_uids',
+        'sync_album_members': 'sync_members',
+        'get_album_share_links': 'get_share_links',
+        'add_album_share_link': 'add_share_link',
+        'parse_album_share_link': 'parse_share_link',
+        'update_album_share_link': 'update_share_link',
+        'delete_album_share_link': 'delete_share_link',
+        'scan_album_share_links': 'scan_share_links',
+        'expire_album_share_links': 'expire_share_links',
+        'rotate_album_share_links': 'rotate_share_links',
+        'delete_album_share_links': 'delete_share_links',
+    },
+    '.api.photos': {
+        'photos': None,
+        'get_photos': 'get',
+        'iter_photo_pages': 'iter_pages',
+        'get_photo_by_uid': 'get_by_uid',
+        'get_photo_by_file': 'get_by_file',
+        'archive_photo': 'archive',
+        'restore_photo': 'restore',
+        'clear_photo_from_archive': 'clear_from_archive',
+        'delete_photo': 'delete',
+        'update_photo': 'update',
+        'update_photos': 'update_many',
+        'approve_photo': 'approve',
+        'set_photo_primary_file': 'set_primary_file',
+        'set_photo_as_private': 'set_private',
+        'pop_photo_file': 'pop_file',
+        'like_photo': 'like',
+        'unlike_photo': 'unlike',
+        'upload': 'upload',
+        'download': 'download',
+        'download_to': 'download_to',
+        'download_file': 'download_file',
+        'iter_download_file': 'iter_download_file',
+        'upload_files': 'upload_files',
+        'ThumbnailSizes': 'ThumbnailSizes',
+        'get_thumbnail_url': 'get_thumbnail_url',
+        'get_thumbnail': 'get_thumbnail',
+        'get_thumbnails': 'thumbnails',
+    },
+    # Make the models accessible from the top
+    '.models.base': {
+        'ModelBase': 'ModelBase',
+        'compact': 'compact',
+        'lazy': 'lazy',
+    },
+    '.models.albums': {
+        'Album': 'Album',
+        'AlbumProperties': 'AlbumProperties',
+        'CompactAlbum': 'CompactAlbum',
+        'LazyAlbum': 'LazyAlbum',
+    },
+    '.models.links': {
+        'ShareLink': 'ShareLink',
+        'ShareLinkProperties': 'ShareLinkProperties',
+        'CompactShareLink': 'CompactShareLink',
+        'LazyShareLink': 'LazyShareLink',
+    },
+    '.models.photos': {
+        'Photo': 'Photo',
+        'PhotoDetails': 'PhotoDetails',
+        'PhotoFile': 'PhotoFile',
+        'PhotoProperties': 'PhotoProperties',
+        'CompactPhoto': 'CompactPhoto',
+        'CompactPhotoFile': 'CompactPhotoFile',
+        'LazyPhoto': 'LazyPhoto',
+        'LazyPhotoFile': 'LazyPhotoFile',
+    },
+    '.models.batch': {
+        'PhotoBatch': 'PhotoBatch',
+        'StringColumn': 'StringColumn',
+        'IntColumn': 'IntColumn',
+    },
+    '.models.timestamps': {
+        'parse_timestamp': 'parse_timestamp',
+        'parse_epoch': 'parse_epoch',
+        'format_timestamp': 'format_timestamp',
+        'parse_timestamps': 'parse_timestamps',
+    },
+}
 
-# Make the models accessible from the top
-from .models.albums import *
-from .models.links import *
-from .models.photos import *
+_LOCATIONS = {name: (module, attr)
+              for module, names in _EXPORTS.items()
+              for name, attr in names.items()}
 
-# Add aliases from the top
-from .api.albums import get as get_albums
-from .api.albums import get_by_uid as get_album_by_uid
-from .api.albums import get_by_name as get_album_by_name
-from .api.albums import create as create_album
-from .api.albums import delete as delete_album
-from .api.albums import like as like_album
-from .api.albums import unlike as unlike_album
-from .api.albums import update as update_album
-from .api.albums import clone as clone_album
-from .api.albums import get_share_links as get_album_share_links
-from .api.albums import add_share_link as add_album_share_link
-from .api.albums import parse_share_link as parse_album_share_link
-from .api.albums import update_share_link as update_album_share_link
+__all__ = list(_LOCATIONS)
 
-from .api.photos import get as get_photos
-from .api.photos import get_by_uid as get_photo_by_uid
-from .api.photos import get_by_file as get_photo_by_file
-from .api.photos import archive as archive_photo
-from .api.photos import restore as restore_photo
-from .api.photos import clear_from_archive as clear_photo_from_archive
-from .api.photos import delete as delete_photo
-from .api.photos import update as update_photo
-from .api.photos import approve as approve_photo
-from .api.photos import set_primary_file as set_photo_primary_file
-from .api.photos import set_private as set_photo_as_private
-from .api.photos import pop_file as pop_photo_file
-from .api.photos import like as like_photo
-from .api.photos import unlike as unlike_photo
-from .api.photos import upload
-from .api.photos import download
-from .api.photos import download_to
+def __getattr__(name: str):
+    try:
+        module, attr = _LOCATIONS[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    value = importlib.import_module(module, __name__)
+    if attr is not None: value = getattr(value, attr)
+    # Cache it, so this is only called once per name
+    globals()[name] = value
+    return value
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LOCATIONS))
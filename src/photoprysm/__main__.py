@@ -1,28 +1,53 @@
 #!/usr/bin/env python3
+from __future__ import annotations
 import re
+import sys
 import cmd
+import json
+import time
 import shlex
-import requests
+import hashlib
+import threading
 import argparse
-from photoprysm import core
-from photoprysm import albums
-from pprint import pprint
+from photoprysm._lazy import lazy_import
+from pathlib import Path, PurePosixPath
+from typing import Any, Iterable, Optional, TextIO
+from urllib.parse import urljoin
+
+# Nothing heavy is loaded until a command runs, so that starting the CLI and
+# printing the help stay fast
+requests = lazy_import('requests')
+pprint = lazy_import('pprint')
+core = lazy_import('photoprysm.core')
+bench = lazy_import('photoprysm.bench')
+albums = lazy_import('photoprysm.api.albums')
+photos = lazy_import('photoprysm.api.photos')
+photo_models = lazy_import('photoprysm.models.photos')
+
+# Number of lines to read ahead when running a batch concurrently
+_BATCH_LINES_PER_WORKER = 64
+
+class _ArgumentParser(argparse.ArgumentParser):
+    # Raise instead of exiting, so one bad line doesn't end a whole batch
+    def error(self, message):
+        raise ValueError(message)
 
 class PhotoprysmCLI(cmd.Cmd):
     intro = ('Welcome to the Photoprysm CLI. Type \'help\' or \'?\' to list '
              'commands.\n')
     prompt = '(photoprysm) '
     mode: str
-    server_api: core.ServerAPI
+    server_api: str
     user: core.User
     client: core.Client
     session: requests.Session
     parser: argparse.ArgumentParser
+    workers: int = 1
 
     # Setup
     def preloop(self):
         # Set up our parser
-        self.parser = argparse.ArgumentParser()
+        self.parser = _ArgumentParser()
         self.parser.add_argument('endpoint')
         self.parser.add_argument('--params', '-p', action = 'extend', nargs = '+',
                                  help = ('Separate each parameter with a space and '
@@ -37,6 +62,11 @@ class PhotoprysmCLI(cmd.Cmd):
             self.session = self.user.login(self.server_api)
         else:
             self.session = self.client.login(self.server_api)
+        # Keep a connection open for each worker in batch mode
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections = 1, pool_maxsize = max(self.workers, 1))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def postloop(self):
         if self.mode == 'user':
@@ -49,13 +79,11 @@ class PhotoprysmCLI(cmd.Cmd):
         parsed_args = self.parser.parse_args(raw_args)
         d = vars(parsed_args)
         if parsed_args.params:
-            params = re.split(' ',parsed_args.params)
-            d['params'] = dict([re.split(r'\s*=\s*',param) for param in params])
+            d['params'] = _key_values(parsed_args.params)
         if parsed_args.data:
-            data = re.split(' ',parsed_args.data)
-            d['data'] = dict([re.split(r'\s*=\s*',datapoint) for datapoint in data])
+            d['data'] = json.dumps(_key_values(parsed_args.data))
         return d
-        
+
     # Quit
     def do_quit(self, arg):
         '''Log out of the session and exit the Photoprysm shell'''
@@ -67,10 +95,8 @@ class PhotoprysmCLI(cmd.Cmd):
         '''Get the status of the Photoprism server'''
         resp = core.request(
             session = self.session,
-            server_api = self.server_api,
-            method = 'GET',
-            endpoint = 'status')
-        resp.raise_for_status()
+            url = urljoin(self.server_api, 'status'),
+            method = 'GET')
         print('Server is '+resp.json()['status'])
 
     def _help_request(self, method: str):
@@ -78,14 +104,17 @@ class PhotoprysmCLI(cmd.Cmd):
         self.parser.prog = method
         self.parser.print_help()
 
+    def _request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        return core.request(
+            session = self.session,
+            url = urljoin(self.server_api, endpoint.lstrip('/')),
+            method = method.upper(),
+            **kwargs)
+
     def _do_request(self, method: str, arg):
         parsed_args = self.parse_arg(arg)
-        resp = core.request(
-            session = self.session,
-            server_api = self.server_api,
-            method = method,
-            **parsed_args)
-        pprint(resp.json())
+        resp = self._request(method, **parsed_args)
+        pprint.pprint(resp.json())
 
     def help_get(self):
         self._help_request('get')
@@ -111,8 +140,278 @@ class PhotoprysmCLI(cmd.Cmd):
     def do_delete(self, arg):
         self._do_request('delete', arg)
 
+    # Batch mode
+    def run_batch(self, lines: Iterable[str], out: Optional[TextIO] = None) -> int:
+        '''Run one command per line over the current session and write one
+        JSON result per line, in the same order as the commands. Lines are
+        either the same commands as the shell (``get photos -p count=1``) or
+        JSON objects with ``method``, ``endpoint`` and optionally ``params``,
+        ``data`` and ``id``. Blank lines and lines starting with ``#`` are
+        skipped.
 
-if __name__ == '__main__':
+        :returns: Number of commands that failed
+        '''
+        out = out or sys.stdout
+        commands = ((n, line.strip()) for n, line in enumerate(lines, 1))
+        commands = ((n, line) for n, line in commands
+                    if line and not line.startswith('#'))
+        failed = 0
+        chunk = []
+        size = max(self.workers, 1) * _BATCH_LINES_PER_WORKER
+        for command in commands:
+            chunk.append(command)
+            if len(chunk) < size: continue
+            failed += self._run_chunk(chunk, out)
+            chunk = []
+        if chunk: failed += self._run_chunk(chunk, out)
+        return failed
+
+    def _run_chunk(self, chunk: list[tuple[int, str]], out: TextIO) -> int:
+        results = core._map_concurrently(self._execute, chunk, self.workers)
+        for result in results:
+            out.write(json.dumps(result) + '\n')
+        out.flush()
+        return sum(not result['ok'] for result in results)
+
+    def _execute(self, command: tuple[int, str]) -> dict[str, Any]:
+        n, line = command
+        rv = {'line': n}
+        try:
+            method, kwargs = self._parse_command(line, rv)
+            resp = self._request(method, **kwargs)
+        except requests.HTTPError as err:
+            rv.update(ok = False, status = err.response.status_code,
+                      error = str(err))
+            return rv
+        except (requests.RequestException, ValueError, KeyError, TypeError) as err:
+            rv.update(ok = False, error = str(err))
+            return rv
+        rv.update(ok = True, status = resp.status_code)
+        try:
+            rv['result'] = resp.json()
+        except ValueError:
+            rv['result'] = resp.text
+        return rv
+
+    def _parse_command(self, line: str, rv: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        if line.startswith('{'):
+            command = json.loads(line)
+            if 'id' in command: rv['id'] = command['id']
+            kwargs = {'endpoint': command['endpoint']}
+            if command.get('params'): kwargs['params'] = command['params']
+            if command.get('data') is not None:
+                kwargs['data'] = json.dumps(command['data'])
+            return command['method'], kwargs
+        name, _, arg = line.partition(' ')
+        name = name.lower()
+        if name == 'status': return 'GET', {'endpoint': 'status'}
+        if name not in ('get', 'post', 'put', 'delete'):
+            raise ValueError(f'Unknown command \'{name}\'.')
+        return name, self.parse_arg(arg)
+
+class _TransferReport:
+    '''Writes one JSON line per transfer to the report and the progress and
+    throughput to stderr'''
+    def __init__(self, out: TextIO, total: int):
+        self.out = out
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.size = 0
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict[str, Any]) -> None:
+        with self._lock:
+            self.done += 1
+            self.failed += not entry['ok']
+            self.size += entry.get('bytes', 0)
+            self.out.write(json.dumps(entry) + '\n')
+            self.out.flush()
+            state = 'failed' if not entry['ok'] else (
+                'skipped' if entry.get('skipped') else _size(entry.get('bytes', 0)))
+            print(f'[{self.done}/{self.total}] {entry["path"]} {state}',
+                  file = sys.stderr)
+
+    def finish(self) -> int:
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        print(f'Transferred {_size(self.size)} in {elapsed:.1f} s '
+              f'({_size(self.size / elapsed)}/s). {self.failed} of '
+              f'{self.total} failed.', file = sys.stderr)
+        return self.failed
+
+def _size(n: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1000: return f'{n:.1f} {unit}'
+        n /= 1000
+    return f'{n:.1f} TB'
+
+def _dest_path(dest: Path, name: str) -> Path:
+    # Keep the directories of the original, but never outside of dest
+    parts = [p for p in PurePosixPath(name).parts if p not in ('/', '.', '..')]
+    return dest.joinpath(*parts)
+
+def _sha1(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha1').hexdigest()
+
+def _download(commander: PhotoprysmCLI, args: argparse.Namespace, out: TextIO) -> int:
+    session, server_api = commander.session, commander.server_api
+    dest = Path(args.dest)
+    download_token = core._get_download_token(session, server_api)
+    # Not merged, since the server pages merged results by file and the pages
+    # can come back short before the end. Unmerged results have a row for
+    # each file instead, so only the first row of each photo is kept.
+    transfers = {}
+    for page in photos.iter_pages(session, server_api, query = args.query,
+                                  album = args.album):
+        for raw_photo in page:
+            uid = raw_photo.get('UID')
+            if uid in transfers: continue
+            if raw_photo.get('Files'):
+                raw_file = photo_models._primary_file(raw_photo)
+                hashbrown, name = raw_file.get('Hash'), raw_file.get('Name')
+            else:
+                # The file of the row is flattened into it
+                hashbrown, name = raw_photo.get('Hash'), raw_photo.get('FileName')
+            if not hashbrown: continue
+            transfers[uid] = (uid, hashbrown, _dest_path(dest, name or hashbrown))
+    transfers = list(transfers.values())
+    report = _TransferReport(out, len(transfers))
+    def _transfer(transfer):
+        uid, hashbrown, path = transfer
+        entry = {'uid': uid, 'hash': hashbrown, 'path': str(path)}
+        start = time.monotonic()
+        try:
+            if path.exists() and _sha1(path) == hashbrown:
+                entry.update(ok = True, skipped = True)
+            else:
+                path.parent.mkdir(parents = True, exist_ok = True)
+                photos.download_file(session, server_api, hashbrown, path,
+                                     verify = not args.no_verify,
+                                     download_token = download_token)
+                entry.update(ok = True, bytes = path.stat().st_size)
+        except (requests.RequestException, ValueError, OSError) as err:
+            entry.update(ok = False, error = str(err))
+        entry['seconds'] = round(time.monotonic() - start, 3)
+        report.add(entry)
+    core._map_concurrently(_transfer, transfers, commander.workers)
+    return report.finish()
+
+def _upload(commander: PhotoprysmCLI, args: argparse.Namespace, out: TextIO) -> int:
+    paths = []
+    for path in map(Path, args.paths):
+        if path.is_dir(): paths.extend(sorted(p for p in path.rglob('*') if p.is_file()))
+        else: paths.append(path)
+    report = _TransferReport(out, len(paths))
+    results = photos.upload_files(commander.session, commander.server_api,
+                                  paths, albums = args.albums,
+                                  max_workers = commander.workers)
+    for result in results:
+        entry = {'path': str(result.item), 'ok': result.ok}
+        if result.ok:
+            entry.update(uid = result.value.uid, bytes = result.item.stat().st_size)
+        else: entry['error'] = str(result.error)
+        report.add(entry)
+    return report.finish()
+
+def _bench(commander: PhotoprysmCLI, args: argparse.Namespace, out: TextIO) -> int:
+    # Log in and out with fresh credentials each time, so runs don't share
+    # a session with each other or with the rest of the benchmark
+    if commander.mode == 'user':
+        user = commander.user
+        credentials = lambda: core.User(user.username, user.password)
+    else:
+        credentials = lambda: core.Client(*commander.client.auth)
+    def _login():
+        account = credentials()
+        account.login(commander.server_api)
+        account.logout()
+    results = bench.run(commander.session, commander.server_api,
+                        login = _login,
+                        operations = args.ops,
+                        counts = args.counts,
+                        iterations = args.iterations,
+                        concurrency = commander.workers,
+                        upload_path = args.upload)
+    out.write(bench.format_results(results) + '\n')
+    if args.json == '-':
+        out.write(json.dumps(bench.results_json(results)) + '\n')
+    elif args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(bench.results_json(results), f, indent = 2)
+    return sum(r.errors for r in results)
+
+def _add_commands(parser: argparse.ArgumentParser) -> None:
+    commands = parser.add_subparsers(dest = 'command')
+    download = commands.add_parser(
+        'download',
+        help = 'Download the originals of the photos matching a search')
+    download.add_argument('--query', '-q',
+                          help = 'Search filters for the photos to download')
+    download.add_argument('--album', '-a',
+                          help = 'UID of an album to download the photos of')
+    download.add_argument('--dest',
+                          required = True,
+                          help = 'Directory to download the files to')
+    download.add_argument('--no-verify',
+                          action = 'store_true',
+                          help = 'Skip checking the hash of each downloaded file')
+    upload = commands.add_parser(
+        'upload',
+        help = 'Upload files and directories')
+    upload.add_argument('paths',
+                        nargs = '+',
+                        help = 'Files or directories to upload')
+    upload.add_argument('--albums',
+                        nargs = '+',
+                        help = 'UIDs of albums to add the uploaded files to')
+    for command in (download, upload):
+        command.add_argument('--workers', '-w',
+                             type = int,
+                             default = argparse.SUPPRESS,
+                             help = 'Number of files to transfer at once')
+    bench_parser = commands.add_parser(
+        'bench',
+        help = 'Measure the latency and throughput of common requests')
+    bench_parser.add_argument('--ops',
+                              nargs = '+',
+                              choices = bench.OPERATIONS,
+                              default = bench.OPERATIONS,
+                              help = 'Operations to measure. Defaults to all of them.')
+    bench_parser.add_argument('--counts',
+                              nargs = '+',
+                              type = int,
+                              default = [1, 100, 1000],
+                              help = 'Number of results to request for each search')
+    bench_parser.add_argument('--iterations', '-n',
+                              type = int,
+                              default = 20,
+                              help = 'Number of times to run each operation')
+    bench_parser.add_argument('--concurrency', '-c',
+                              dest = 'workers',
+                              type = int,
+                              default = argparse.SUPPRESS,
+                              help = 'Number of operations to run at once')
+    bench_parser.add_argument('--upload',
+                              metavar = 'FILE',
+                              help = ('File to measure uploads with. Uploads are '
+                                      'skipped if not given, since each one adds '
+                                      'to the library.'))
+    bench_parser.add_argument('--json',
+                              metavar = 'FILE',
+                              help = ('File to write the results to as JSON. Use '
+                                      '\'-\' to write them to stdout.'))
+    for command in (download, upload):
+        command.add_argument('--report',
+                             default = '-',
+                             help = ('File to write one JSON line per file to. '
+                                     'Defaults to stdout.'))
+
+def _key_values(pairs: list[str]) -> dict[str, str]:
+    return dict(re.split(r'\s*=\s*', pair, maxsplit = 1) for pair in pairs)
+
+def main(argv: Optional[list[str]] = None) -> int:
     parser = argparse.ArgumentParser(description = 'Photprysm CLI')
     parser.add_argument('host',
                         help = 'Host of the Photoprism server')
@@ -122,7 +421,16 @@ if __name__ == '__main__':
     parser.add_argument('--scheme',
                         default = 'http',
                         help = 'Scheme to send requests with')
-    subparsers = parser.add_subparsers(dest = 'mode')
+    parser.add_argument('--batch', '-b',
+                        metavar = 'FILE',
+                        help = ('Run the commands in FILE, one per line, and '
+                                'print one JSON result per line. Use \'-\' '
+                                'to read the commands from stdin.'))
+    parser.add_argument('--workers', '-w',
+                        type = int,
+                        default = 1,
+                        help = 'Number of batch commands or files to run at once')
+    subparsers = parser.add_subparsers(dest = 'mode', required = True)
     parser_user = subparsers.add_parser('user',
                                         help = 'Login as user')
     parser_user.add_argument('username',
@@ -135,17 +443,43 @@ if __name__ == '__main__':
                                help = 'Client ID')
     parser_client.add_argument('secret',
                                help = 'Client secret')
-    args = parser.parse_args()
-    server_api = core.ServerAPI(
-        host = args.host,
-        port = args.port,
+    for parser_mode in (parser_user, parser_client):
+        _add_commands(parser_mode)
+    args = parser.parse_args(argv)
+    server_api = core.get_api_url(
+        netloc = f'{args.host}:{args.port}',
         scheme = args.scheme)
     commander = PhotoprysmCLI()
     commander.server_api = server_api
     commander.mode = args.mode
+    commander.workers = args.workers
     if args.mode == 'user':
         commander.user = core.User(args.username, args.password)
     else:
         commander.client = core.Client(args.id, args.secret)
-    commander.cmdloop()
-    
+    command = getattr(args, 'command', None)
+    if args.batch is None and command is None:
+        commander.cmdloop()
+        return 0
+    commander.preloop()
+    try:
+        if command == 'bench':
+            failed = _bench(commander, args, sys.stdout)
+        elif command is not None:
+            transfer = _download if command == 'download' else _upload
+            if args.report == '-':
+                failed = transfer(commander, args, sys.stdout)
+            else:
+                with open(args.report, 'w') as out:
+                    failed = transfer(commander, args, out)
+        elif args.batch == '-':
+            failed = commander.run_batch(sys.stdin)
+        else:
+            with open(args.batch) as f:
+                failed = commander.run_batch(f)
+    finally:
+        commander.postloop()
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+import importlib
+from types import ModuleType
+from typing import Any
+
+class _LazyModule(ModuleType):
+    # Stands in for a module and imports it when one of its attributes is
+    # used. Going through importlib every time keeps this safe to use from
+    # several threads at once, unlike importlib.util.LazyLoader, and is only
+    # a dict lookup once the module has been imported.
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(importlib.import_module(self.__name__), attr)
+
+def lazy_import(name: str) -> ModuleType:
+    '''Stand-in for a module that is only imported once one of its
+    attributes is used. Only use this for modules accessed as
+    ``module.attr``, since nothing else is forwarded to the module.
+    '''
+    return _LazyModule(name)
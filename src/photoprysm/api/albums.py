@@ -1,16 +1,25 @@
+import os
 import re
 import enum
+import string
+import secrets
 import json
 import logging
 import requests
 
 from .. import core
-from ..models.albums import Album, AlbumProperties
+from . import photos
+from ..models.albums import Album, AlbumProperties, LazyAlbum
 from ..models.links import ShareLink, ShareLinkProperties
+from ..models.photos import Photo
+from ..models.timestamps import parse_timestamp
 
 from urllib.parse import urlparse, urljoin, quote as urlquote
 from dataclasses import dataclass, field, InitVar
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Optional
 
 logger = logging.getLogger(__name__)
 ValidSortOrderTypes = enum.StrEnum(
@@ -24,7 +33,8 @@ def get(
         count: int = 1,
         query: Optional[str] = None,
         offset: Optional[int] = None,
-        order: Optional[str] = None) -> list[Album]:
+        order: Optional[str] = None,
+        lazy: bool = False) -> list[Album]:
     '''
     Get albums matching the provided query.
 
@@ -34,30 +44,206 @@ def get(
     :param query: Query to send to the server.
     :param offset: Search result offset
     :param order: Sort order. Choose from favorites, name, title, added, or edited.
+    :param lazy: Set to True to return :class:`LazyAlbum` results, which only decode each attribute when it is first accessed
     :raises ValueError: If an invalid order is provided
     :raises requests.HTTPError: If the HTTP request fails
     '''
-    # Build the URL with the query
-    endpoint = 'albums'
-    _params = {'count': count, 'q': query, 'offset': offset, 'order': order}
-    params = {}
-    if order is not None:
-        if order not in ValidSortOrderTypes:
-            raise ValueError('Invalid value provided sort sort order.')
-        _params.update({'order': order})
-    for k,v in _params.items():
-        if v is None: continue
-        params[k] = v
+    params = _search_params(count, query, offset, order)
     resp = core.request(
         session = session,
-        url = urljoin(server_api, endpoint),
+        url = urljoin(server_api, 'albums'),
         method = 'GET',
         params = params)
+    model = LazyAlbum if lazy else Album
+    raw = resp.json()
+    if isinstance(raw, dict): raw = raw.values()
     rv = []
-    for raw_album in resp.json().values():
-        rv.append(Album.fromjson(raw_album))
+    for raw_album in raw:
+        rv.append(model.fromjson(raw_album))
     return rv
-            
+
+def _search_params(count, query, offset, order) -> dict[str, Any]:
+    if order is not None and order not in ValidSortOrderTypes:
+        raise ValueError('Invalid value provided sort sort order.')
+    _params = {'count': count, 'q': query, 'offset': offset, 'order': order}
+    params = {}
+    for k,v in _params.items():
+        if v is None: continue
+        params[k] = v
+    return params
+
+def _iter_pages(
+        session: requests.Session,
+        server_api: str,
+        params: dict[str, Any],
+        page_size: int,
+        prefetch: bool) -> Iterator[list[dict[str, Any]]]:
+    # Yields the raw JSON of each page. With prefetch, the next page is
+    # requested in the background while the current one is being used.
+    def _fetch(offset):
+        resp = core.request(
+            session = session,
+            url = urljoin(server_api, 'albums'),
+            method = 'GET',
+            params = dict(params, count = page_size, offset = offset))
+        raw = resp.json()
+        if isinstance(raw, dict): return list(raw.values())
+        return raw
+    executor = ThreadPoolExecutor(max_workers = 1) if prefetch else None
+    try:
+        offset = 0
+        page = _fetch(offset)
+        while page:
+            offset += len(page)
+            full = len(page) == page_size
+            upcoming = None
+            if full and executor is not None:
+                upcoming = executor.submit(_fetch, offset)
+            yield page
+            if not full: return
+            page = _fetch(offset) if upcoming is None else upcoming.result()
+    finally:
+        if executor is not None:
+            executor.shutdown(wait = False, cancel_futures = True)
+
+def iter_all(
+        session: requests.Session,
+        server_api: str, *,
+        page_size: int = 1000,
+        query: Optional[str] = None,
+        order: Optional[str] = None,
+        prefetch: bool = True,
+        lazy: bool = False) -> Iterator[Album]:
+    '''
+    Iterate over every album matching the query, requesting one page at a
+    time. While the albums of one page are being used, the next page is
+    already being requested in the background.
+
+    >>> titles = [album.title for album in photoprysm.iter_albums(session, server_api)]
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param page_size: (optional) Number of albums to request per page. Defaults to 1000.
+    :param query: (optional) Query to send to the server.
+    :param order: (optional) Sort order. Choose from favorites, name, title, added, or edited.
+    :param prefetch: (optional) Set to False to only request a page once the previous one has been used up
+    :param lazy: (optional) Set to True to yield :class:`LazyAlbum` results
+    :raises ValueError: If an invalid order is provided
+    :raises requests.HTTPError: If the HTTP request fails
+    '''
+    params = _search_params(page_size, query, None, order)
+    model = LazyAlbum if lazy else Album
+    for page in _iter_pages(session, server_api, params, page_size, prefetch):
+        for raw_album in page:
+            yield model.fromjson(raw_album)
+
+class AlbumIndex:
+    '''In-memory index from album title to UID, so looking up an album by
+    name doesn't cost a request. The index is built from one scan of every
+    album. After that, :meth:`refresh` only reads albums until it reaches
+    ones that haven't been edited since the last scan.
+
+    >>> index = photoprysm.AlbumIndex(session, server_api)
+    >>> index['Holidays']
+    'aqoe4m9204aigugh'
+
+    If more than one album has the same title, the title maps to the most
+    recently edited of them. Deleted albums are only dropped from the index
+    by a full refresh.
+
+    :param session: Session to make the requests from
+    :param server_api: String with the base URL for the API
+    :param page_size: (optional) Number of albums to request per page. Defaults to 1000.
+    '''
+    def __init__(
+            self,
+            session: requests.Session,
+            server_api: str, *,
+            page_size: int = 1000):
+        self.session = session
+        self.server_api = server_api
+        self.page_size = page_size
+        self._uids: dict[str, str] = {}
+        self._titles: dict[str, str] = {}
+        self._updated_at: Optional[datetime] = None
+        self.refresh(full = True)
+
+    def __len__(self) -> int:
+        return len(self._uids)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._uids
+
+    def __getitem__(self, title: str) -> str:
+        return self._uids[title]
+
+    def get(self, title: str, default: Optional[str] = None) -> Optional[str]:
+        '''Get the UID of the album with the title, or default if there is none'''
+        return self._uids.get(title, default)
+
+    def refresh(self, full: bool = False) -> int:
+        '''Read albums edited since the last scan into the index. The albums
+        are requested newest first, so this stops at the first page that
+        reaches an album the index has already seen.
+
+        :param full: (optional) Set to True to rebuild the index from every album instead
+        :raises requests.HTTPError: If the HTTP request fails
+        :returns: Number of albums that were read into the index
+        '''
+        if full:
+            self._uids.clear()
+            self._titles.clear()
+            self._updated_at = None
+        since = self._updated_at
+        params = _search_params(self.page_size, None, None, 'edited')
+        edited = []
+        pages = _iter_pages(self.session, self.server_api, params,
+                            self.page_size, prefetch = since is None)
+        done = False
+        for page in pages:
+            for raw_album in page:
+                updated_at = _updated_at(raw_album)
+                if since is not None and updated_at is not None and updated_at < since:
+                    done = True
+                    break
+                edited.append((raw_album, updated_at))
+            if done: break
+        pages.close()
+        # Oldest first, so the newest album wins when titles are the same
+        for raw_album, updated_at in reversed(edited):
+            self._add(raw_album.get('UID'), raw_album.get('Title'))
+            if updated_at is not None and (
+                    self._updated_at is None or updated_at > self._updated_at):
+                self._updated_at = updated_at
+        logger.debug(f'Read {len(edited)} albums into the index.')
+        return len(edited)
+
+    def add(self, album: Album) -> None:
+        '''Add an album to the index, e.g. one that was just created'''
+        self._add(album.uid, album.title)
+
+    def discard(self, album: Album | str) -> None:
+        '''Remove an album from the index, e.g. one that was just deleted'''
+        title = self._titles.pop(core._extract_uid(album), None)
+        if title is not None and self._uids.get(title) == core._extract_uid(album):
+            del self._uids[title]
+
+    def _add(self, uid: Optional[str], title: Optional[str]) -> None:
+        if uid is None: return
+        # The album may have been renamed since it was last seen
+        self.discard(uid)
+        if title is None: return
+        self._uids[title] = uid
+        self._titles[uid] = title
+
+def _updated_at(raw_album: dict[str, Any]) -> Optional[datetime]:
+    value = raw_album.get('UpdatedAt')
+    if not value: return None
+    try:
+        return parse_timestamp(value)
+    except ValueError:
+        return None
+
 def get_by_name(
         session: requests.Session,
         server_api: str,
@@ -104,6 +290,40 @@ def create(
         data = data)
     return Album.fromjson(resp.json())
 
+def create_many(
+        session: requests.Session,
+        server_api: str,
+        titles: Iterable[str], *,
+        favorite: bool = False,
+        index: Optional[AlbumIndex] = None,
+        max_workers: int = 8) -> list[core.BatchResult]:
+    '''
+    Creates many albums concurrently. If an :class:`AlbumIndex` is given,
+    titles that already have an album are skipped and the albums that are
+    created are added to it.
+
+    >>> index = photoprysm.AlbumIndex(session, server_api)
+    >>> results = photoprysm.create_albums(session, server_api, titles, index = index)
+    >>> uids = [r.value.uid for r in results if r.ok]
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param titles: Titles of the new albums. Each title should only appear once.
+    :param favorite: (optional) Mark the albums as favorites or not
+    :param index: (optional) Index of existing albums to skip
+    :param max_workers: (optional) Maximum number of requests to send at once. Defaults to 8.
+    :returns: One result per title, in the same order as the titles. The value of each result is the new Album, or an Album with only the UID and title of the existing one if it was skipped.
+    :rtype: list[BatchResult]
+    '''
+    def _create(title):
+        if index is not None and title in index:
+            existing = Album(index[title], title = title)
+            return core.BatchResult(title, value = existing, skipped = True)
+        album = create(session, server_api, title, favorite)
+        if index is not None: index.add(album)
+        return album
+    return core._run_batch(_create, list(titles), max_workers)
+
 def get_by_uid(
         session: requests.Session,
         server_api: str,
@@ -204,6 +424,159 @@ def clone(
     assert resp.json()['code'] == 200
     return Album.fromjson(resp.json()['album'])
 
+def add_photos(
+        session: requests.Session,
+        server_api: str,
+        album: Album | str,
+        *photos: Photo | str) -> None:
+    '''
+    Adds Photos to an album.
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param album: Album to add the photos to
+    :param photos: One or more Photos to add
+    '''
+    _album_photos(session, server_api, album, photos, 'POST')
+
+def remove_photos(
+        session: requests.Session,
+        server_api: str,
+        album: Album | str,
+        *photos: Photo | str) -> None:
+    '''
+    Removes Photos from an album. The photos themselves are not deleted.
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param album: Album to remove the photos from
+    :param photos: One or more Photos to remove
+    '''
+    _album_photos(session, server_api, album, photos, 'DELETE')
+
+def _album_photos(session, server_api, album, photos, method) -> None:
+    uid = core._extract_uid(album)
+    if uid is None:
+        raise TypeError('Must pass in UID as str or as attribute of object')
+    uids = core._extract_uids(photos)
+    if any([uid is None for uid in uids]):
+        raise TypeError('One of the photos has neither a \'uid\' '
+                        'attribute nor is it a str')
+    endpoint = f'albums/{uid}/photos'
+    core.request(
+        session = session,
+        url = urljoin(server_api, endpoint),
+        method = method,
+        data = json.dumps({'photos': uids}))
+
+def get_member_uids(
+        session: requests.Session,
+        server_api: str,
+        album: Album | str, *,
+        page_size: int = 1000) -> set[str]:
+    '''
+    Gets the UIDs of every Photo in an album. The search results are read
+    straight from the JSON, without building a Photo for each of them.
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param album: Album to get the photos of
+    :param page_size: (optional) Number of Photos to request per page. Defaults to 1000.
+    :returns: UIDs of the photos in the album
+    '''
+    if core._extract_uid(album) is None:
+        raise TypeError('Must pass in UID as str or as attribute of object')
+    rv = set()
+    # Not merged: the server pages merged results by file, so a page can come
+    # back short while more photos remain. A photo with several files may
+    # show up more than once, which doesn't matter for a set.
+    for page in photos.iter_pages(session, server_api, page_size = page_size,
+                                  album = album):
+        rv.update(raw_photo['UID'] for raw_photo in page)
+    return rv
+
+def sync_members(
+        session: requests.Session,
+        server_api: str,
+        album: Album | str,
+        desired: Iterable[Photo | str], *,
+        current: Optional[Iterable[Photo | str]] = None,
+        chunk_size: int = 500,
+        max_workers: int = 4) -> list[core.BatchResult]:
+    '''
+    Makes the photos in an album match the desired photos, sending only the
+    adds and removes that are needed. Photos already in the album are left
+    alone, so rebuilding a large album that barely changed only costs the
+    search for its current photos. The changes are sent in chunks, several at
+    a time.
+
+    >>> results = photoprysm.sync_album_members(session, server_api, album, uids)
+    >>> [r.item for r in results if not r.ok]
+    []
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param album: Album to sync
+    :param desired: Photos that should be in the album when done
+    :param current: (optional) Photos currently in the album. If not given, they are fetched with :func:`get_member_uids`.
+    :param chunk_size: (optional) Maximum number of photos to send per request. Defaults to 500.
+    :param max_workers: (optional) Maximum number of requests to send at once. Defaults to 4.
+    :returns: One result per request. The item of each result is a tuple of ``'add'`` or ``'remove'`` and the UIDs in that chunk.
+    :rtype: list[BatchResult]
+    '''
+    uid = core._extract_uid(album)
+    if uid is None:
+        raise TypeError('Must pass in UID as str or as attribute of object')
+    desired_uids = set(core._extract_uids(list(desired)))
+    if None in desired_uids:
+        raise TypeError('One of the photos has neither a \'uid\' '
+                        'attribute nor is it a str')
+    if current is None:
+        current_uids = get_member_uids(session, server_api, uid)
+    else: current_uids = set(core._extract_uids(list(current)))
+    # Sorted so the requests are the same from one run to the next
+    jobs = [('add', chunk) for chunk in core._chunked(
+                sorted(desired_uids - current_uids), chunk_size)]
+    jobs += [('remove', chunk) for chunk in core._chunked(
+                sorted(current_uids - desired_uids), chunk_size)]
+    logger.info(f'Syncing album \'{uid}\': '
+                f'{len(desired_uids - current_uids)} to add, '
+                f'{len(current_uids - desired_uids)} to remove.')
+    def _apply(job):
+        action, chunk = job
+        func = add_photos if action == 'add' else remove_photos
+        func(session, server_api, uid, *chunk)
+    return core._run_batch(_apply, jobs, max_workers)
+
+def clone_many(
+        session: requests.Session,
+        server_api: str,
+        clones: Iterable[tuple[Album | str, list[Album | str]]], *,
+        max_workers: int = 8) -> list[core.BatchResult]:
+    '''
+    Copies photos into many albums concurrently. See :func:`clone`.
+
+    >>> clones = [(event_album, [source_album]) for event_album in event_albums]
+    >>> results = photoprysm.clone_albums(session, server_api, clones)
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param clones: Pairs of an Album to copy the photos to and the Albums to copy them from
+    :param max_workers: (optional) Maximum number of requests to send at once. Defaults to 8.
+    :returns: One result per pair, in the same order as the pairs. The value of each result is the updated Album.
+    :rtype: list[BatchResult]
+    '''
+    clones = [(album, list(albums_to_copy)) for album, albums_to_copy in clones]
+    # Validate user input
+    for album, albums_to_copy in clones:
+        if core._extract_uid(album) is None or None in core._extract_uids(albums_to_copy):
+            raise TypeError('One of the albums has neither a \'uid\' '
+                            'attribute nor is it a str')
+    def _clone(pair):
+        album, albums_to_copy = pair
+        return clone(session, server_api, album, *albums_to_copy)
+    return core._run_batch(_clone, clones, max_workers)
+
 def like(
         session: requests.Session,
         server_api: str,
@@ -263,7 +636,48 @@ def get_share_links(
         method = 'GET')
     rv = []
     for link in resp.json():
-        rv.append(ShareLink.fromjson(resp.json()))
+        rv.append(ShareLink.fromjson(link))
+    return rv
+
+def scan_share_links(
+        session: requests.Session,
+        server_api: str,
+        albums: Optional[Iterable[Album | str]] = None, *,
+        errors: Optional[dict[str, Exception]] = None,
+        max_workers: int = 8) -> dict[str, list[ShareLink]]:
+    '''
+    Collects the share links of many albums at once, requesting the links of
+    several albums concurrently. Use it to audit views and expiry across the
+    whole library. An album whose links can't be requested doesn't stop the
+    scan. It is logged and left out, and its error is added to ``errors``.
+
+    >>> errors = {}
+    >>> inventory = photoprysm.scan_album_share_links(session, server_api, errors = errors)
+    >>> expired = [link for links in inventory.values() for link in links if link.expired]
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param albums: (optional) Albums to scan. Defaults to every album, found with :func:`iter_all`.
+    :param errors: (optional) Dict to add the error of each album that failed to, keyed by album UID
+    :param max_workers: (optional) Maximum number of requests to send at once. Defaults to 8.
+    :raises requests.HTTPError: If the albums can't be listed
+    :returns: Share links of each album keyed by album UID. Albums without share links map to an empty list.
+    '''
+    if albums is None:
+        uids = [album.uid for album in iter_all(session, server_api)]
+    else:
+        uids = core._extract_uids(list(albums))
+        if None in uids:
+            raise TypeError('One of the albums has neither a \'uid\' '
+                            'attribute nor is it a str')
+    results = core._run_batch(
+        lambda uid: get_share_links(session, server_api, uid),
+        uids, max_workers)
+    rv = {r.item: r.value for r in results if r.ok}
+    if errors is not None:
+        errors.update((r.item, r.error) for r in results if not r.ok)
+    logger.info(f'Found {sum(len(v) for v in rv.values())} share links '
+                f'across {len(rv)} albums.')
     return rv
 
 def add_share_link(
@@ -327,6 +741,7 @@ def update_share_link(
         method = 'PUT',
         data = link_props.json
     )
+    return ShareLink.fromjson(resp.json())
 
 def delete_share_link(
         session: requests.Session,
@@ -349,6 +764,140 @@ def delete_share_link(
     )
     return ShareLink.fromjson(resp.json())
 
+def expire_share_links(
+        session: requests.Session,
+        server_api: str,
+        share_links: Iterable[ShareLink], *,
+        max_workers: int = 8) -> list[core.BatchResult]:
+    '''Expire many share links concurrently. The links are kept, but their
+    expiry is set to one second. Photoprism counts the expiry from when a
+    link was last modified, which this update resets, so the links stop
+    working a second after it.
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param share_links: Share links to expire, e.g. from :func:`scan_share_links`
+    :param max_workers: (optional) Maximum number of requests to send at once. Defaults to 8.
+    :returns: One result per link, in the same order as the links. The value of each result is the updated ShareLink.
+    :rtype: list[BatchResult]
+    '''
+    # Leave max views as they are instead of sending the default of 0
+    link_props = ShareLinkProperties(expires = 1, max_views = None)
+    return core._run_batch(
+        lambda link: update_share_link(session, server_api, link, link_props),
+        list(share_links), max_workers)
+
+def rotate_share_links(
+        session: requests.Session,
+        server_api: str,
+        share_links: Iterable[ShareLink], *,
+        max_workers: int = 8) -> list[core.BatchResult]:
+    '''Give many share links new random tokens concurrently, so the old URLs
+    stop working. Everything else about the links stays the same.
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param share_links: Share links to rotate, e.g. from :func:`scan_share_links`
+    :param max_workers: (optional) Maximum number of requests to send at once. Defaults to 8.
+    :returns: One result per link, in the same order as the links. The value of each result is the updated ShareLink with its new token.
+    :rtype: list[BatchResult]
+    '''
+    def _rotate(link):
+        link_props = ShareLinkProperties(
+            token = _new_token(), expires = None, max_views = None)
+        return update_share_link(session, server_api, link, link_props)
+    return core._run_batch(_rotate, list(share_links), max_workers)
+
+def delete_share_links(
+        session: requests.Session,
+        server_api: str,
+        share_links: Iterable[ShareLink], *,
+        max_workers: int = 8) -> list[core.BatchResult]:
+    '''Delete many share links concurrently.
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param share_links: Share links to delete, e.g. from :func:`scan_share_links`
+    :param max_workers: (optional) Maximum number of requests to send at once. Defaults to 8.
+    :returns: One result per link, in the same order as the links
+    :rtype: list[BatchResult]
+    '''
+    return core._run_batch(
+        lambda link: delete_share_link(session, server_api, link),
+        list(share_links), max_workers)
+
+# Photoprism share link tokens are 10 lowercase letters and digits
+_TOKEN_ALPHABET = string.ascii_lowercase + string.digits
+
+def _new_token() -> str:
+    return ''.join(secrets.choice(_TOKEN_ALPHABET) for _ in range(10))
+
+def iter_download(
+        session: requests.Session,
+        server_api: str,
+        album: Album | str, *,
+        offset: int = 0,
+        chunk_size: int = 1024 * 1024,
+        download_token: Optional[str] = None) -> Iterator[bytes]:
+    '''Stream the ZIP archive of every photo in the album in chunks, without
+    holding the whole archive in memory. Use this to hand the archive off to
+    something other than a local file, e.g. the parts of a multipart upload.
+
+    >>> for chunk in photoprysm.iter_album_download(session, server_api, album):
+    ...     upload.write(chunk)
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param album: Album to download
+    :param offset: (optional) Number of bytes to skip, to resume an interrupted download. Defaults to 0.
+    :param chunk_size: (optional) Size of the chunks in bytes. Defaults to 1 MiB.
+    :param download_token: (optional) Download token of the session. Requested from the server if not provided.
+    :raises requests.HTTPError: If the HTTP request fails
+    :raises ValueError: If the download token could not be received, or if an offset is given and the server can't resume the download, e.g. because the archive was built again
+    '''
+    uid = core._extract_uid(album)
+    if uid is None:
+        raise TypeError('Must pass in UID as str or as attribute of object')
+    if download_token is None:
+        download_token = core._get_download_token(session, server_api)
+    return core._iter_range(
+        session, urljoin(server_api, f'albums/{uid}/dl'),
+        params = {'t': download_token}, offset = offset,
+        chunk_size = chunk_size)
+
+def download(
+        session: requests.Session,
+        server_api: str,
+        album: Album | str,
+        path: str | os.PathLike, *,
+        resume: bool = True,
+        chunk_size: int = 1024 * 1024,
+        download_token: Optional[str] = None) -> Path:
+    '''Download the ZIP archive of every photo in the album to a file. The
+    archive is written in chunks to a ``.part`` file next to the path, which
+    is renamed once the download finishes. If the download is interrupted,
+    calling this again picks up where the ``.part`` file left off.
+
+    >>> photoprysm.download_album(session, server_api, album, 'holidays.zip')
+    PosixPath('holidays.zip')
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param album: Album to download
+    :param path: Path of the file to write the archive to
+    :param resume: (optional) Set to False to start over instead of resuming an interrupted download
+    :param chunk_size: (optional) Size of the chunks in bytes. Defaults to 1 MiB.
+    :param download_token: (optional) Download token of the session. Requested from the server if not provided.
+    :raises requests.HTTPError: If the HTTP request fails
+    :returns: Path of the archive
+    '''
+    return core._save_stream(
+        path,
+        lambda offset: iter_download(
+            session, server_api, album, offset = offset,
+            chunk_size = chunk_size, download_token = download_token),
+        resume = resume)
+
 def get_cover_image(
         user: core.User,
         server_api: str,
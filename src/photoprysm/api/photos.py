@@ -8,13 +8,25 @@ import hashlib
 import requests
 
 from .. import core
+from ..cache import DiskCache
 from ..models.albums import Album, AlbumProperties
+from ..models.base import camel, dumps
+from ..models.timestamps import parse_timestamp
 from ..models.photos import Photo, PhotoFile, PhotoDetails, PhotoProperties
+from ..models.photos import CompactPhoto, LazyPhoto
+from ..models.batch import PhotoBatch
 
 from urllib.parse import urljoin, quote as urlquote
-from typing import Optional
+from pathlib import Path
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Optional
 
 logger = logging.getLogger(__name__)
+ThumbnailSizes = enum.StrEnum(
+    'ThumbnailSizes',
+    'TILE_50,TILE_100,TILE_224,TILE_500,FIT_720,FIT_1280,FIT_1920,'
+    'FIT_2048,FIT_2560,FIT_3840,FIT_4096,FIT_7680')
 
 def get(
         session: requests.Session,
@@ -29,7 +41,9 @@ def get(
         public: Optional[bool] = None,
         album: Optional[Album | str] = None,
         path: Optional[os.PathLike] = None,
-        video: Optional[bool] = None) -> list[Photo]:
+        video: Optional[bool] = None,
+        batch: bool = False,
+        lazy: bool = False) -> list[Photo] | PhotoBatch:
     '''Get list of Photos by query.
 
     :param session: Pre-configured `requests.Session`_ object to send the request with
@@ -44,9 +58,59 @@ def get(
     :param Album|str album: (optional) Album to search under. You can provide a handle to an Album instance or you can provide the UID as a string directly.
     :param os.PathLike path: (optional) Path to the photo
     :param bool video: (optional) True if result should be of type video
+    :param bool batch: (optional) Set to True to return the results as a :class:`PhotoBatch` instead of a list. Use this for large result sets.
+    :param bool lazy: (optional) Set to True to return :class:`LazyPhoto` results, which only decode each attribute when it is first accessed
     :raises requests.HTTPError: If the request is poorly formed or the server is not accepting requests
     :returns: List of Photos that match from the query
     '''
+    params = _search_params(count, quality, merged, query, offset, order,
+                            public, album, path, video)
+    if batch:
+        return PhotoBatch.fromjson(_get_raw(session, server_api, params))
+    model = LazyPhoto if lazy else Photo
+    rv = []
+    for raw_photo in _get_raw(session, server_api, params):
+        rv.append(model.fromjson(raw_photo))
+    return rv
+
+def iter_pages(
+        session: requests.Session,
+        server_api: str,
+        *,
+        page_size: int = 1000,
+        quality: int = 0,
+        merged: Optional[bool] = None,
+        query: Optional[str] = None,
+        order: Optional[str] = None,
+        public: Optional[bool] = None,
+        album: Optional[Album | str] = None,
+        path: Optional[os.PathLike] = None,
+        video: Optional[bool] = None,
+        batch: bool = False) -> Iterator[list[dict[str, Any]] | PhotoBatch]:
+    '''Iterate over every page of Photos matching the query. The pages are
+    yielded as the JSON responses from the server, without building any
+    models, for when you need to go through the whole library quickly.
+
+    :param session: Pre-configured `requests.Session`_ object to send the request with
+    :param server_api: Base URL of the server API
+    :param int page_size: (optional) Number of Photos to request per page. Defaults to 1000.
+    :param bool batch: (optional) Set to True to yield each page as a :class:`PhotoBatch` instead
+    :raises requests.HTTPError: If the request is poorly formed or the server is not accepting requests
+    :returns: Iterator over the pages of Photos as JSON
+
+    See :func:`get` for the rest of the parameters.
+    '''
+    offset = 0
+    while True:
+        params = _search_params(page_size, quality, merged, query, offset,
+                                order, public, album, path, video)
+        page = _get_raw(session, server_api, params)
+        if page: yield PhotoBatch.fromjson(page) if batch else page
+        if len(page) < page_size: return
+        offset += len(page)
+
+def _search_params(count, quality, merged, query, offset, order, public,
+                   album, path, video) -> dict[str, Any]:
     # Validate user input
     if quality is not None and quality not in range(0,7):
         raise TypeError('Quality is out of range. It must be between 0 and 7.')
@@ -55,6 +119,9 @@ def get(
                'quality': quality,
                'q': query,
                'merged': _merged,
+               'offset': offset,
+               'order': order,
+               'public': public,
                's': core._extract_uid(album),
                'path': None if path is None else str(path),
                'video': video}
@@ -62,15 +129,20 @@ def get(
     for k,v in _params.items():
         if v is None: continue
         params[k] = v
+    return params
+
+def _get_raw(
+        session: requests.Session,
+        server_api: str,
+        params: dict[str, Any]) -> list[dict[str, Any]]:
     resp = core.request(
         session = session,
         url = urljoin(server_api, 'photos'),
         method = 'GET',
         params = params)
-    rv = []
-    for raw_photo in resp.json().values():
-        rv.append(Photo.fromjson(raw_photo))
-    return rv
+    raw = resp.json()
+    if isinstance(raw, dict): return list(raw.values())
+    return raw
 
 def get_by_uid(
         session: requests.Session,
@@ -214,7 +286,7 @@ def update(
     if uid is None:
         raise TypeError('Must pass in UID as str or as attribute of object')
     endpoint = f'photos/{uid}'
-    data = json.dumps(photo_props.json)
+    data = photo_props.json
     resp = core.request(
         session = session,
         url = urljoin(server_api, endpoint),
@@ -222,6 +294,90 @@ def update(
         data = data)
     return Photo.fromjson(resp.json())
     
+def update_many(
+        session: requests.Session,
+        server_api: str,
+        updates: Iterable[tuple[Photo | str, PhotoProperties]], *,
+        known: Optional[dict[str, dict[str, Any]]] = None,
+        max_workers: int = 8) -> list[core.BatchResult]:
+    '''Update many photos concurrently, only sending the fields that changed.
+
+    Each update is compared against the last known state of the photo, which
+    is looked up by UID in ``known`` (the JSON response of the photo as it
+    comes from the server). If there is no known state and a Photo is given,
+    its attributes are used instead. Fields that already match are left out
+    of the request, and updates where nothing changed are skipped without
+    sending a request at all. ``known`` is kept up to date with the responses,
+    so passing the same dict to later calls skips repeated edits.
+
+    >>> known = {}
+    >>> updates = [(photo, photoprysm.PhotoProperties(title = 'Beach')) for photo in beach_photos]
+    >>> results = photoprysm.update_photos(session, server_api, updates, known = known)
+    >>> [r.item for r in results if not r.ok]
+    []
+
+    :param requests.Session session: Pre-configured `requests.Session`_ object to send the request with
+    :param str server_api: Base URL of the server API
+    :param updates: Pairs of Photo (or UID) and the properties to update it with. Each photo should only appear once.
+    :param known: (optional) Last known state of the photos, keyed by UID
+    :type known: dict[str, dict]
+    :param int max_workers: (optional) Maximum number of requests to send at once. Defaults to 8.
+    :returns: One result per update, in the same order as the updates. The value of each result is the updated Photo, or None if it was skipped.
+    :rtype: list[BatchResult]
+    '''
+    updates = list(updates)
+    # Validate user input
+    for photo, _ in updates:
+        if core._extract_uid(photo) is None:
+            raise TypeError('One of the photos has neither a \'uid\' '
+                            'attribute nor is it a str')
+    if known is None: known = {}
+    def _update(update):
+        photo, photo_props = update
+        uid = core._extract_uid(photo)
+        state = known.get(uid)
+        if state is None and isinstance(photo, (Photo, CompactPhoto)):
+            state = {camel(attr.name): getattr(photo, attr.name)
+                     for attr in fields(photo)}
+        changed = _diff_properties(photo_props, state or {})
+        if not changed:
+            return core.BatchResult(update, skipped = True)
+        resp = core.request(
+            session = session,
+            url = urljoin(server_api, f'photos/{uid}'),
+            method = 'PUT',
+            data = dumps(changed))
+        known[uid] = resp.json()
+        return Photo.fromjson(dict(known[uid]))
+    return core._run_batch(_update, updates, max_workers)
+
+def _diff_properties(
+        photo_props: PhotoProperties | PhotoDetails,
+        state: dict[str, Any]) -> dict[str, Any]:
+    # Returns the JSON of the properties that differ from the state
+    rv = {}
+    for attr in fields(photo_props):
+        value = getattr(photo_props, attr.name)
+        if value is None: continue
+        key = camel(attr.name)
+        known = state.get(key)
+        if isinstance(value, PhotoDetails):
+            value = _diff_properties(value, known or {})
+            if not value: continue
+        elif isinstance(value, datetime) and isinstance(known, str):
+            if _same_timestamp(known, value): continue
+        elif known == value: continue
+        rv[key] = value
+    return rv
+
+def _same_timestamp(known: str, value: datetime) -> bool:
+    # A timestamp the server sent malformed counts as changed, rather than
+    # failing the update
+    try:
+        return bool(known) and parse_timestamp(known) == value
+    except ValueError:
+        return False
+
 def approve(
         session: requests.Session,
         server_api: str,
@@ -436,7 +592,8 @@ def download(
     resp = core.request(
         session = session,
         url = urljoin(server_api, endpoint),
-        method = 'GET')
+        method = 'GET',
+        params = {'t': download_token})
     return resp.content
 
 def download_to(
@@ -458,3 +615,283 @@ def download_to(
     f.flush()
     f.seek(0)
     f.write(content)
+
+def iter_download_file(
+        session: requests.Session,
+        server_api: str,
+        f: Photo|PhotoFile|str, *,
+        offset: int = 0,
+        chunk_size: int = 1024 * 1024,
+        download_token: Optional[str] = None) -> Iterator[bytes]:
+    '''Stream the original of a file in chunks, without holding the whole
+    file in memory.
+
+    :param session: Pre-configured `requests.Session`_ object to send the request with
+    :param server_api: Base URL of the server API
+    :param f: Photo, PhotoFile or SHA1 hash of the file. If a Photo is given, its primary file is downloaded.
+    :param int offset: (optional) Number of bytes to skip, to resume an interrupted download. Defaults to 0.
+    :param int chunk_size: (optional) Size of the chunks in bytes. Defaults to 1 MiB.
+    :param str download_token: (optional) Download token of the session. Requested from the server if not provided.
+    :raises requests.HTTPError: If it runs into an HTTP error while sending the request
+    :raises ValueError: If the download token could not be received, or if an offset is given and the server can't resume the download
+    '''
+    hashbrown = _extract_hash(f)
+    if hashbrown is None:
+        raise TypeError('Must pass in hash as str or as attribute of object')
+    if download_token is None:
+        download_token = core._get_download_token(session, server_api)
+    return core._iter_range(
+        session, urljoin(server_api, f'dl/{hashbrown}'),
+        params = {'t': download_token}, offset = offset,
+        chunk_size = chunk_size)
+
+def download_file(
+        session: requests.Session,
+        server_api: str,
+        f: Photo|PhotoFile|str,
+        path: str|os.PathLike, *,
+        resume: bool = True,
+        verify: bool = True,
+        chunk_size: int = 1024 * 1024,
+        download_token: Optional[str] = None) -> Path:
+    '''Download the original of a file to disk in chunks. The file is written
+    to a ``.part`` file next to the path, which is renamed once the download
+    finishes, and an interrupted download picks up where the ``.part`` file
+    left off. The SHA1 hash of the finished file is checked against the hash
+    on the server.
+
+    >>> photoprysm.download_file(session, server_api, photo, 'beach.jpg')
+    PosixPath('beach.jpg')
+
+    :param session: Pre-configured `requests.Session`_ object to send the request with
+    :param server_api: Base URL of the server API
+    :param f: Photo, PhotoFile or SHA1 hash of the file
+    :param path: Path to write the file to
+    :param bool resume: (optional) Set to False to start over instead of resuming an interrupted download
+    :param bool verify: (optional) Set to False to skip checking the hash
+    :param int chunk_size: (optional) Size of the chunks in bytes. Defaults to 1 MiB.
+    :param str download_token: (optional) Download token of the session. Requested from the server if not provided.
+    :raises requests.HTTPError: If it runs into an HTTP error while sending the request
+    :raises ValueError: If the hash of the downloaded file doesn't match
+    :returns: Path of the file
+    '''
+    hashbrown = _extract_hash(f)
+    if hashbrown is None:
+        raise TypeError('Must pass in hash as str or as attribute of object')
+    if download_token is None:
+        download_token = core._get_download_token(session, server_api)
+    return core._save_stream(
+        path,
+        lambda offset: iter_download_file(
+            session, server_api, hashbrown, offset = offset,
+            chunk_size = chunk_size, download_token = download_token),
+        resume = resume,
+        sha1 = hashbrown if verify else None)
+
+def upload_files(
+        session: requests.Session,
+        server_api: str,
+        paths: Iterable[str|os.PathLike], *,
+        albums: Optional[list[Album|str]] = None,
+        max_workers: int = 4,
+        chunk_size: int = 1024 * 1024) -> list[core.BatchResult]:
+    '''Upload many files from disk concurrently as the authenticated user.
+    Unlike :func:`upload`, each file is streamed from disk instead of read
+    into memory first, and the upload is only processed once at the end.
+    Each file is hashed while it is sent, and the hash is then looked up on
+    the server to check that the file arrived intact.
+
+    >>> results = photoprysm.upload_files(session, server_api, paths, albums = [album])
+    >>> [r.item for r in results if not r.ok]
+    []
+
+    :param session: Pre-configured `requests.Session`_ object to send the request with
+    :param server_api: Base URL of the server API
+    :param paths: Paths of the files to upload
+    :param albums: (optional) List of albums to add the files to
+    :type albums: list[Album|str]
+    :param int max_workers: (optional) Maximum number of files to send at once. Defaults to 4.
+    :param int chunk_size: (optional) Size of the chunks to send in bytes. Defaults to 1 MiB.
+    :raises requests.HTTPError: If processing the upload fails
+    :returns: One result per path, in the same order as the paths. The value of each result is the Photo the file ended up in.
+    :rtype: list[BatchResult]
+    '''
+    paths = [Path(p) for p in paths]
+    resp = core.request(
+        session = session,
+        url = urljoin(server_api, 'session'),
+        method = 'GET')
+    try:
+        uid = resp.json()['user']['UID']
+        token = resp.json()['config']['downloadToken']
+    except KeyError:
+        raise ValueError('Something went wrong when getting the session. Is '
+                         'the session already closed?')
+    url = urljoin(server_api, f'users/{uid}/upload/{token}')
+    def _send(path):
+        hasher = hashlib.sha1()
+        boundary = os.urandom(16).hex()
+        core.request(
+            session = session,
+            url = url,
+            method = 'POST',
+            headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'},
+            data = _multipart(path, boundary, hasher, chunk_size))
+        return hasher.hexdigest()
+    results = core._run_batch(_send, paths, max_workers)
+    if not any(r.ok for r in results): return results
+    core.request(
+        session = session,
+        url = url,
+        method = 'PUT',
+        data = json.dumps({'albums': core._extract_uids(albums)}))
+    # Make sure the server has each file under the hash that was sent
+    def _verify(result):
+        if not result.ok: return result
+        try:
+            resp = core.request(
+                session = session,
+                url = urljoin(server_api, f'files/{result.value}'),
+                method = 'GET')
+            photo = get_by_uid(session, server_api, resp.json()['PhotoUID'])
+        except requests.RequestException as err:
+            logger.error(f'Could not find {result.item} on the server: {err}')
+            return core.BatchResult(result.item, error = err)
+        return core.BatchResult(result.item, value = photo)
+    return core._map_concurrently(_verify, results, max_workers)
+
+def _multipart(
+        path: Path,
+        boundary: str,
+        hasher: Any,
+        chunk_size: int) -> Iterator[bytes]:
+    # Multipart form body for one file, read from disk as it is sent
+    name = path.name.replace('"', '%22')
+    yield (f'--{boundary}\r\n'
+           f'Content-Disposition: form-data; name="files"; filename="{name}"\r\n'
+           f'Content-Type: application/octet-stream\r\n\r\n').encode()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+            yield chunk
+    yield f'\r\n--{boundary}--\r\n'.encode()
+
+def get_thumbnail_url(
+        server_api: str,
+        f: Photo|PhotoFile|str,
+        preview_token: str,
+        size: str = ThumbnailSizes.TILE_224) -> str:
+    '''Construct the URL of the thumbnail for a file.
+
+    :param server_api: Base URL of the server API
+    :param f: Photo, PhotoFile or SHA1 hash of the file. If a Photo is given, the thumbnail of its primary file is used.
+    :param str preview_token: Preview token of the session. See :func:`get_tokens_from_session`.
+    :param str size: (optional) Size of the thumbnail. Must be one of ``ThumbnailSizes``. Defaults to ``'tile_224'``.
+    :raises ValueError: If an invalid size is provided
+    '''
+    if size not in ThumbnailSizes:
+        raise ValueError(f'Invalid thumbnail size \'{size}\'.')
+    hashbrown = _extract_hash(f)
+    if hashbrown is None:
+        raise TypeError('Must pass in hash as str or as attribute of object')
+    return urljoin(server_api, f't/{hashbrown}/{preview_token}/{size}')
+
+def get_thumbnail(
+        session: requests.Session,
+        server_api: str,
+        f: Photo|PhotoFile|str,
+        size: str = ThumbnailSizes.TILE_224, *,
+        preview_token: Optional[str] = None,
+        cache: Optional[DiskCache] = None) -> bytes|None:
+    '''Download the thumbnail of a file.
+
+    :param session: Pre-configured `requests.Session`_ object to send the request with
+    :param server_api: Base URL of the server API
+    :param f: Photo, PhotoFile or SHA1 hash of the file
+    :param str size: (optional) Size of the thumbnail. Defaults to ``'tile_224'``.
+    :param str preview_token: (optional) Preview token of the session. Requested from the server if not provided.
+    :param DiskCache cache: (optional) Cache to read the thumbnail from and store it in
+    :raises requests.HTTPError: If it runs into an HTTP error while sending the request
+    :returns: Contents of the thumbnail image
+    '''
+    key = _thumbnail_key(f, size)
+    if cache is not None:
+        content = cache.get(key)
+        if content is not None: return content
+    if preview_token is None:
+        preview_token = core.get_tokens_from_session(
+            session, server_api).get('preview_token')
+        if preview_token is None:
+            logger.error('Preview token could not be received.')
+            return None
+    url = get_thumbnail_url(server_api, f, preview_token, size)
+    resp = core.request(
+        session = session,
+        url = url,
+        method = 'GET')
+    if cache is not None:
+        cache.put(key, resp.content)
+    return resp.content
+
+def thumbnails(
+        session: requests.Session,
+        server_api: str,
+        *files: Photo|PhotoFile|str,
+        size: str = ThumbnailSizes.TILE_224,
+        cache: Optional[DiskCache] = None,
+        max_workers: int = 8) -> list[bytes]|None:
+    '''Download the thumbnails of multiple files concurrently.
+
+    >>> cache = photoprysm.DiskCache('thumbnails')
+    >>> with photoprysm.user_session(user, server_api) as session:
+    >>>     photos = photoprysm.get_photos(session, server_api, count = 100)
+    >>>     images = photoprysm.get_thumbnails(session, server_api, *photos, cache = cache)
+
+    :param session: Pre-configured `requests.Session`_ object to send the request with
+    :param server_api: Base URL of the server API
+    :param files: One or more Photos, PhotoFiles or SHA1 hashes of files
+    :param str size: (optional) Size of the thumbnails. Defaults to ``'tile_224'``.
+    :param DiskCache cache: (optional) Cache to read the thumbnails from and store them in. Only the thumbnails missing from the cache are requested from the server.
+    :param int max_workers: (optional) Maximum number of requests to send at once. Defaults to 8.
+    :raises requests.HTTPError: If it runs into an HTTP error while sending the requests
+    :returns: Contents of the thumbnail images, in the same order as the files
+    '''
+    if size not in ThumbnailSizes:
+        raise ValueError(f'Invalid thumbnail size \'{size}\'.')
+    rv = [None] * len(files)
+    if cache is not None:
+        for i, f in enumerate(files):
+            rv[i] = cache.get(_thumbnail_key(f, size))
+    misses = [i for i, content in enumerate(rv) if content is None]
+    if not misses: return rv
+    # The preview token is shared by every request, so only get it once, and
+    # only if something has to be downloaded
+    preview_token = core.get_tokens_from_session(
+        session, server_api).get('preview_token')
+    if preview_token is None:
+        logger.error('Preview token could not be received.')
+        return None
+    def _get(i):
+        return get_thumbnail(
+            session, server_api, files[i], size,
+            preview_token = preview_token,
+            cache = cache)
+    for i, content in zip(misses, core._map_concurrently(_get, misses, max_workers)):
+        rv[i] = content
+    return rv
+
+def _thumbnail_key(f: Photo|PhotoFile|str, size: str) -> str:
+    return f'{_extract_hash(f)}_{size}'
+
+def _extract_hash(obj: Photo|PhotoFile|dict|str) -> str|None:
+    if obj is None: return None
+    elif isinstance(obj, str): return obj
+    elif isinstance(obj, dict): return obj.get('Hash')
+    elif isinstance(obj, (Photo, CompactPhoto)):
+        # Files are kept as they come in from the response unless decoded
+        files = obj.files or []
+        for f in files:
+            if (f.get('Primary') if isinstance(f, dict) else f.primary):
+                return _extract_hash(f)
+        return _extract_hash(files[0]) if files else None
+    else: return getattr(obj, 'hash', None)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import os
+import time
+import logging
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from ._lazy import lazy_import
+
+# Loaded on first use, so the CLI can list the operations without them
+requests = lazy_import('requests')
+core = lazy_import('photoprysm.core')
+photos = lazy_import('photoprysm.api.photos')
+photo_models = lazy_import('photoprysm.models.photos')
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ('login', 'search', 'get', 'update', 'download', 'upload')
+
+@dataclass
+class BenchResult:
+    '''Latency and throughput of one operation from :func:`run`. Latencies
+    are in milliseconds.
+
+    :param str name: Name of the operation, e.g. ``'search[count=100]'``
+    :param int requests: Number of times the operation was run
+    :param int errors: Number of runs that failed
+    :param float p50: Median latency
+    :param float p95: 95th percentile latency
+    :param float p99: 99th percentile latency
+    :param float mean: Mean latency
+    :param float rps: Runs per second, across all workers
+    :param float bytes_per_second: (optional) Throughput of transfers
+    '''
+    name: str
+    requests: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    rps: float
+    bytes_per_second: Optional[float] = None
+
+def run(
+        session: requests.Session,
+        server_api: str, *,
+        login: Optional[Callable[[], Any]] = None,
+        operations: Iterable[str] = OPERATIONS,
+        counts: Iterable[int] = (1, 100, 1000),
+        iterations: int = 20,
+        concurrency: int = 1,
+        upload_path: Optional[str | os.PathLike] = None) -> list[BenchResult]:
+    '''Measure the latency and throughput of common requests against a
+    server. Each operation is run ``iterations`` times from ``concurrency``
+    threads at once.
+
+    The photo to get, update and download is the first result of a search.
+    Updating sets its title to what it already is, so nothing changes on the
+    server. Uploading is only measured if a file is given, since every upload
+    adds the file to the library.
+
+    >>> results = photoprysm.bench.run(session, server_api, concurrency = 8)
+    >>> print(photoprysm.bench.format_results(results))
+
+    :param session: Session to make the requests from
+    :param server_api: String with the base URL for the API
+    :param login: (optional) Function that logs in and out once. Login is only measured if given.
+    :param operations: (optional) Names of the operations to measure. Defaults to all of ``OPERATIONS``.
+    :param counts: (optional) Number of results to request for each search. Defaults to 1, 100 and 1000.
+    :param int iterations: (optional) Number of times to run each operation. Defaults to 20.
+    :param int concurrency: (optional) Number of operations to run at once. Defaults to 1.
+    :param upload_path: (optional) File to upload over and over
+    :raises ValueError: If an unknown operation is given
+    '''
+    operations = list(operations)
+    for name in operations:
+        if name not in OPERATIONS:
+            raise ValueError(f'Unknown operation \'{name}\'.')
+    results = []
+    def _measure(name, func, size = None):
+        results.append(_time(name, func, iterations, concurrency, size))
+        logger.info(f'Measured {name}.')
+    if 'login' in operations and login is not None:
+        _measure('login', login)
+    if 'search' in operations:
+        for count in counts:
+            _measure(f'search[count={count}]', lambda count = count: photos.get(
+                session, server_api, count = count))
+    # Everything else needs a photo to work on
+    raw_photo = None
+    if {'get', 'update', 'download'} & set(operations):
+        raw_photo = next(iter(photos._get_raw(
+            session, server_api, {'count': 1, 'merged': 'true'})), None)
+        if raw_photo is None:
+            logger.warning('No photos on the server, so get, update and '
+                           'download are not measured.')
+    if raw_photo is not None:
+        uid = raw_photo['UID']
+        if 'get' in operations:
+            _measure('get', lambda: photos.get_by_uid(session, server_api, uid))
+        if 'update' in operations:
+            props = photo_models.PhotoProperties(title = raw_photo.get('Title') or '')
+            _measure('update', lambda: photos.update(session, server_api, uid, props))
+        hashbrown = photo_models._primary_file(raw_photo).get('Hash')
+        if 'download' in operations and hashbrown:
+            download_token = core._get_download_token(session, server_api)
+            def _download():
+                return sum(len(chunk) for chunk in photos.iter_download_file(
+                    session, server_api, hashbrown, download_token = download_token))
+            _measure('download', _download, size = True)
+    if 'upload' in operations and upload_path is not None:
+        size = Path(upload_path).stat().st_size
+        def _upload():
+            result = photos.upload_files(session, server_api, [upload_path])[0]
+            if not result.ok: raise result.error
+            return size
+        _measure('upload', _upload, size = True)
+    return results
+
+def _time(
+        name: str,
+        func: Callable[[], Any],
+        iterations: int,
+        concurrency: int,
+        size: Optional[bool] = None) -> BenchResult:
+    def _once(_):
+        start = time.perf_counter()
+        try:
+            rv = func()
+        except (requests.RequestException, ValueError) as err:
+            logger.debug(f'{name} failed: {err}')
+            return time.perf_counter() - start, False, None
+        return time.perf_counter() - start, True, rv
+    start = time.perf_counter()
+    runs = core._map_concurrently(_once, range(iterations), concurrency)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    ok = [(latency, rv) for latency, succeeded, rv in runs if succeeded]
+    latencies = sorted(latency * 1000 for latency, _ in ok)
+    transferred = sum(rv for _, rv in ok) if size else None
+    return BenchResult(
+        name = name,
+        requests = len(runs),
+        errors = len(runs) - len(ok),
+        p50 = _percentile(latencies, 50),
+        p95 = _percentile(latencies, 95),
+        p99 = _percentile(latencies, 99),
+        mean = sum(latencies) / len(latencies) if latencies else 0.0,
+        rps = len(ok) / elapsed,
+        bytes_per_second = None if transferred is None else transferred / elapsed)
+
+def _percentile(values: list[float], q: float) -> float:
+    # Linear interpolation between the closest ranks, like numpy.percentile
+    if not values: return 0.0
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+def format_results(results: list[BenchResult]) -> str:
+    '''Format results from :func:`run` as a table'''
+    header = (f'{"operation":<22}{"n":>6}{"err":>5}{"p50 ms":>10}{"p95 ms":>10}'
+              f'{"p99 ms":>10}{"req/s":>10}{"MB/s":>9}')
+    lines = [header, '-' * len(header)]
+    for r in results:
+        mbps = '' if r.bytes_per_second is None else f'{r.bytes_per_second / 1e6:.2f}'
+        lines.append(f'{r.name:<22}{r.requests:>6}{r.errors:>5}{r.p50:>10.2f}'
+                     f'{r.p95:>10.2f}{r.p99:>10.2f}{r.rps:>10.1f}{mbps:>9}')
+    return '\n'.join(lines)
+
+def results_json(results: list[BenchResult]) -> list[dict[str, Any]]:
+    '''Results from :func:`run` as plain dicts, ready for ``json.dumps``'''
+    return [asdict(r) for r in results]
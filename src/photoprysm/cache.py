@@ -0,0 +1,132 @@
+import os
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    '''Content-addressed cache that stores blobs on disk and evicts the least
+    recently used entries once the total size grows past a limit.
+
+    Keys are expected to already be content addresses (e.g. the SHA1 hash of
+    the original file plus the thumbnail size), so an entry never has to be
+    invalidated, only evicted.
+
+    >>> cache = DiskCache('~/.cache/photoprysm/thumbnails', max_size = 512 * 2**20)
+    >>> cache.put('3cad9168fa6acc5c5c2965ddf6ec465ca42fd818_tile_224', content)
+    >>> cache.get('3cad9168fa6acc5c5c2965ddf6ec465ca42fd818_tile_224') == content
+    True
+
+    :param directory: Directory to store the cache entries in. Created if it does not exist.
+    :type directory: str or os.PathLike
+    :param int max_size: (optional) Maximum total size of the cache in bytes. Defaults to 256 MiB.
+    '''
+    def __init__(
+            self,
+            directory: str | os.PathLike,
+            max_size: int = 256 * 2**20):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents = True, exist_ok = True)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # Maps key -> size in bytes, ordered from least to most recently used
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._load_index()
+
+    @property
+    def size(self) -> int:
+        '''Total size of all entries in the cache in bytes'''
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def _path(self, key: str) -> Path:
+        # Fan out into sub-directories so no single directory gets huge
+        return self.directory/key[:2]/key
+
+    def _load_index(self) -> None:
+        entries = []
+        for p in self.directory.glob('*/*'):
+            if not p.is_file() or p.name.startswith('.'): continue
+            stat = p.stat()
+            entries.append((stat.st_mtime, p.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._size > self.max_size and self._index:
+            key, size = self._index.popitem(last = False)
+            self._size -= size
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+            logger.debug(f'Evicted \'{key}\' from the cache.')
+
+    def get(self, key: str) -> Optional[bytes]:
+        '''Get the contents stored under the key.
+
+        :param str key: Key of the entry
+        :returns: Contents of the entry, or None if it is not in the cache
+        '''
+        with self._lock:
+            if key not in self._index: return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            # Removed out from under us
+            with self._lock:
+                size = self._index.pop(key, None)
+                if size is not None: self._size -= size
+            return None
+        # Keep the mtime in step with the LRU order so it survives a restart.
+        # The entry may have been evicted since it was read, which is fine.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        '''Store the contents under the key, evicting old entries if necessary.
+
+        :param str key: Key of the entry
+        :param bytes content: Contents to store
+        '''
+        path = self._path(key)
+        path.parent.mkdir(exist_ok = True)
+        # Write to a temporary file first so readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir = path.parent, prefix = '.')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, path)
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old is not None: self._size -= old
+            self._index[key] = len(content)
+            self._size += len(content)
+            self._evict()
+
+    def clear(self) -> None:
+        '''Remove every entry from the cache.'''
+        with self._lock:
+            for key in self._index:
+                try:
+                    self._path(key).unlink()
+                except FileNotFoundError:
+                    pass
+            self._index.clear()
+            self._size = 0
@@ -0,0 +1,277 @@
+import io
+import os
+import gzip
+import json
+import time
+import base64
+import logging
+import threading
+import contextlib
+from collections import deque
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+# Headers that carry credentials are never written to a cassette
+_SECRET_HEADERS = {'authorization', 'x-session-id', 'x-auth-token',
+                   'cookie', 'set-cookie'}
+# Keys of the session response that hold the access token of the session
+_SECRET_KEYS = ('id', 'access_token', 'refresh_token')
+
+class Cassette:
+    '''Requests sent through a session and the responses to them, with how
+    long each one took. Cassettes are stored as gzipped JSON lines, one line
+    per request.
+
+    Only the method, URL, Range header and size of each request are kept,
+    and the access token of the session is left out. The response bodies are kept as they
+    are though, including the download and preview tokens of the session,
+    so treat cassettes like the data they were recorded from.
+
+    :param interactions: (optional) Recorded requests, as stored in the file
+    :type interactions: list[dict]
+    '''
+    def __init__(self, interactions: Optional[list[dict[str, Any]]] = None):
+        self.interactions = list(interactions or [])
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    @property
+    def duration(self) -> float:
+        '''Seconds from the start of the first request to the end of the last'''
+        if not self.interactions: return 0.0
+        return max(i['start'] + i['elapsed'] for i in self.interactions)
+
+    def add(self, interaction: dict[str, Any]) -> None:
+        '''Add a recorded request. Safe to call from several threads.'''
+        with self._lock:
+            self.interactions.append(interaction)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> 'Cassette':
+        '''Read a cassette from a file
+
+        :param path: Path of the cassette
+        :raises ValueError: If the file is not a cassette this version can read
+        '''
+        with gzip.open(path, 'rt', encoding = 'utf-8') as f:
+            header = json.loads(f.readline() or '{}')
+            if header.get('version') != CASSETTE_VERSION:
+                raise ValueError(f'{path} is not a version {CASSETTE_VERSION} cassette.')
+            return cls([json.loads(line) for line in f])
+
+    def save(self, path: str | os.PathLike) -> Path:
+        '''Write the cassette to a file, ordered by when the requests started
+
+        :param path: Path to write to
+        :returns: Path of the cassette
+        '''
+        path = Path(path)
+        with self._lock:
+            interactions = sorted(self.interactions, key = lambda i: i['start'])
+        with gzip.open(path, 'wt', encoding = 'utf-8') as f:
+            f.write(json.dumps({'version': CASSETTE_VERSION}) + '\n')
+            for interaction in interactions:
+                f.write(json.dumps(interaction, separators = (',', ':')) + '\n')
+        return path
+
+class RecordingAdapter(BaseAdapter):
+    '''Transport adapter that sends requests through another adapter and
+    records them to a :class:`Cassette`. The body of each response is read
+    before it is returned, so the time recorded includes the transfer.
+
+    :param adapter: (optional) Adapter to send the requests with. Defaults to a new ``HTTPAdapter``.
+    :param Cassette cassette: (optional) Cassette to record to. Defaults to a new one.
+    '''
+    def __init__(
+            self,
+            adapter: Optional[BaseAdapter] = None,
+            cassette: Optional[Cassette] = None):
+        super().__init__()
+        self.adapter = adapter or HTTPAdapter()
+        self.cassette = cassette if cassette is not None else Cassette()
+        self._start = time.perf_counter()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        resp = self.adapter.send(request, **kwargs)
+        content = resp.content
+        elapsed = time.perf_counter() - start
+        interaction = {
+            'method': request.method,
+            'url': request.url,
+            'range': request.headers.get('Range'),
+            'size': _body_size(request.body),
+            'start': round(start - self._start, 6),
+            'elapsed': round(elapsed, 6),
+            'status': resp.status_code,
+            'reason': resp.reason,
+            'headers': {k: v for k, v in resp.headers.items()
+                        if k.lower() not in _SECRET_HEADERS}}
+        try:
+            interaction['text'] = _redact(request.url, content.decode('utf-8'))
+        except UnicodeDecodeError:
+            interaction['body'] = base64.b64encode(content).decode('ascii')
+        self.cassette.add(interaction)
+        return resp
+
+    def close(self) -> None:
+        self.adapter.close()
+
+class ReplayAdapter(BaseAdapter):
+    '''Transport adapter that answers requests from a :class:`Cassette`
+    instead of sending them. Requests are matched by method, URL and Range
+    header, so resumed downloads get the partial response they got when
+    recording. When a request was recorded several times, the responses are
+    given back in the order they were recorded, and the last one is repeated
+    once they run out.
+
+    :param Cassette cassette: Cassette to replay
+    :param float speed: (optional) How much faster than recorded to answer. Each response waits as long as it took to record, divided by this. Set to None to answer right away. Defaults to 1.
+    '''
+    def __init__(self, cassette: Cassette, speed: Optional[float] = 1.0):
+        super().__init__()
+        if speed is not None and speed <= 0:
+            raise ValueError('Speed must be greater than 0.')
+        self.cassette = cassette
+        self.speed = speed
+        self.misses: list[tuple[str, str, Optional[str]]] = []
+        self._lock = threading.Lock()
+        self._queues: dict[tuple[str, str, Optional[str]], deque] = {}
+        self._last: dict[tuple[str, str, Optional[str]], dict[str, Any]] = {}
+        for interaction in sorted(cassette.interactions, key = lambda i: i['start']):
+            key = (interaction['method'], interaction['url'], interaction.get('range'))
+            self._queues.setdefault(key, deque()).append(interaction)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        key = (request.method, request.url, request.headers.get('Range'))
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            interaction = self._last.get(key)
+            if interaction is None: self.misses.append(key)
+        if interaction is None:
+            raise requests.ConnectionError(
+                f'No recorded response for {request.method} {request.url}',
+                request = request)
+        if self.speed is not None:
+            time.sleep(interaction['elapsed'] / self.speed)
+        return _build_response(request, interaction)
+
+    def close(self) -> None:
+        pass
+
+def _body_size(body: Any) -> Optional[int]:
+    if body is None: return 0
+    if isinstance(body, (bytes, str)): return len(body)
+    # Streamed bodies, e.g. the generators of upload_files
+    return None
+
+def _redact(url: str, text: str) -> str:
+    # Only the tokens in the config of the session are needed for a replay
+    if not urlsplit(url).path.endswith('/session'): return text
+    try:
+        body = json.loads(text)
+    except ValueError:
+        return text
+    if not isinstance(body, dict): return text
+    for key in _SECRET_KEYS:
+        if key in body: body[key] = 'redacted'
+    return json.dumps(body)
+
+def _restore(session: requests.Session, adapters: dict[str, BaseAdapter]) -> None:
+    session.adapters.clear()
+    session.adapters.update(adapters)
+
+def _build_response(
+        request: requests.PreparedRequest,
+        interaction: dict[str, Any]) -> requests.Response:
+    if 'text' in interaction:
+        content = interaction['text'].encode('utf-8')
+    else:
+        content = base64.b64decode(interaction['body'])
+    resp = requests.Response()
+    resp.status_code = interaction['status']
+    resp.reason = interaction['reason']
+    resp.headers = CaseInsensitiveDict(interaction['headers'])
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.url = request.url
+    resp.request = request
+    resp.elapsed = timedelta(seconds = interaction['elapsed'])
+    resp.raw = io.BytesIO(content)
+    resp._content = content
+    return resp
+
+@contextlib.contextmanager
+def record(
+        session: requests.Session,
+        path: str | os.PathLike) -> Iterator[Cassette]:
+    '''Context manager that records every request sent through the session
+    while it is open, and writes them to a cassette file when it closes.
+    The adapters already mounted on the session still send the requests,
+    and are put back afterwards.
+
+    >>> with photoprysm.user_session(user, server_api) as session:
+    ...     with photoprysm.record_requests(session, 'job.cassette'):
+    ...         photos = photoprysm.get_photos(session, server_api, count = 1000)
+
+    Logging in and out doesn't go through the session, so those requests
+    are not recorded.
+
+    :param session: `requests.Session`_ to record
+    :param path: Path to write the cassette to
+    :returns: The cassette being recorded to
+    '''
+    cassette = Cassette()
+    previous = dict(session.adapters)
+    for prefix, adapter in previous.items():
+        session.mount(prefix, RecordingAdapter(adapter, cassette))
+    try:
+        yield cassette
+    finally:
+        _restore(session, previous)
+        cassette.save(path)
+        logger.info(f'Recorded {len(cassette)} requests to {path}.')
+
+@contextlib.contextmanager
+def replay(
+        session: requests.Session,
+        path: str | os.PathLike, *,
+        speed: Optional[float] = 1.0) -> Iterator[ReplayAdapter]:
+    '''Context manager that answers every request sent through the session
+    from a cassette recorded with :func:`record`, without a server. The
+    session doesn't need to be logged in. Use it to profile the client side
+    of a recorded workload.
+
+    >>> session = requests.Session()
+    >>> with photoprysm.replay_requests(session, 'job.cassette', speed = 10):
+    ...     photos = photoprysm.get_photos(session, server_api, count = 1000)
+
+    :param session: `requests.Session`_ to answer the requests of
+    :param path: Path of the cassette
+    :param float speed: (optional) How much faster than recorded to answer. Set to None to answer right away. Defaults to 1.
+    :raises requests.ConnectionError: From the requests, if a request was never recorded
+    :returns: The adapter answering the requests. Requests that were not in the cassette are listed in its ``misses``.
+    '''
+    adapter = ReplayAdapter(Cassette.load(path), speed = speed)
+    previous = dict(session.adapters)
+    for prefix in {'http://', 'https://', *previous}:
+        session.mount(prefix, adapter)
+    try:
+        yield adapter
+    finally:
+        _restore(session, previous)
+        if adapter.misses:
+            logger.warning(f'{len(adapter.misses)} requests were not in {path}.')
@@ -1,12 +1,18 @@
+import os
 import re
 import json
+import time
+import hashlib
 import logging
+import threading
 import requests
-from typing import Callable, Optional, TypeVar
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
 from urllib.parse import urljoin
 from dataclasses import dataclass, InitVar, field, asdict
 from .models.albums import Album
 import contextlib
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -39,10 +45,11 @@ class Client:
         self.__server_api = server_api
         resp = requests.post(
             url = urljoin(server_api, 'oauth/token'),
-            auth = client.auth)
+            auth = self.auth)
         resp.raise_for_status()
         self._session = requests.Session()
-        self._session.auth = resp.json()['access_token']
+        self._session.auth = PhotoprismAccessToken(resp.json()['access_token'])
+        return self._session
 
     def request(self, **kwargs) -> requests.Response:
         '''Send a request to the server as a Client'''
@@ -58,7 +65,7 @@ class Client:
     def logout(self) -> None:
         '''Logout of the server as a Client'''
         resp = requests.post(
-            url = urljoin(server_api, 'oauth/revoke'),
+            url = urljoin(self.__server_api, 'oauth/revoke'),
             auth = self.auth)
         resp.raise_for_status()
         self._session.close()
@@ -111,6 +118,159 @@ class User:
         self._session.close()
         self._session = None
 
+@dataclass
+class BatchResult:
+    '''Result of a single item from a bulk operation.
+
+    :param item: Item the operation was run on
+    :param value: (optional) Value returned for the item, e.g. the updated model
+    :param error: (optional) Error raised while running the operation on the item
+    :param bool skipped: (optional) True if there was nothing to do for the item, so no request was sent
+    '''
+    item: Any
+    value: Any = None
+    error: Optional[Exception] = None
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        '''True if the operation did not raise an error for the item'''
+        return self.error is None
+
+class Job:
+    '''Handle for an import or index running on the server. Photoprism only
+    responds to the request that starts the job once the job is done, so the
+    request is sent from a background thread and the job is done when it
+    returns. Don't create these directly. Use :func:`start_import` or
+    :func:`start_index` instead.
+
+    >>> job = photoprysm.start_index(session, server_api, path = 'holidays')
+    >>> job.wait(timeout = 3600, on_progress = print)
+    {'message': 'indexing completed in 42 s', ...}
+
+    :param session: Session to make the request from
+    :param server_api: String with the base URL for the API
+    :param str endpoint: Endpoint that runs the job, ``'import'`` or ``'index'``
+    :param dict data: Options to start the job with
+    '''
+    def __init__(
+            self,
+            session: requests.Session,
+            server_api: str,
+            endpoint: str,
+            data: dict[str, Any]):
+        self.session = session
+        self.server_api = server_api
+        self.endpoint = endpoint
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(
+            target = self._run, args = (data,), daemon = True,
+            name = f'photoprysm-{endpoint}')
+        self._thread.start()
+
+    def __repr__(self) -> str:
+        state = 'done' if self.done() else 'running'
+        return f'<Job {self.endpoint} {state}>'
+
+    def _run(self, data: dict[str, Any]) -> None:
+        try:
+            resp = request(
+                session = self.session,
+                url = urljoin(self.server_api, self.endpoint),
+                method = 'POST',
+                data = json.dumps(data))
+            self._result = resp.json() if resp.content else {}
+        except Exception as err:
+            # Kept to be raised from wait() or result(), but logged right
+            # away in case nobody ever calls them
+            logger.error(f'The {self.endpoint} failed: {err}')
+            self._error = err
+
+    def done(self) -> bool:
+        '''True if the job has finished, whether it succeeded or not'''
+        return not self._thread.is_alive()
+
+    def progress(self) -> dict[str, int]:
+        '''Number of photos, files, etc. in the library right now. These go
+        up as the job adds files, so comparing them over time shows progress.
+
+        :raises requests.HTTPError: If the HTTP request fails
+        '''
+        resp = request(
+            session = self.session,
+            url = urljoin(self.server_api, 'config'),
+            method = 'GET')
+        return resp.json().get('count', {})
+
+    def wait(
+            self,
+            timeout: Optional[float] = None, *,
+            on_progress: Optional[Callable[[dict[str, int]], Any]] = None,
+            min_interval: float = 0.5,
+            max_interval: float = 10.0) -> dict[str, Any]:
+        '''Block until the job is done. Returns the moment the job finishes,
+        no matter how long the polling interval has grown.
+
+        If ``on_progress`` is given, it is called with :meth:`progress` every
+        so often. Polling starts at ``min_interval`` seconds and doubles each
+        time nothing has changed, up to ``max_interval``, so a long job that is
+        busy with one large file doesn't send a flood of requests.
+
+        :param float timeout: (optional) Maximum number of seconds to wait. Waits forever by default.
+        :param on_progress: (optional) Function called with the library counts while waiting
+        :param float min_interval: (optional) Shortest time between progress checks in seconds. Defaults to 0.5.
+        :param float max_interval: (optional) Longest time between progress checks in seconds. Defaults to 10.
+        :raises TimeoutError: If the job is not done before the timeout
+        :raises requests.HTTPError: If the server responds to the job with an error
+        :returns: Response from the server once the job is done
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = min_interval
+        last = None
+        while True:
+            wait_for = interval
+            if deadline is not None:
+                wait_for = min(wait_for, max(deadline - time.monotonic(), 0))
+            self._thread.join(wait_for)
+            if self.done(): break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f'The {self.endpoint} did not finish '
+                                   f'within {timeout} seconds.')
+            if on_progress is None: continue
+            try:
+                counts = self.progress()
+            except requests.RequestException as err:
+                logger.warning(f'Could not check the progress: {err}')
+                continue
+            # Poll quickly while things are changing and back off otherwise
+            if counts != last: interval = min_interval
+            else: interval = min(interval * 2, max_interval)
+            last = counts
+            on_progress(counts)
+        return self.result()
+
+    def result(self) -> dict[str, Any]:
+        '''Response from the server for the finished job
+
+        :raises RuntimeError: If the job is still running
+        :raises requests.HTTPError: If the server responded with an error
+        '''
+        if not self.done():
+            raise RuntimeError(f'The {self.endpoint} is still running.')
+        if self._error is not None: raise self._error
+        return self._result
+
+    def cancel(self) -> None:
+        '''Ask the server to stop the job
+
+        :raises requests.HTTPError: If the HTTP request fails
+        '''
+        request(
+            session = self.session,
+            url = urljoin(self.server_api, self.endpoint),
+            method = 'DELETE')
+
 class PhotoprismAccessToken(requests.auth.AuthBase):
     def __init__(self,
                  token: str,
@@ -173,32 +333,31 @@ def start_import(
         server_api: str,
         path: Optional[str] = None,
         move: Optional[bool] = None,
-        *albums: Album | str) -> None:
+        *albums: Album | str) -> Job:
     '''Start the import process. See `Importing Files`_ from the Photoprism documentation for more information.
 
     :param session: Session to make the request from
     :param server_api: String with the base URL for the API
     :param str path: (optional) Path relative to the import path that you are importing files from. Leave blank to import everything in /photoprism/import volume. See `Photoprism Volumes`_ for more information.
     :param bool move: (optional) Set to True to move files out of the /photoprism/import volume upon import. See more information `here <https://docs.photoprism.app/user-guide/library/import/#when-should-move-files-be-selected>`_.
+    :returns: Handle for the running import. Use :meth:`Job.wait` to wait for it to finish.
+
+    This returns right away and doesn't raise if the import fails. The error
+    is logged, and raised by :meth:`Job.wait` or :meth:`Job.result`.
     '''
     data = {
         'albums': _extract_uids(albums),
         'move': False if move is None else move,
         'path': path or ''
     }
-
-    resp = request(
-        session = session,
-        url = urljoin(server_api, 'import'),
-        method = 'POST',
-        data = json.dumps(data))
+    return Job(session, server_api, 'import', data)
 
 def start_index(
         session: requests.Session,
         server_api: str,
         path: Optional[str] = None,
         cleanup: Optional[bool] = None,
-        rescan: Optional[bool] = None) -> None:
+        rescan: Optional[bool] = None) -> Job:
     '''Start the index process. See `Indexing Your Library`_ from the Photoprism documentation for more information.
 
     :param session: Session to make the request from
@@ -206,17 +365,17 @@ def start_index(
     :param str path: (optional) Path relative to the originals path that you want to index. Leave blank to index everything in /photoprism/originals volume
     :param bool cleanup: (optional) Set to cleanup after the index process has completed. Defaults to True.
     :param bool rescan: (optional) Set to rescan for more files after the index process has completed. Defaults to True.
+    :returns: Handle for the running index. Use :meth:`Job.wait` to wait for it to finish.
+
+    This returns right away and doesn't raise if the index fails. The error
+    is logged, and raised by :meth:`Job.wait` or :meth:`Job.result`.
     '''
     data = {
         "cleanup": True if cleanup is None else cleanup,
         "path": path or '',
         "rescan": True if rescan is None else rescan
     }
-    resp = request(
-        session = session,
-        url = urljoin(server_api, 'index'),
-        method = 'POST',
-        data = json.dumps(data))
+    return Job(session, server_api, 'index', data)
 
 def get_tokens_from_session(
         session: requests.Session,
@@ -268,6 +427,136 @@ def request(
     resp.raise_for_status()
     return resp
 
+def _map_concurrently(
+        func: Callable,
+        items: list,
+        max_workers: Optional[int] = None) -> list:
+    '''Call func on every item from a pool of threads. Results are returned in
+    the same order as the items. Requests sessions are safe to share between
+    the threads as long as they are not reconfigured while in use.'''
+    items = list(items)
+    if len(items) <= 1 or max_workers == 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        return list(executor.map(func, items))
+
+def _run_batch(
+        func: Callable,
+        items: list,
+        max_workers: Optional[int] = None) -> list[BatchResult]:
+    '''Like :func:`_map_concurrently`, but collects request errors per item
+    instead of raising the first one. If func returns a BatchResult, it is
+    used as is, which lets func mark the item as skipped.'''
+    def _run(item):
+        try:
+            rv = func(item)
+        except requests.RequestException as err:
+            logger.error(f'Request failed for {item}: {err}')
+            return BatchResult(item, error = err)
+        if isinstance(rv, BatchResult): return rv
+        return BatchResult(item, value = rv)
+    return _map_concurrently(_run, items, max_workers)
+
+def _get_download_token(session: requests.Session, server_api: str) -> str:
+    download_token = get_tokens_from_session(
+        session, server_api).get('download_token')
+    if download_token is None:
+        raise ValueError('Download token could not be received.')
+    return download_token
+
+class _RangeIgnored(ValueError):
+    '''Raised when a download can't be resumed because the server answered
+    a range request with the whole body'''
+
+def _iter_range(
+        session: requests.Session,
+        url: str,
+        params: dict[str, Any],
+        offset: int = 0,
+        chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    '''Stream the response body in chunks, starting offset bytes in. If the
+    server ignores the range, e.g. because the response is built on the fly,
+    the body may not match the one the offset was taken from, so
+    _RangeIgnored is raised before anything is yielded. If the offset is
+    already the size of the body, there is nothing left and nothing is
+    yielded.'''
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+    try:
+        resp = request(
+            session = session,
+            url = url,
+            method = 'GET',
+            params = params,
+            headers = headers,
+            stream = True)
+    except requests.HTTPError as err:
+        if not offset or err.response is None or err.response.status_code != 416:
+            raise
+        err.response.close()
+        # The server says how big the body is when the range starts past it
+        size = err.response.headers.get('Content-Range', '').strip()
+        if size == f'bytes */{offset}': return
+        raise _RangeIgnored(f'Server can\'t resume {url} at {offset} bytes '
+                            f'({size or "no size given"}).') from err
+    try:
+        if offset and resp.status_code != 206:
+            raise _RangeIgnored(f'Server ignored the range for {url}, so the '
+                                f'download can\'t be resumed at {offset} bytes.')
+        yield from resp.iter_content(chunk_size = chunk_size)
+    finally:
+        resp.close()
+
+def _save_stream(
+        path: str | os.PathLike,
+        stream: Callable[[int], Iterator[bytes]],
+        resume: bool = True,
+        sha1: Optional[str] = None) -> Path:
+    '''Write the chunks from stream(offset) to a .part file next to path and
+    rename it once done. With resume, an existing .part file is continued
+    from its size, or started over if the server can't resume it. If sha1 is
+    given, the finished file must match it.'''
+    path = Path(path)
+    part = path.with_name(path.name + '.part')
+    offset = part.stat().st_size if resume and part.exists() else 0
+    if offset: logger.info(f'Resuming download of {path} at {offset} bytes.')
+    try:
+        hasher = _write_stream(part, stream(offset), offset, sha1)
+    except _RangeIgnored as e:
+        logger.info(f'{e} Starting over.')
+        hasher = _write_stream(part, stream(0), 0, sha1)
+    if hasher and hasher.hexdigest() != sha1:
+        # Start over next time rather than resuming a corrupt file
+        part.unlink()
+        raise ValueError(f'Hash of {path} does not match. Expected {sha1} '
+                         f'but got {hasher.hexdigest()}.')
+    os.replace(part, path)
+    return path
+
+def _write_stream(part: Path, chunks: Iterator[bytes], offset: int,
+                  sha1: Optional[str]):
+    # Pulls the first chunk before opening the file, so that a .part file
+    # the server can't resume is only truncated once it is started over
+    chunks = iter(chunks)
+    first = next(chunks, b'')
+    hasher = hashlib.sha1() if sha1 else None
+    if hasher and offset:
+        with open(part, 'rb') as f: hasher = hashlib.file_digest(f, 'sha1')
+    with open(part, 'ab' if offset else 'wb') as f:
+        # Rather than chaining the first chunk back on, which would keep it
+        # around until the download is done
+        chunk = first
+        del first
+        while chunk:
+            if hasher: hasher.update(chunk)
+            f.write(chunk)
+            chunk = next(chunks, b'')
+    return hasher
+
+def _chunked(items: list, size: int) -> list[list]:
+    '''Split items into lists of at most size items'''
+    if size < 1: raise ValueError('Chunk size must be at least 1.')
+    return [items[i:i+size] for i in range(0, len(items), size)]
+
 def _extract_uid[M](obj: M | str) -> str:
     if obj is None: return None
     elif hasattr(obj, 'uid'): return obj.uid
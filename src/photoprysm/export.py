@@ -0,0 +1,206 @@
+import os
+import array
+import logging
+import requests
+from pathlib import Path
+from typing import Optional
+
+from .api import photos
+from .models.photos import _primary_file
+from .models.timestamps import parse_epoch, ZERO_TIME
+
+logger = logging.getLogger(__name__)
+
+# Column name -> (JSON key, typecode). Typecodes follow the array module,
+# with 'u' standing in for strings since those are kept in plain lists, and
+# 't' for timestamps, which are kept as nanoseconds since the epoch.
+COLUMNS: dict[str, tuple[str, str]] = {
+    'uid': ('UID', 'u'),
+    'taken_at': ('TakenAt', 't'),
+    'title': ('Title', 'u'),
+    'type': ('Type', 'u'),
+    'width': ('Width', 'q'),
+    'height': ('Height', 'q'),
+    'size': ('Size', 'q'),
+    'mime': ('Mime', 'u'),
+    'hash': ('Hash', 'u'),
+    'favorite': ('Favorite', 'b'),
+    'private': ('Private', 'b'),
+    'lat': ('Lat', 'd'),
+    'lng': ('Lng', 'd'),
+    'year': ('Year', 'q'),
+    'month': ('Month', 'q'),
+}
+
+# These come from the primary file when the photo itself doesn't have them
+_FILE_COLUMNS = {'width', 'height', 'size', 'mime', 'hash'}
+
+def export_columns(
+        session: requests.Session,
+        server_api: str,
+        *,
+        columns: Optional[list[str]] = None,
+        page_size: int = 1000,
+        **kwargs) -> dict[str, list | array.array]:
+    '''Search for Photos and collect the results column by column, without
+    building a Photo for each result. Numeric columns are stored in
+    ``array.array`` buffers with missing values as 0, and string columns in
+    lists with missing values as empty strings.
+
+    >>> columns = photoprysm.export_photo_columns(session, server_api, query = 'year:2024')
+    >>> sum(columns['size'])
+    48372615
+
+    :param session: Pre-configured `requests.Session`_ object to send the request with
+    :param server_api: Base URL of the server API
+    :param columns: (optional) Names of the columns to export. Defaults to every column in ``COLUMNS``.
+    :type columns: list[str]
+    :param int page_size: (optional) Number of Photos to request per page. Defaults to 1000.
+    :param kwargs: (optional) Search parameters to pass to :func:`photoprysm.api.photos.iter_pages`
+    :raises ValueError: If an unknown column is requested
+    :returns: Column buffers keyed by column name
+    '''
+    names = list(COLUMNS) if columns is None else list(columns)
+    for name in names:
+        if name not in COLUMNS:
+            raise ValueError(f'Unknown column \'{name}\'.')
+    buffers = {}
+    for name in names:
+        typecode = COLUMNS[name][1]
+        if typecode == 'u': buffers[name] = []
+        elif typecode == 't': buffers[name] = _TimestampBuffer()
+        else: buffers[name] = array.array(typecode)
+    # Bind everything once so the inner loop only does dict lookups
+    plan = [(COLUMNS[name][0], COLUMNS[name][1], name in _FILE_COLUMNS,
+             buffers[name].append) for name in names]
+    for page in photos.iter_pages(session, server_api,
+                                  page_size = page_size, **kwargs):
+        for raw_photo in page:
+            primary = None
+            for key, typecode, from_file, append in plan:
+                value = raw_photo.get(key)
+                if value is None and from_file:
+                    if primary is None: primary = _primary_file(raw_photo)
+                    value = primary.get(key)
+                if value is None and typecode != 't':
+                    value = '' if typecode == 'u' else 0
+                append(value)
+    return buffers
+
+def to_numpy(columns: dict[str, list | array.array]):
+    '''Convert column buffers to a NumPy structured array.
+
+    :param columns: Column buffers from :func:`export_columns`
+    :raises ImportError: If NumPy is not installed
+    :rtype: numpy.ndarray
+    '''
+    try:
+        import numpy as np
+    except ImportError as err:
+        raise ImportError('NumPy is required to export to NumPy arrays. '
+                          'Install it with \'pip install numpy\'.') from err
+    dtype = []
+    for name, values in columns.items():
+        if isinstance(values, _TimestampBuffer):
+            dtype.append((name, 'datetime64[ns]'))
+        elif isinstance(values, array.array):
+            dtype.append((name, np.dtype(values.typecode)))
+        else:
+            width = max((len(v) for v in values), default = 1)
+            dtype.append((name, f'U{max(width, 1)}'))
+    length = len(next(iter(columns.values()), []))
+    rv = np.empty(length, dtype = dtype)
+    for name, values in columns.items():
+        if isinstance(values, _TimestampBuffer):
+            rv[name] = np.frombuffer(values, dtype = np.int64).view('datetime64[ns]')
+        elif isinstance(values, array.array):
+            # Shares the buffer instead of going through Python objects
+            rv[name] = np.frombuffer(values, dtype = values.typecode)
+        else:
+            rv[name] = values
+    return rv
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as err:
+        raise ImportError('pyarrow is required to export to Arrow. '
+                          'Install it with \'pip install pyarrow\'.') from err
+    return pyarrow
+
+def to_arrow(columns: dict[str, list | array.array]):
+    '''Convert column buffers to an Arrow table.
+
+    :param columns: Column buffers from :func:`export_columns`
+    :raises ImportError: If pyarrow is not installed
+    :rtype: pyarrow.Table
+    '''
+    pa = _import_pyarrow()
+    _types = {'q': pa.int64(), 'd': pa.float64(), 'b': pa.int8()}
+    arrays = {}
+    for name, values in columns.items():
+        if isinstance(values, _TimestampBuffer):
+            nat = [v == _NAT for v in values]
+            arrays[name] = pa.array(memoryview(values), type = pa.int64(),
+                                    mask = pa.array(nat)).cast(pa.timestamp('ns', tz = 'UTC'))
+        elif isinstance(values, array.array):
+            arrays[name] = pa.array(memoryview(values), type = _types[values.typecode])
+            if values.typecode == 'b': arrays[name] = arrays[name].cast(pa.bool_())
+        else:
+            arrays[name] = pa.array(values, type = pa.string())
+    return pa.table(arrays)
+
+def export(
+        session: requests.Session,
+        server_api: str,
+        path: str | os.PathLike,
+        **kwargs) -> Path:
+    '''Export the Photos matching the search to a file. The format is picked
+    from the file extension: ``.parquet``, ``.arrow`` (Arrow IPC) or ``.npy``
+    (NumPy structured array). Parquet and Arrow need pyarrow. Without it,
+    ask for a ``.npy`` file, or use :func:`to_numpy` on the columns from
+    :func:`export_columns`. A different format than the one asked for is
+    never written.
+
+    >>> photoprysm.export_photos(session, server_api, 'library.parquet', query = 'type:image')
+    PosixPath('library.parquet')
+
+    :param session: Pre-configured `requests.Session`_ object to send the request with
+    :param server_api: Base URL of the server API
+    :param path: Path of the file to write
+    :param kwargs: (optional) Keyword arguments to pass to :func:`export_columns`
+    :raises ValueError: If the file extension is not supported
+    :raises ImportError: If pyarrow is needed for the format but not installed
+    :returns: Path of the file that was written
+    '''
+    path = Path(path)
+    if path.suffix not in ('.parquet', '.arrow', '.npy'):
+        raise ValueError(f'Unsupported export format \'{path.suffix}\'.')
+    # Fail before fetching every photo rather than after
+    if path.suffix != '.npy': _import_pyarrow()
+    columns = export_columns(session, server_api, **kwargs)
+    if path.suffix == '.npy':
+        import numpy as np
+        np.save(path, to_numpy(columns))
+    elif path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(to_arrow(columns), path)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(to_arrow(columns), path, compression = 'uncompressed')
+    return path
+
+_NAT = -2**63
+
+class _TimestampBuffer(array.array):
+    # Parses timestamps into nanoseconds as they are appended
+    def __new__(cls):
+        return super().__new__(cls, 'q')
+
+    def append(self, value):
+        try:
+            if value and value != ZERO_TIME:
+                return super().append(parse_epoch(value, 'ns'))
+        except ValueError:
+            logger.debug(f'Could not parse timestamp \'{value}\'.')
+        super().append(_NAT)
@@ -1,4 +1,4 @@
-from .base import ModelBase
+from .base import ModelBase, compact, lazy
 from dataclasses import dataclass, InitVar, field
 from typing import Optional, Self, Any
 
@@ -20,7 +20,10 @@ class Album(ModelBase, required = ['uid']):
     favorite: Optional[bool] = None
     private: Optional[bool] = None
     description: Optional[str] = None
-        
+
+CompactAlbum = compact(Album)
+LazyAlbum = lazy(Album)
+
 @dataclass
 class AlbumProperties(ModelBase):
     '''This is for updating album properties.
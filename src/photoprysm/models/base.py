@@ -1,7 +1,35 @@
 import re
+import sys
 import json
-from dataclasses import dataclass, fields, asdict
-from typing import Any, Self, Optional
+import zlib
+from collections.abc import Sequence
+from dataclasses import dataclass, field, fields, asdict, InitVar
+from datetime import datetime
+from typing import Any, Callable, Iterator, Self, Optional
+
+from .timestamps import parse_timestamp, format_timestamp
+
+# Use a faster JSON library if one is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Every model by module and name, so nested models can be found again when
+# decoding the binary format
+_MODELS: dict[str, type] = {}
+# msgpack extension type code for models
+_EXT_MODEL = 1
+# Numbers with this many digits may not fit in 64 bits
+_LONG_NUMBER = {str: re.compile(r'\d{19}'), bytes: re.compile(rb'\d{19}')}
 
 # Semi-private
 def snake(_camel: str):
@@ -9,11 +37,13 @@ def snake(_camel: str):
     tmp = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', _camel)
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', tmp).lower()
 
+# Words that are written in all caps in the JSON keys
+_ACRONYMS = {'uid', 'json', 'http', 'id', 'utc'}
+
 def camel(_snake: str):
     '''Modified from https://stackoverflow.com/a/1176023'''
-    rv = ''.join(word.title() for word in _snake.split('_'))
-    rv = re.sub(r'(uid|json|http|id)', lambda x: x.group(1).upper(), rv)
-    return rv
+    return ''.join(word.upper() if word in _ACRONYMS else word.title()
+                   for word in _snake.split('_'))
 
 def _asjson(cls: dataclass) -> str:
     d0 = asdict(cls)
@@ -24,6 +54,88 @@ def _asjson(cls: dataclass) -> str:
         d1[key] = v
     return json.dumps(d1)
 
+def dumps(obj: Any) -> str:
+    '''Serialize to a JSON string with the fastest available library:
+    orjson, then msgspec, then the standard library. Models nested in the
+    object are serialized as well.'''
+    # Both of the faster libraries refuse integers outside of 64 bits, so
+    # fall back to the standard library for those
+    if orjson is not None:
+        try:
+            # Models are dataclasses, which orjson would write out by their
+            # attribute names instead of their JSON keys
+            return orjson.dumps(
+                obj,
+                default = _encode,
+                option = orjson.OPT_PASSTHROUGH_DATETIME
+                       | orjson.OPT_PASSTHROUGH_DATACLASS).decode()
+        except TypeError: pass
+    elif msgspec is not None:
+        try:
+            # msgspec has no such option, so models are turned into dicts first
+            return msgspec.json.encode(_plain(obj), enc_hook = _encode).decode()
+        except (TypeError, OverflowError): pass
+    return json.dumps(obj, default = _encode, separators = (',', ':'))
+
+def loads(s: str | bytes) -> Any:
+    '''Deserialize a JSON string with the fastest available library:
+    msgspec, then orjson, then the standard library.'''
+    if msgspec is not None: return msgspec.json.decode(s)
+    # orjson reads integers outside of 64 bits as floats, so leave anything
+    # with a number that long to the standard library
+    if orjson is not None and not _LONG_NUMBER[type(s)].search(s):
+        return orjson.loads(s)
+    return json.loads(s)
+
+def dumpb(obj: Any) -> bytes:
+    '''Serialize to msgpack. Models are stored as the values of their fields
+    in order instead of as JSON objects, so they are much smaller, and they
+    come back out of :func:`loadb` as the same model.
+
+    >>> data = dumpb(photos)
+    >>> loadb(data) == photos
+    True
+
+    :raises ImportError: If msgpack is not installed
+    '''
+    _require_msgpack()
+    return msgpack.packb(obj, default = _pack, datetime = True)
+
+def loadb(data: bytes) -> Any:
+    '''Deserialize msgpack from :func:`dumpb`.
+
+    :raises ImportError: If msgpack is not installed
+    :raises ValueError: If a model was encoded with different fields than it has now
+    '''
+    _require_msgpack()
+    return msgpack.unpackb(data, ext_hook = _unpack, timestamp = 3)
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError('msgpack is required for the binary format. '
+                          'Install it with \'pip install msgpack\'.')
+
+def _pack(obj: Any) -> Any:
+    if isinstance(obj, ModelBase):
+        cls = type(obj)
+        state = [_model_name(cls), cls.__state_version__, *obj._astuple()]
+        payload = msgpack.packb(state, default = _pack, datetime = True)
+        return msgpack.ExtType(_EXT_MODEL, payload)
+    if isinstance(obj, LazyList): return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not msgpack serializable')
+
+def _unpack(code: int, data: bytes) -> Any:
+    if code != _EXT_MODEL: return msgpack.ExtType(code, data)
+    name, version, *values = msgpack.unpackb(
+        data, ext_hook = _unpack, timestamp = 3)
+    cls = _MODELS.get(name)
+    if cls is None:
+        raise ValueError(f'Unknown model \'{name}\'.')
+    return _restore(cls, version, values)
+
+def _model_name(cls: type) -> str:
+    return f'{cls.__module__}.{cls.__qualname__}'
+
 def _askwargs(**kwargs):
     d = {}
     for k, v in kwargs.items():
@@ -34,32 +146,283 @@ def _askwargs(**kwargs):
 @dataclass
 class ModelBase:
     '''Base model for the all models.'''
-    def __init_subclass__(cls: Self, /, required: Optional[list[str]] = None, **kwargs):
+    # Lets subclasses made with compact() go without a __dict__
+    __slots__ = ()
+
+    def __init_subclass__(
+            cls: Self, /,
+            required: Optional[list[str]] = None,
+            interned: Optional[list[str]] = None,
+            timestamps: Optional[list[str]] = None,
+            nested: Optional[dict[str, type]] = None,
+            **kwargs):
         super().__init_subclass__(**kwargs)
+        # dataclass(slots = True) recreates the class without passing these
+        # again, so keep whatever was already set on the class
+        if required is None:
+            required = vars(cls).get('__required_attrs__')
+        if interned is None:
+            interned = vars(cls).get('__interned_attrs__')
+        if timestamps is None:
+            timestamps = vars(cls).get('__timestamp_attrs__')
+        if nested is None:
+            nested = vars(cls).get('__nested_models__')
         if required:
             cls.__required_attrs__ = set(required)
         else: cls.__required_attrs__ = set()
+        # Low-cardinality strings (e.g. MIME types) get interned on decode so
+        # every instance shares the same string object
+        cls.__interned_attrs__ = set(interned or [])
+        # Timestamps get decoded into datetimes
+        cls.__timestamp_attrs__ = set(timestamps or [])
+        # Lists of nested models get decoded into instances of them
+        cls.__nested_models__ = dict(nested or {})
+        # The dataclass decorator hasn't run yet, so fields() isn't available.
+        # Work out the fields from the annotations instead, in the same order
+        # the decorator will put them in.
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name, annotation in vars(klass).get('__annotations__', {}).items():
+                if isinstance(annotation, InitVar) or annotation is InitVar: continue
+                if name not in names: names.append(name)
+        # Map each attribute to its key in the JSON once, so decoding doesn't
+        # have to convert the names on every call
+        cls.__json_keys__ = {name: camel(name) for name in names}
+        converters = {}
+        for name in names:
+            if name in cls.__nested_models__:
+                converters[name] = _Nested(cls.__nested_models__[name])
+            elif name in cls.__interned_attrs__: converters[name] = _intern
+            elif name in cls.__timestamp_attrs__: converters[name] = _timestamp
+        cls.__json_setters__ = tuple(
+            (cls.__json_keys__[name], name) for name in names
+            if name not in converters)
+        cls.__json_converters__ = tuple(
+            (cls.__json_keys__[name], name, converters[name]) for name in names
+            if name in converters)
+        cls.__json_required__ = tuple(
+            (cls.__json_keys__[name], name) for name in names
+            if name in cls.__required_attrs__)
+        # Pickle and msgpack store the values in this order. The version
+        # changes whenever the fields do, so data encoded by another version
+        # of the model is caught instead of ending up in the wrong fields.
+        cls.__field_order__ = tuple(names)
+        cls.__state_version__ = zlib.crc32(','.join(names).encode())
+        _MODELS[_model_name(cls)] = cls
+
+    def __reduce__(self):
+        # Pickle as a tuple of values rather than the instance __dict__, which
+        # would repeat every field name for every instance
+        cls = type(self)
+        return _restore, (cls, cls.__state_version__, self._astuple())
+
+    def _astuple(self) -> tuple:
+        return tuple(getattr(self, name, None) for name in type(self).__field_order__)
 
     @property
-    def json(self):
+    def json(self) -> str:
+        return dumps(self._asdict())
+
+    def _asdict(self) -> dict[str, Any]:
+        # JSON object of the model, with nested models left as they are
         d = {}
-        for attr in fields(self):
-            value = getattr(self, attr.name, None)
+        for name, key in type(self).__json_keys__.items():
+            value = getattr(self, name, None)
             if value is None: continue
-            d[camel(attr.name)] = value
-        return json.dumps(d)
+            d[key] = value
+        return d
         
     @classmethod
     def fromjson(cls: Self, djson: dict[str,Any]):
         '''Alternative constructor. Builds the instance from the JSON response.'''
+        get = djson.get
         # Required attribute names are passed in as args
         required_attrs = {}
-        for arg in cls.__required_attrs__:
-            if djson.get(camel(arg)) is None:
-                raise TypeError(f'JSON response missing required arg \'{arg}\'.')
-            else: required_attrs[arg] = djson.get(camel(arg))
+        for key, name in cls.__json_required__:
+            value = get(key)
+            if value is None:
+                raise TypeError(f'JSON response missing required arg \'{name}\'.')
+            required_attrs[name] = value
         inst = cls(**required_attrs)
         # Now we set the rest of the attributes
-        for attr in fields(cls):
-            setattr(inst, attr.name, djson.get(camel(attr.name)))
+        for key, name in cls.__json_setters__:
+            setattr(inst, name, get(key))
+        for key, name, convert in cls.__json_converters__:
+            setattr(inst, name, convert(get(key)))
         return inst
+
+def _restore(cls: type, version: int, values: tuple):
+    if version != cls.__state_version__:
+        raise ValueError(f'{cls.__name__} was encoded with different fields '
+                         'than it has now.')
+    # Skip __init__, since the values were already decoded once
+    inst = cls.__new__(cls)
+    for name, value in zip(cls.__field_order__, values):
+        object.__setattr__(inst, name, value)
+    return inst
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+class _Nested:
+    # Decodes a list of nested models. A dict is treated as a list of its
+    # values, which is how Photo files come in from the server.
+    def __init__(self, model: type):
+        self.model = model
+
+    def __call__(self, value: Any) -> Any:
+        if value is None: return None
+        if isinstance(value, dict): value = value.values()
+        return [self.model.fromjson(v) if isinstance(v, dict) else v
+                for v in value]
+
+def _timestamp(value: Any) -> Any:
+    if not isinstance(value, str) or not value: return value
+    try:
+        return parse_timestamp(value)
+    except ValueError:
+        # Leave it as it came in rather than failing the whole model
+        return value
+
+def _plain(obj: Any) -> Any:
+    # Models nested in lists and dicts as dicts, for encoders that can't be
+    # stopped from serializing dataclasses themselves
+    if isinstance(obj, ModelBase): obj = obj._asdict()
+    if isinstance(obj, dict): return {k: _plain(v) for k,v in obj.items()}
+    if isinstance(obj, (list, tuple, LazyList)): return [_plain(v) for v in obj]
+    return obj
+
+def _encode(obj: Any) -> Any:
+    # Fallback for json.dumps() for values nested in models
+    if isinstance(obj, ModelBase): return obj._asdict()
+    if isinstance(obj, LazyList): return list(obj)
+    if isinstance(obj, datetime): return format_timestamp(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+def compact(cls: type, nested: Optional[dict[str, type]] = None) -> type:
+    '''Create a variant of a model that keeps its attributes in ``__slots__``
+    instead of a per-instance ``__dict__``. The variant has the same fields,
+    methods and JSON handling as the model, but it is not a subclass of it and
+    no other attributes can be set on its instances.
+
+    >>> CompactPhoto = compact(Photo, nested = {'files': CompactPhotoFile})
+    >>> photo = CompactPhoto.fromjson(raw_photo)
+
+    :param cls: Model to create the variant of
+    :param nested: (optional) Models to decode the items of list attributes with, keyed by attribute name
+    :returns: New model class named ``Compact`` followed by the name of the model
+    '''
+    name = f'Compact{cls.__name__}'
+    # Leave out everything the dataclass decorator generates, so it can
+    # generate them again for the new class
+    skip = {'__dict__', '__weakref__', '__init__', '__repr__', '__eq__',
+            '__hash__', '__match_args__', '__dataclass_fields__',
+            '__dataclass_params__'}
+    ns = {k: v for k, v in vars(cls).items() if k not in skip}
+    ns['__qualname__'] = name
+    ns['__annotations__'] = dict(vars(cls).get('__annotations__', {}))
+    ns['__nested_models__'] = {**getattr(cls, '__nested_models__', {}),
+                               **(nested or {})}
+    for attr in fields(cls):
+        ns[attr.name] = field(
+            default = attr.default,
+            default_factory = attr.default_factory,
+            init = attr.init,
+            repr = attr.repr,
+            compare = attr.compare)
+    bases = tuple(base for base in cls.__bases__ if base is not object)
+    rv = type(name, bases, ns)
+    return dataclass(slots = True)(rv)
+
+class _LazyField:
+    # Non-data descriptor, so once the value is cached in the instance
+    # __dict__ it is found there without going through here again
+    def __init__(self, name: str, key: str,
+                 convert: Optional[Callable] = None,
+                 model: Optional[type] = None):
+        self.name = name
+        self.key = key
+        self.convert = convert
+        self.model = model
+
+    def __get__(self, inst, owner = None):
+        if inst is None: return None
+        value = inst.__dict__.get('_djson', {}).get(self.key)
+        if self.convert is not None:
+            value = self.convert(value)
+        elif self.model is not None and value is not None:
+            value = LazyList(value, self.model)
+        inst.__dict__[self.name] = value
+        return value
+
+class LazyList(Sequence):
+    '''List of models that are only decoded from the JSON when they are
+    accessed. A dict is treated as a list of its values, which is how Photo
+    files come in from the server.
+
+    :param raw: JSON of the models
+    :type raw: list[dict] or dict[str, dict]
+    :param model: Model to decode each item with
+    '''
+    def __init__(self, raw: list | dict, model: type):
+        self._raw = list(raw.values()) if isinstance(raw, dict) else list(raw)
+        self._items = [None] * len(self._raw)
+        self._model = model
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        item = self._items[i]
+        if item is None:
+            item = self._items[i] = self._model.fromjson(self._raw[i])
+        return item
+
+    def __iter__(self) -> Iterator:
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, LazyList)): return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+def lazy(cls: type, nested: Optional[dict[str, type]] = None) -> type:
+    '''Create a variant of a model that keeps the JSON response it was built
+    from and only decodes each attribute the first time it is accessed. The
+    variant is a subclass of the model, so it can be used anywhere the model
+    can.
+
+    >>> LazyPhoto = lazy(Photo, nested = {'files': LazyPhotoFile})
+    >>> photo = LazyPhoto.fromjson(raw_photo)
+    >>> photo.uid # Only the UID is decoded
+
+    :param cls: Model to create the variant of
+    :param nested: (optional) Models to lazily decode the items of list attributes with, keyed by attribute name
+    :returns: New model class named ``Lazy`` followed by the name of the model
+    '''
+    nested = nested or {}
+    name = f'Lazy{cls.__name__}'
+    ns = {'__qualname__': name, '__module__': cls.__module__, '__doc__': cls.__doc__}
+    for key, attr in cls.__json_setters__:
+        ns[attr] = _LazyField(attr, key, model = nested.get(attr))
+    for key, attr, convert in cls.__json_converters__:
+        ns[attr] = _LazyField(attr, key, convert = convert)
+    ns['fromjson'] = classmethod(_lazy_fromjson)
+    return type(name, (cls,), ns,
+                required = list(cls.__required_attrs__),
+                interned = list(cls.__interned_attrs__),
+                timestamps = list(cls.__timestamp_attrs__))
+
+def _lazy_fromjson(cls: Self, djson: dict[str,Any]):
+    '''Alternative constructor. Keeps the JSON response and decodes each
+    attribute from it the first time it is accessed.'''
+    for key, name in cls.__json_required__:
+        if djson.get(key) is None:
+            raise TypeError(f'JSON response missing required arg \'{name}\'.')
+    inst = cls.__new__(cls)
+    inst.__dict__['_djson'] = djson
+    return inst
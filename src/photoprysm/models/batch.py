@@ -0,0 +1,371 @@
+import array
+import numbers
+from typing import Any, Callable, Iterable, Iterator, Optional, Self
+
+from .photos import Photo, _primary_file
+from .timestamps import parse_timestamps
+
+def _numpy():
+    # NumPy is optional, the columns fall back to plain Python without it
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _index_array(np, indices, length: int):
+    # Indices as a NumPy array, with negative indices counted from the end
+    idx = np.asarray(indices if hasattr(indices, '__len__') else list(indices),
+                     dtype = np.intp).reshape(-1)
+    if idx.size and (idx.min() < -length or idx.max() >= length):
+        raise IndexError('Index out of range')
+    return np.where(idx < 0, idx + length, idx)
+
+class StringColumn:
+    '''Column of strings packed into a single UTF-8 buffer. The start of each
+    string is kept in an array of offsets, so the column only holds three
+    buffers no matter how many strings it has. Missing values are kept as
+    None.
+
+    :param values: (optional) Strings to start the column with
+    :type values: Iterable[str|None]
+    '''
+    __slots__ = ('_data', '_offsets', '_valid')
+
+    def __init__(self, values: Iterable[Optional[str]] = ()):
+        self._data = bytearray()
+        self._offsets = array.array('q', [0])
+        self._valid = bytearray()
+        for value in values: self.append(value)
+
+    def __len__(self) -> int:
+        return len(self._valid)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if i < 0: i += len(self)
+        if not self._valid[i]: return None
+        return self._data[self._offsets[i]:self._offsets[i+1]].decode()
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, StringColumn): return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'StringColumn({list(self)!r})'
+
+    def append(self, value: Optional[str]) -> None:
+        '''Add a string to the end of the column'''
+        if value is not None: self._data += value.encode()
+        self._offsets.append(len(self._data))
+        self._valid.append(value is not None)
+
+    def take(self, indices: Iterable[int]) -> Self:
+        '''Create a new column with the strings at the given indices. With
+        NumPy, the bytes of the strings are gathered from the buffer all at
+        once instead of one string at a time.'''
+        np = _numpy()
+        if np is None: return StringColumn(self[i] for i in indices)
+        idx = _index_array(np, indices, len(self))
+        offsets = np.frombuffer(self._offsets, dtype = np.int64)
+        starts = offsets[idx]
+        lengths = offsets[idx + 1] - starts
+        new_offsets = np.zeros(len(idx) + 1, dtype = np.int64)
+        np.cumsum(lengths, out = new_offsets[1:])
+        # Position in the old buffer of every byte of the new one
+        positions = (np.repeat(starts - new_offsets[:-1], lengths)
+                     + np.arange(new_offsets[-1], dtype = np.int64))
+        data = np.frombuffer(self._data, dtype = np.uint8)[positions]
+        column = StringColumn()
+        column._data = bytearray(data.tobytes())
+        column._offsets = array.array('q', new_offsets.tobytes())
+        column._valid = bytearray(
+            np.frombuffer(self._valid, dtype = np.uint8)[idx].tobytes())
+        return column
+
+    def slice(self, start: int, stop: int) -> Self:
+        '''Create a new column with the strings from start up to stop, by
+        slicing the buffers'''
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        column = StringColumn()
+        first, last = self._offsets[start], self._offsets[stop]
+        column._data = self._data[first:last]
+        column._offsets = array.array(
+            'q', (offset - first for offset in self._offsets[start:stop+1]))
+        column._valid = self._valid[start:stop]
+        return column
+
+    def sort_keys(self):
+        '''The strings as a NumPy array of fixed-width bytes, which sorts in
+        the same order as the strings
+
+        :raises ImportError: If NumPy is not installed
+        :rtype: numpy.ndarray
+        '''
+        import numpy as np
+        offsets = np.frombuffer(self._offsets, dtype = np.int64)
+        lengths = np.diff(offsets)
+        width = int(lengths.max()) if len(self) else 0
+        if width == 0: return np.zeros(len(self), dtype = 'S1')
+        # Pad every string with zeros to the same width
+        matrix = np.zeros((len(self), width), dtype = np.uint8)
+        rows = np.repeat(np.arange(len(self)), lengths)
+        cols = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+        matrix[rows, cols] = np.frombuffer(self._data, dtype = np.uint8)
+        return matrix.view(f'S{width}').reshape(-1)
+
+class IntColumn:
+    '''Column of integers backed by an `array.array`_. Missing values are
+    stored as 0 and marked in a separate validity mask, so they come back out
+    as None.
+
+    :param values: (optional) Integers to start the column with
+    :type values: Iterable[int|None]
+    '''
+    __slots__ = ('_values', '_valid')
+
+    def __init__(self, values: Iterable[Optional[int]] = ()):
+        self._values = array.array('q')
+        self._valid = bytearray()
+        for value in values: self.append(value)
+
+    def __len__(self) -> int:
+        return len(self._valid)
+
+    def __getitem__(self, i: int) -> Optional[int]:
+        return self._values[i] if self._valid[i] else None
+
+    def __iter__(self) -> Iterator[Optional[int]]:
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, IntColumn): return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'IntColumn({list(self)!r})'
+
+    @property
+    def values(self) -> array.array:
+        '''Raw values of the column, with missing values as 0'''
+        return self._values
+
+    def append(self, value: Optional[int]) -> None:
+        '''Add an integer to the end of the column'''
+        self._values.append(0 if value is None else int(value))
+        self._valid.append(value is not None)
+
+    def take(self, indices: Iterable[int]) -> Self:
+        '''Create a new column with the integers at the given indices. With
+        NumPy, the values are gathered all at once.'''
+        np = _numpy()
+        if np is None: return IntColumn(self[i] for i in indices)
+        idx = _index_array(np, indices, len(self))
+        column = IntColumn()
+        column._values = array.array('q', self.numpy()[idx].tobytes())
+        column._valid = bytearray(
+            np.frombuffer(self._valid, dtype = np.uint8)[idx].tobytes())
+        return column
+
+    def slice(self, start: int, stop: int) -> Self:
+        '''Create a new column with the integers from start up to stop, by
+        slicing the buffers'''
+        column = IntColumn()
+        column._values = self._values[start:stop]
+        column._valid = self._valid[start:stop]
+        return column
+
+    def numpy(self):
+        '''View of the values as a NumPy array, without copying them. Missing
+        values are 0.
+
+        :raises ImportError: If NumPy is not installed
+        :rtype: numpy.ndarray
+        '''
+        import numpy as np
+        return np.frombuffer(self._values, dtype = np.int64)
+
+class PhotoBatch:
+    '''Struct-of-arrays container for a large number of Photos. Each field is
+    stored in its own column instead of as a Photo per result, and a Photo is
+    only built when the batch is indexed with an integer. Indexing with a
+    slice, a list of indices or a list of booleans returns a new PhotoBatch
+    instead.
+
+    >>> batch = photoprysm.get_photos(session, server_api, count = 100000, batch = True)
+    >>> wide = batch[batch.column('width').numpy() > 4000]
+    >>> wide.sort('taken_at')[0]
+    Photo(uid='psr0ncb7xnefh3s4', ...)
+
+    Besides the fields of :class:`Photo` (other than ``files``, which is
+    kept as it comes in), the batch has ``taken_at`` and ``hash`` columns.
+
+    :param columns: Columns of the batch keyed by field name
+    :param files: (optional) Files of each Photo as they come in from the response
+    '''
+    COLUMNS: dict[str, type] = {
+        'uid': StringColumn,
+        'path': StringColumn,
+        'name': StringColumn,
+        'title': StringColumn,
+        'description': StringColumn,
+        'width': IntColumn,
+        'height': IntColumn,
+        'taken_at': StringColumn,
+        'hash': StringColumn,
+    }
+
+    def __init__(
+            self,
+            columns: dict[str, StringColumn | IntColumn],
+            files: Optional[list] = None):
+        self._columns = columns
+        length = len(columns['uid'])
+        self._files = [None] * length if files is None else files
+
+    @classmethod
+    def fromjson(cls, djsons: Iterable[dict[str, Any]]) -> Self:
+        '''Alternative constructor. Builds the batch from the JSON response.'''
+        columns = {name: column() for name, column in cls.COLUMNS.items()}
+        files = []
+        keys = Photo.__json_keys__
+        plan = []
+        for name in columns:
+            key = keys.get(name) or {'taken_at': 'TakenAt', 'hash': 'Hash'}[name]
+            plan.append((key, name == 'hash', columns[name].append))
+        for djson in djsons:
+            get = djson.get
+            for key, from_file, append in plan:
+                value = get(key)
+                if value is None and from_file:
+                    value = _primary_file(djson).get(key)
+                append(value)
+            raw_files = get('Files')
+            if isinstance(raw_files, dict): raw_files = list(raw_files.values())
+            files.append(raw_files)
+        return cls(columns, files)
+
+    @classmethod
+    def concat(cls, batches: Iterable[Self]) -> Self:
+        '''Join several batches into one'''
+        columns = {name: column() for name, column in cls.COLUMNS.items()}
+        files = []
+        for batch in batches:
+            for name, column in columns.items():
+                for value in batch._columns[name]: column.append(value)
+            files.extend(batch._files)
+        return cls(columns, files)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __iter__(self) -> Iterator[Photo]:
+        return (self[i] for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f'<PhotoBatch of {len(self)} photos>'
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1: return self.take(range(start, stop, step))
+            columns = {name: column.slice(start, stop)
+                       for name, column in self._columns.items()}
+            return PhotoBatch(columns, self._files[start:stop])
+        if isinstance(key, numbers.Integral):
+            i = int(key)
+            if i < 0: i += len(self)
+            if not 0 <= i < len(self):
+                raise IndexError('PhotoBatch index out of range')
+            attrs = {name: column[i] for name, column in self._columns.items()
+                     if name in Photo.__json_keys__}
+            return Photo(files = self._files[i], **attrs)
+        # Boolean masks and lists of indices, from Python or NumPy
+        is_mask = getattr(getattr(key, 'dtype', None), 'kind', None) == 'b'
+        if is_mask and hasattr(key, 'nonzero'):
+            if len(key) != len(self):
+                raise IndexError('Boolean mask does not match the length '
+                                 'of the PhotoBatch')
+            return self.take(key.nonzero()[0])
+        if hasattr(getattr(key, 'dtype', None), 'kind'): return self.take(key)
+        key = list(key)
+        if not is_mask:
+            is_mask = bool(key) and all(isinstance(k, bool) for k in key)
+        if is_mask:
+            if len(key) != len(self):
+                raise IndexError('Boolean mask does not match the length '
+                                 'of the PhotoBatch')
+            return self.take(i for i, keep in enumerate(key) if keep)
+        return self.take(key)
+
+    def column(self, name: str) -> StringColumn | IntColumn:
+        '''Get a column of the batch by field name
+
+        :param str name: Name of the field
+        :raises KeyError: If the batch has no column with that name
+        '''
+        return self._columns[name]
+
+    def timestamps(self, name: str = 'taken_at', unit: str = 'ns'):
+        '''Parse a column of timestamps into a NumPy ``datetime64`` array all
+        at once. See :func:`parse_timestamps`.
+
+        :param str name: (optional) Name of the column. Defaults to ``'taken_at'``.
+        :param str unit: (optional) Unit of the result. Defaults to ``'ns'``.
+        :raises ImportError: If NumPy is not installed
+        :rtype: numpy.ndarray
+        '''
+        return parse_timestamps(self._columns[name], unit)
+
+    def take(self, indices: Iterable[int]) -> Self:
+        '''Create a new batch with the Photos at the given indices'''
+        np = _numpy()
+        if np is None:
+            indices = positions = [int(i) for i in indices]
+        else:
+            indices = _index_array(np, indices, len(self))
+            positions = indices.tolist()
+        columns = {name: column.take(indices)
+                   for name, column in self._columns.items()}
+        return PhotoBatch(columns, [self._files[i] for i in positions])
+
+    def filter(self, predicate: Callable[[Any], bool], name: str) -> Self:
+        '''Create a new batch with the Photos where the value of a column
+        matches the predicate. For large batches, prefer indexing with a
+        NumPy mask from :meth:`IntColumn.numpy`.
+
+        :param predicate: Function that takes the value and returns True to keep the Photo
+        :param str name: Name of the column to check
+        '''
+        column = self._columns[name]
+        return self.take(i for i, value in enumerate(column) if predicate(value))
+
+    def sort(self, name: str, reverse: bool = False) -> Self:
+        '''Create a new batch sorted by a column. Missing values go last.
+
+        :param str name: Name of the column to sort by
+        :param bool reverse: (optional) Sort in descending order
+        '''
+        column = self._columns[name]
+        np = _numpy()
+        if np is not None:
+            keys = (column.numpy() if isinstance(column, IntColumn)
+                    else column.sort_keys())
+            order = np.argsort(keys, kind = 'stable')
+            if reverse: order = order[::-1]
+            valid = np.frombuffer(column._valid, dtype = np.uint8)
+            order = np.concatenate([order[valid[order] == 1],
+                                    order[valid[order] == 0]])
+            return self.take(order)
+        values = list(column)
+        present = [i for i, v in enumerate(values) if v is not None]
+        missing = [i for i, v in enumerate(values) if v is None]
+        present.sort(key = values.__getitem__, reverse = reverse)
+        return self.take(present + missing)
+
+    def tolist(self) -> list[Photo]:
+        '''Build a Photo for every entry of the batch'''
+        return list(self)
@@ -4,7 +4,8 @@ from dataclasses import dataclass
 from typing import Optional, Self
 from urllib.parse import urljoin
 
-from .base import ModelBase
+from .base import ModelBase, compact, lazy
+from .timestamps import parse_timestamp
 
 @dataclass
 class ShareLink(ModelBase,
@@ -12,7 +13,13 @@ class ShareLink(ModelBase,
                     'token',
                     'share_uid',
                     'slug',
-                    'uid']):
+                    'uid'],
+                interned = [
+                    'share_uid',
+                    'created_by'],
+                timestamps = [
+                    'created_at',
+                    'modified_at']):
     '''Data class for holding information about a share link
 
     :param token: Token of the share link, used to construct the URL
@@ -20,11 +27,11 @@ class ShareLink(ModelBase,
     :param slug: URL slug of the album the share link is for
     :param uid: UID of the share link itself
     :param str comment: (optional) Comment that was added when the share link was created
-    :param str created_at: (optional) Time when the link was created
+    :param datetime created_at: (optional) Time when the link was created
     :param str created_by: (optional) UID of the User who created this ShareLink
     :param int expires: (optional) Seconds until the link expires
     :param int max_views: (optional) Maximum number of views until the link expires
-    :param str modified_at: (optional) Time when the link was last modified
+    :param datetime modified_at: (optional) Time when the link was last modified
     :param int perm: (optional) I literally do not know what this is.
     :param bool verify_password: (optional) Set to True to require user to verify password when they visit the share link
     :param int views: (optional) Number of views the share link has so far
@@ -34,8 +41,8 @@ class ShareLink(ModelBase,
     slug: str
     uid: str
     comment: Optional[str] = None
-    created_at: Optional[str] = None 
-    modified_at: Optional[str] = None
+    created_at: Optional[datetime.datetime] = None
+    modified_at: Optional[datetime.datetime] = None
     created_by: Optional[str] = None
     expires: Optional[int] = None
     max_views: Optional[int] = None
@@ -45,11 +52,25 @@ class ShareLink(ModelBase,
 
     def __post_init__(self):
         if isinstance(self.created_at, str):
-            # TODO: Convert to datetime.datetime
-            pass
+            self.created_at = parse_timestamp(self.created_at)
         if isinstance(self.modified_at, str):
-            # TODO: Convert to datetime.datetime
-            pass
+            self.modified_at = parse_timestamp(self.modified_at)
+
+    @property
+    def expires_at(self) -> Optional[datetime.datetime]:
+        '''Time when the link expires, or None if it never does. Like
+        Photoprism, the expiry counts from when the link was last modified.'''
+        since = self.modified_at or self.created_at
+        if not self.expires or not isinstance(since, datetime.datetime):
+            return None
+        return since + datetime.timedelta(seconds = self.expires)
+
+    @property
+    def expired(self) -> bool:
+        '''True if the link has expired or used up its views'''
+        if self.max_views and (self.views or 0) >= self.max_views: return True
+        expires_at = self.expires_at
+        return expires_at is not None and expires_at <= datetime.datetime.now(datetime.timezone.utc)
 
     def get_url(self, host: Optional[str] = None, https: Optional[bool] = None) -> str:
         '''
@@ -63,6 +84,9 @@ class ShareLink(ModelBase,
         base = f'{scheme}://{u_host}/s/'
         return urljoin(urljoin(base, self.token), self.slug)
 
+CompactShareLink = compact(ShareLink)
+LazyShareLink = lazy(ShareLink)
+
 @dataclass
 class ShareLinkProperties(ModelBase):
     '''Share link properties. This is for setting and updating properties of share links.
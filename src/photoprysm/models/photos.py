@@ -1,12 +1,25 @@
 # import io
-import json
-from .base import ModelBase
+from .base import ModelBase, compact, lazy
 from dataclasses import dataclass, field, fields, InitVar
 from typing import Any, Optional, Self
 from datetime import datetime
 
 @dataclass
-class PhotoFile(ModelBase, required = ['uid', 'photo_uid']):
+class PhotoFile(ModelBase,
+                required = ['uid', 'photo_uid'],
+                interned = [
+                    'root',
+                    'codec',
+                    'file_type',
+                    'media_type',
+                    'mime',
+                    'orientation_src',
+                    'color_profile',
+                    'main_color',
+                    'software'],
+                timestamps = [
+                    'created_at',
+                    'updated_at']):
     '''Dataclass for holding data about a file.
 
     :param uid:
@@ -38,7 +51,7 @@ class PhotoFile(ModelBase, required = ['uid', 'photo_uid']):
     :param str software: (optional)
     :param int mod_time: (optional)
     :param datetime created_at: (optional)
-    :param datetime created_in: (optional)
+    :param int created_in: (optional)
     :param datetime updated_at: (optional)
     :param list markers: (optional)
     '''
@@ -71,7 +84,7 @@ class PhotoFile(ModelBase, required = ['uid', 'photo_uid']):
     software: Optional[str] = None
     mod_time: Optional[int] = None
     created_at: Optional[datetime] = None
-    created_in: Optional[datetime] = None
+    created_in: Optional[int] = None
     updated_at: Optional[datetime] = None
     markers: Optional[list] = None
     # stream: Optional[InitVar[bytes]] = None
@@ -88,7 +101,7 @@ class PhotoFile(ModelBase, required = ['uid', 'photo_uid']):
     #     self._stream = io.BytesIO(value)
 
 @dataclass
-class Photo(ModelBase, required = ['uid']):
+class Photo(ModelBase, required = ['uid'], interned = ['path']):
     '''Dataclass for holding data about a photo.
 
     :param uid:
@@ -110,23 +123,39 @@ class Photo(ModelBase, required = ['uid']):
     height: Optional[int] = None
     files: Optional[list[PhotoFile]] = None
 
-    @property
-    def json(self):
-        d = json.loads(super().json)
+    # These call ModelBase directly rather than through super(), so that they
+    # also work for CompactPhoto, which isn't a subclass of Photo
+
+    def _asdict(self) -> dict[str, Any]:
+        d = ModelBase._asdict(self)
         # Construct it as a dict, since that's how it comes in
-        d['files'] = {}
-        for i,f in enumerate(self.files): d['files'][i] = f
-        return json.dumps(d)
+        if 'Files' in d:
+            d['Files'] = {str(i): f for i,f in enumerate(d['Files'])}
+        return d
 
     @classmethod
     def fromjson(cls: Self, djson: dict[str,Any]):
         # Just make sure it's a list
-        if 'files' in djson:
-            if isinstance(djson['files'], dict):
-                djson['files'] = list(djson['files'].values())
-        inst = super().fromjson(djson)
+        for key in ('files', 'Files'):
+            if isinstance(djson.get(key), dict):
+                djson[key] = list(djson[key].values())
+        inst = ModelBase.fromjson.__func__(cls, djson)
         return inst
 
+def _primary_file(djson: dict[str, Any]) -> dict[str, Any]:
+    # Primary file of a Photo as it comes in from the response
+    files = djson.get('Files') or djson.get('files') or []
+    if isinstance(files, dict): files = list(files.values())
+    for f in files:
+        if isinstance(f, dict) and f.get('Primary'): return f
+    return files[0] if files and isinstance(files[0], dict) else {}
+
+CompactPhotoFile = compact(PhotoFile)
+# Files are decoded too, so their MIME types, codecs etc. are interned
+CompactPhoto = compact(Photo, nested = {'files': CompactPhotoFile})
+LazyPhotoFile = lazy(PhotoFile)
+LazyPhoto = lazy(Photo, nested = {'files': LazyPhotoFile})
+
 @dataclass
 class PhotoDetails(ModelBase):
     '''Details from the PhotoProperties
@@ -145,22 +174,22 @@ class PhotoDetails(ModelBase):
     :param str subject: (optional)
     :param str subject_src: (optional)
     '''
-    artist: Optional[str] = None,
-    artist_src: Optional[str] = None,
-    copyright: Optional[str] = None,
-    copyright_src: Optional[str] = None,
-    keywords: Optional[str] = None,
-    keywords_src: Optional[str] = None,
-    license: Optional[str] = None,
-    license_src: Optional[str] = None,
-    notes: Optional[str] = None,
-    notes_src: Optional[str] = None,
-    photo_id: Optional[int] = None,
-    subject: Optional[str] = None,
+    artist: Optional[str] = None
+    artist_src: Optional[str] = None
+    copyright: Optional[str] = None
+    copyright_src: Optional[str] = None
+    keywords: Optional[str] = None
+    keywords_src: Optional[str] = None
+    license: Optional[str] = None
+    license_src: Optional[str] = None
+    notes: Optional[str] = None
+    notes_src: Optional[str] = None
+    photo_id: Optional[int] = None
+    subject: Optional[str] = None
     subject_src: Optional[str] = None
 
 @dataclass
-class PhotoProperties(ModelBase):
+class PhotoProperties(ModelBase, timestamps = ['taken_at', 'taken_at_local']):
     '''Properties of the Photo object
 
     :param int altitude: (optional)
@@ -189,8 +218,8 @@ class PhotoProperties(ModelBase):
     :param bool private: (optional)
     :param bool scan: (optional)
     :param int stack: (optional)
-    :param str taken_at: (optional)
-    :param str taken_at_local: (optional)
+    :param datetime taken_at: (optional)
+    :param datetime taken_at_local: (optional)
     :param str taken_src: (optional)
     :param str time_zone: (optional)
     :param str title: (optional)
@@ -199,39 +228,39 @@ class PhotoProperties(ModelBase):
     :param str type_src: (optional)
     :param int year: (optional)
     '''
-    altitude: Optional[int] = None,
-    camera_id: Optional[int] = None,
-    camera_src: Optional[str] = None,
-    cell_accuracy: Optional[int] = None,
-    cell_id: Optional[str] = None,
-    country: Optional[str] = None,
-    day: Optional[int] = None,
-    description: Optional[str] = None,
-    description_src: Optional[str] = None,
-    details: Optional[PhotoDetails] = None,
-    exposure: Optional[str] = None,
-    f_number: Optional[int] = None,
-    favorite: Optional[bool] = None,
-    focal_length: Optional[int] = None,
-    iso: Optional[int] = None,
-    lat: Optional[int] = None,
-    lens_id: Optional[int] = None,
-    lng: Optional[int] = None,
-    month: Optional[int] = None,
-    original_name: Optional[str] = None,
-    panorama: Optional[bool] = None,
-    place_id: Optional[str] = None,
-    place_src: Optional[str] = None,
-    private: Optional[bool] = None,
-    scan: Optional[bool] = None,
-    stack: Optional[int] = None,
-    taken_at: Optional[str] = None,
-    taken_at_local: Optional[str] = None,
-    taken_src: Optional[str] = None,
-    time_zone: Optional[str] = None,
-    title: Optional[str] = None,
-    title_src: Optional[str] = None,
-    type: Optional[str] = None,
-    type_src: Optional[str] = None,
+    altitude: Optional[int] = None
+    camera_id: Optional[int] = None
+    camera_src: Optional[str] = None
+    cell_accuracy: Optional[int] = None
+    cell_id: Optional[str] = None
+    country: Optional[str] = None
+    day: Optional[int] = None
+    description: Optional[str] = None
+    description_src: Optional[str] = None
+    details: Optional[PhotoDetails] = None
+    exposure: Optional[str] = None
+    f_number: Optional[int] = None
+    favorite: Optional[bool] = None
+    focal_length: Optional[int] = None
+    iso: Optional[int] = None
+    lat: Optional[int] = None
+    lens_id: Optional[int] = None
+    lng: Optional[int] = None
+    month: Optional[int] = None
+    original_name: Optional[str] = None
+    panorama: Optional[bool] = None
+    place_id: Optional[str] = None
+    place_src: Optional[str] = None
+    private: Optional[bool] = None
+    scan: Optional[bool] = None
+    stack: Optional[int] = None
+    taken_at: Optional[datetime] = None
+    taken_at_local: Optional[datetime] = None
+    taken_src: Optional[str] = None
+    time_zone: Optional[str] = None
+    title: Optional[str] = None
+    title_src: Optional[str] = None
+    type: Optional[str] = None
+    type_src: Optional[str] = None
     year: Optional[int] = None
 
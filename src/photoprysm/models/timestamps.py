@@ -0,0 +1,99 @@
+import functools
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+# Photoprism uses this for times that were never set
+ZERO_TIME = '0001-01-01T00:00:00Z'
+UNITS = {'s': 1, 'ms': 10**3, 'us': 10**6, 'ns': 10**9}
+_EPOCH = datetime(1970, 1, 1, tzinfo = timezone.utc)
+
+@functools.lru_cache(maxsize = 4096)
+def parse_timestamp(value: str) -> datetime:
+    '''Parse a timestamp from the server, e.g. ``'2025-02-01T18:00:11.271759938Z'``.
+
+    Photoprism always sends RFC 3339 timestamps, which `datetime.fromisoformat`_
+    parses directly, so this is a thin wrapper around it. Results are cached,
+    since the same timestamps tend to show up many times in a response.
+    Anything past microseconds is dropped. Timestamps without an offset are
+    taken to be in UTC.
+
+    :param str value: Timestamp to parse
+    :raises ValueError: If the timestamp is not in RFC 3339 format
+    :rtype: datetime.datetime
+    '''
+    rv = datetime.fromisoformat(value)
+    if rv.tzinfo is None: rv = rv.replace(tzinfo = timezone.utc)
+    return rv
+
+def parse_epoch(value: str, unit: str = 's') -> int:
+    '''Parse a timestamp from the server into an integer since the Unix epoch.
+    Unlike :func:`parse_timestamp`, this keeps nanoseconds if asked for them.
+
+    >>> parse_epoch('2025-02-01T18:00:11.271759938Z', 'ns')
+    1738432811271759938
+
+    :param str value: Timestamp to parse
+    :param str unit: (optional) Unit of the result. One of ``'s'``, ``'ms'``, ``'us'`` or ``'ns'``. Defaults to ``'s'``.
+    :raises ValueError: If the timestamp is not in RFC 3339 format or the unit is invalid
+    '''
+    if unit not in UNITS:
+        raise ValueError(f'Invalid unit \'{unit}\'.')
+    us = (parse_timestamp(value) - _EPOCH) // timedelta(microseconds = 1)
+    if unit != 'ns': return us * UNITS[unit] // UNITS['us']
+    # datetime stops at microseconds, so pick the rest out of the string
+    extra = 0
+    dot = value.find('.', 19)
+    if dot != -1:
+        end = dot + 1
+        while end < len(value) and value[end].isdigit(): end += 1
+        extra = int(value[dot+7:end][:3].ljust(3, '0') or 0)
+    return us * 1000 + extra
+
+def format_timestamp(value: datetime) -> str:
+    '''Format a datetime the way the server sends them. Naive datetimes are
+    taken to be in UTC.
+
+    :param value: Datetime to format
+    :type value: datetime.datetime
+    '''
+    if value.tzinfo is None: value = value.replace(tzinfo = timezone.utc)
+    rv = value.isoformat()
+    if rv.endswith('+00:00'): rv = rv[:-6] + 'Z'
+    return rv
+
+def parse_timestamps(values: Iterable[Optional[str]], unit: str = 'ns'):
+    '''Parse a whole column of timestamps at once into a NumPy ``datetime64``
+    array. Missing values and Photoprism's zero time become ``NaT``.
+
+    >>> parse_timestamps(batch.column('taken_at'))
+    array(['2023-04-23T06:18:25.000000000', 'NaT'], dtype='datetime64[ns]')
+
+    :param values: Timestamps to parse, e.g. a column from :class:`PhotoBatch`
+    :type values: Iterable[str|None]
+    :param str unit: (optional) Unit of the result. One of ``'s'``, ``'ms'``, ``'us'`` or ``'ns'``. Defaults to ``'ns'``.
+    :raises ImportError: If NumPy is not installed
+    :rtype: numpy.ndarray
+    '''
+    import numpy as np
+    if unit not in UNITS:
+        raise ValueError(f'Invalid unit \'{unit}\'.')
+    values = ['' if v is None or v == ZERO_TIME else v for v in values]
+    dtype = f'datetime64[{unit}]'
+    if all(v.endswith('Z') or not v for v in values):
+        # Fast path: NumPy parses UTC timestamps itself if the Z is dropped
+        try:
+            return np.array([v[:-1] if v else 'NaT' for v in values], dtype = dtype)
+        except ValueError:
+            pass
+    # Some have offsets, which NumPy no longer parses, or aren't timestamps
+    # at all, so go one at a time
+    nat = np.iinfo(np.int64).min
+    epochs = np.array([_epoch_or(v, unit, nat) for v in values], dtype = np.int64)
+    return epochs.view(dtype)
+
+def _epoch_or(value: str, unit: str, default: int) -> int:
+    if not value: return default
+    try:
+        return parse_epoch(value, unit)
+    except ValueError:
+        return default
@@ -0,0 +1,189 @@
+import os
+import time
+import shutil
+import hashlib
+import logging
+import requests
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from . import core
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StagingResult:
+    '''Result of :func:`stage_import`.
+
+    :param files: One result per file, in the same order as the files. The value of each result is the path the file was staged to. Duplicates are skipped.
+    :type files: list[BatchResult]
+    :param jobs: Imports that were started, one per partition
+    :type jobs: list[Job]
+    :param errors: Imports that failed while the next partition was waiting for them, with their errors. Later imports are still started.
+    :type errors: dict[Job, Exception]
+    '''
+    files: list[core.BatchResult] = field(default_factory = list)
+    jobs: list[core.Job] = field(default_factory = list)
+    errors: dict[core.Job, Exception] = field(default_factory = dict)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        '''Block until every import is done. See :meth:`Job.wait`.
+
+        :param float timeout: (optional) Maximum number of seconds to wait for each import
+        '''
+        for job in self.jobs: job.wait(timeout)
+
+def stage_import(
+        files: Iterable[str | os.PathLike],
+        import_path: str | os.PathLike, *,
+        session: Optional[requests.Session] = None,
+        server_api: Optional[str] = None,
+        partition_size: int = 500,
+        prefix: Optional[str] = None,
+        link: bool = False,
+        move: Optional[bool] = None,
+        skip_hashes: Optional[set[str]] = None,
+        max_workers: int = 8) -> StagingResult:
+    '''Copy files into the import volume several at a time and import them.
+
+    The files are hashed first, and files with the same contents are only
+    staged once. Photoprism identifies files by their SHA1 hash, so passing the
+    hashes of the files already in the library as ``skip_hashes`` skips those
+    too. The files that are left are split into partitions of
+    ``partition_size`` files, each in its own directory under
+    ``import_path/prefix``.
+
+    If a session is given, the import of each partition is started as soon
+    as its files are in place. The next partition is copied while that
+    import runs. Photoprism only runs one import at a time, so the next
+    import waits for the one before it.
+
+    >>> result = photoprysm.stage_import(paths, '/mnt/photoprism/import',
+    ...                                  session = session, server_api = server_api)
+    >>> result.wait()
+
+    Copies go through ``os.copy_file_range`` or ``os.sendfile`` where the
+    platform has them, so the data doesn't pass through Python. With
+    ``link = True``, files are hard linked instead and only copied if they
+    are on a different filesystem from the import volume.
+
+    :param files: Paths of the files to stage
+    :param import_path: Path to the import volume as mounted on this machine
+    :param session: (optional) Session to start the imports from. Files are only staged if not given.
+    :param str server_api: (optional) String with the base URL for the API
+    :param int partition_size: (optional) Maximum number of files per import. Defaults to 500.
+    :param str prefix: (optional) Directory under the import volume to stage the files in. Defaults to one named after the current time.
+    :param bool link: (optional) Set to True to hard link files instead of copying them
+    :param bool move: (optional) Set to True to have Photoprism move the staged files out of the import volume. See :func:`start_import`.
+    :param skip_hashes: (optional) SHA1 hashes of files to leave out, e.g. those already in the library
+    :type skip_hashes: set[str]
+    :param int max_workers: (optional) Maximum number of files to hash or copy at once. Defaults to 8.
+    :raises ValueError: If a session is given without the server API or the partition size is invalid
+    '''
+    if session is not None and server_api is None:
+        raise ValueError('Must pass in the server API along with the session.')
+    files = [Path(f) for f in files]
+    import_path = Path(import_path)
+    prefix = prefix or time.strftime('photoprysm-%Y%m%d-%H%M%S')
+    skip_hashes = set(skip_hashes or ())
+    result = StagingResult([core.BatchResult(f) for f in files])
+    # Hash everything first, so duplicates are known before anything is copied
+    hashes = core._map_concurrently(_try_sha1, files, max_workers)
+    unique = []
+    for i, (hashbrown, err) in enumerate(hashes):
+        if err is not None:
+            result.files[i].error = err
+        elif hashbrown in skip_hashes:
+            result.files[i].skipped = True
+        else:
+            skip_hashes.add(hashbrown)
+            unique.append((i, hashbrown))
+    logger.info(f'Staging {len(unique)} of {len(files)} files in '
+                f'{import_path/prefix}.')
+    job = None
+    for n, partition in enumerate(core._chunked(unique, partition_size)):
+        subpath = f'{prefix}/{n:04d}'
+        directory = import_path/subpath
+        directory.mkdir(parents = True, exist_ok = True)
+        # Work out the names up front, so files with the same name from
+        # different directories don't overwrite each other
+        names = set()
+        copies = []
+        for i, hashbrown in partition:
+            src = files[i]
+            name = src.name
+            if name.lower() in names:
+                name = f'{src.stem}-{hashbrown[:8]}{src.suffix}'
+            names.add(name.lower())
+            copies.append((i, src, directory/name))
+        def _stage(copy):
+            i, src, dst = copy
+            try:
+                if link: _link_file(src, dst)
+                else: _copy_file(src, dst)
+            except OSError as err:
+                logger.error(f'Could not stage {src}: {err}')
+                result.files[i].error = err
+            else:
+                result.files[i].value = dst
+        core._map_concurrently(_stage, copies, max_workers)
+        if session is None: continue
+        # Only one import runs on the server at a time
+        if job is not None:
+            try:
+                job.wait()
+            except Exception as err:
+                # Anything the import raised, so the files staged so far
+                # aren't lost with it
+                logger.error(f'Import of {job} failed: {err}')
+                result.errors[job] = err
+        job = core.start_import(session, server_api, subpath, move)
+        result.jobs.append(job)
+    return result
+
+def _try_sha1(path: Path) -> tuple[Optional[str], Optional[OSError]]:
+    try:
+        return _sha1(path), None
+    except OSError as err:
+        logger.error(f'Could not hash {path}: {err}')
+        return None, err
+
+def _sha1(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha1').hexdigest()
+
+def _link_file(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Hard links can't cross filesystems
+        _copy_file(src, dst)
+
+def _copy_file(src: Path, dst: Path) -> None:
+    # Copy in the kernel where possible, then fall back to a plain copy for
+    # whatever is left
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        offset = 0
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while offset < size:
+                    sent = os.copy_file_range(
+                        fsrc.fileno(), fdst.fileno(), size - offset)
+                    if sent == 0: break
+                    offset += sent
+            except OSError: pass
+        if offset < size and hasattr(os, 'sendfile'):
+            try:
+                while offset < size:
+                    sent = os.sendfile(
+                        fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0: break
+                    offset += sent
+            except OSError: pass
+        if offset < size:
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            shutil.copyfileobj(fsrc, fdst)
+    shutil.copystat(src, dst)
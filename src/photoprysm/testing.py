@@ -0,0 +1,868 @@
+import io
+import re
+import json
+import time
+import random
+import hashlib
+import itertools
+import logging
+import secrets
+import zipfile
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable, Iterator, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .models.timestamps import format_timestamp, parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+API_PATH = '/api/v1/'
+_TITLES = ('Beach', 'Mountain', 'City', 'Forest', 'Sunset', 'Family',
+           'Garden', 'Snow', 'Harbor', 'Desert')
+_START = datetime(2000, 1, 1, tzinfo = timezone.utc)
+_UID_ALPHABET = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+def fake_jpeg(seed: int, size: int = 4096) -> bytes:
+    '''Random bytes that start and end like a JPEG. The same seed always
+    gives the same bytes. Nothing decodes them, but they pass for a photo
+    anywhere only the contents or the hash matter.
+
+    :param int seed: Seed for the random bytes
+    :param int size: (optional) Size in bytes. Defaults to 4096.
+    '''
+    body = random.Random(seed).randbytes(max(size - 4, 0))
+    return b'\xff\xd8' + body + b'\xff\xd9'
+
+class MockLibrary:
+    '''Synthetic Photoprism library for :class:`MockServer`. Photos, their
+    files and albums are generated up front from the seed, so the same
+    arguments always give the same library. The contents of the files are
+    generated again whenever they are downloaded instead of being kept in
+    memory, so large libraries stay cheap.
+
+    Every collection is keyed by UID (or hash for files) and holds the JSON
+    the server sends, so tests can look at or change them directly.
+
+    :param int photos: (optional) Number of photos to generate. Defaults to 100.
+    :param int albums: (optional) Number of albums to generate. Each one gets a random sample of the photos. Defaults to 10.
+    :param int file_size: (optional) Size of each generated file in bytes. Defaults to 4096.
+    :param int seed: (optional) Seed for everything generated. Defaults to 0.
+    '''
+    def __init__(
+            self,
+            photos: int = 100,
+            albums: int = 10, *,
+            file_size: int = 4096,
+            seed: int = 0):
+        self.lock = threading.RLock()
+        self.photos: dict[str, dict[str, Any]] = {}
+        self.files: dict[str, dict[str, Any]] = {}
+        self.albums: dict[str, dict[str, Any]] = {}
+        self.members: dict[str, dict[str, None]] = {}
+        self.links: dict[str, dict[str, dict[str, Any]]] = {}
+        # Hash -> seed of a generated file, or the bytes of an uploaded one
+        self._contents: dict[str, int | bytes] = {}
+        self._rng = random.Random(seed)
+        self.file_size = file_size
+        for i in range(photos):
+            content_seed = self._rng.getrandbits(64)
+            content = fake_jpeg(content_seed, file_size)
+            taken_at = _START + timedelta(
+                seconds = self._rng.randrange(25 * 365 * 86400))
+            title = f'{self._rng.choice(_TITLES)} {i}'
+            photo = self.add_photo(title, content, taken_at = taken_at,
+                                   favorite = self._rng.random() < 0.05)
+            self._contents[photo['Hash']] = content_seed
+        uids = list(self.photos)
+        for i in range(albums):
+            album = self.add_album(f'{self._rng.choice(_TITLES)} Album {i}')
+            size = min(len(uids), self._rng.randrange(0, 50) + 1) if uids else 0
+            for uid in self._rng.sample(uids, size):
+                self.members[album['UID']][uid] = None
+
+    def uid(self, prefix: str) -> str:
+        '''New UID in the format Photoprism uses, e.g. ``'p'`` for photos'''
+        return prefix + ''.join(self._rng.choice(_UID_ALPHABET) for _ in range(15))
+
+    def add_photo(
+            self,
+            title: str,
+            content: bytes,
+            name: Optional[str] = None, *,
+            taken_at: Optional[datetime] = None,
+            favorite: bool = False) -> dict[str, Any]:
+        '''Add a photo with a single file to the library
+
+        :param str title: Title of the photo
+        :param bytes content: Contents of its file
+        :param str name: (optional) Name of the file. Defaults to one based on the title.
+        :returns: JSON of the new photo
+        '''
+        with self.lock:
+            now = _now()
+            taken_at = taken_at or datetime.now(timezone.utc)
+            uid = self.uid('p')
+            hashbrown = hashlib.sha1(content).hexdigest()
+            path = f'{taken_at.year}/{taken_at.month:02d}'
+            name = name or f'IMG_{len(self.photos):05d}.jpg'
+            raw_file = {
+                'UID': self.uid('f'), 'PhotoUID': uid,
+                'Name': f'{path}/{name}', 'Root': '/', 'Hash': hashbrown,
+                'Size': len(content), 'Primary': True, 'FileType': 'jpg',
+                'MediaType': 'image', 'Mime': 'image/jpeg',
+                'Width': 1920, 'Height': 1080,
+                'CreatedAt': now, 'UpdatedAt': now}
+            photo = {
+                'ID': len(self.photos) + 1, 'UID': uid, 'Type': 'image',
+                'TakenAt': format_timestamp(taken_at),
+                'TakenAtLocal': format_timestamp(taken_at),
+                'Title': title, 'Description': '', 'Path': path,
+                'Name': name.rsplit('.', 1)[0], 'OriginalName': name,
+                'Favorite': favorite, 'Private': False,
+                'Lat': 0.0, 'Lng': 0.0, 'Year': taken_at.year,
+                'Month': taken_at.month, 'Day': taken_at.day, 'Quality': 3,
+                'Hash': hashbrown, 'Width': 1920, 'Height': 1080,
+                'Size': len(content), 'Mime': 'image/jpeg',
+                'CreatedAt': now, 'UpdatedAt': now, 'EditedAt': None,
+                'DeletedAt': None, 'Files': [raw_file]}
+            self.photos[uid] = photo
+            self.files[hashbrown] = raw_file
+            self._contents[hashbrown] = content
+            return photo
+
+    def add_album(self, title: str, favorite: bool = False) -> dict[str, Any]:
+        '''Add an empty album to the library
+
+        :param str title: Title of the album
+        :param bool favorite: (optional) Mark the album as a favorite
+        :returns: JSON of the new album
+        '''
+        with self.lock:
+            now = _now()
+            album = {
+                'ID': len(self.albums) + 1, 'UID': self.uid('a'),
+                'Slug': re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-'),
+                'Type': 'album', 'Title': title, 'Description': '',
+                'Favorite': favorite, 'Private': False, 'CreatedAt': now,
+                'UpdatedAt': now, 'DeletedAt': None}
+            self.albums[album['UID']] = album
+            self.members[album['UID']] = {}
+            self.links[album['UID']] = {}
+            return album
+
+    def content(self, hashbrown: str) -> Optional[bytes]:
+        '''Contents of the file with the hash, or None if there is none'''
+        content = self._contents.get(hashbrown)
+        if isinstance(content, int):
+            return fake_jpeg(content, self.files[hashbrown]['Size'])
+        return content
+
+    def counts(self) -> dict[str, int]:
+        '''Library counts as they are sent in the config'''
+        with self.lock:
+            photos = list(self.photos.values())
+            return {
+                'all': len(photos),
+                'photos': sum(not p['DeletedAt'] for p in photos),
+                'archived': sum(bool(p['DeletedAt']) for p in photos),
+                'favorites': sum(p['Favorite'] for p in photos),
+                'private': sum(p['Private'] for p in photos),
+                'files': len(self.files),
+                'albums': len(self.albums)}
+
+class MockServer:
+    '''Photoprism stand-in served over HTTP from a background thread, for
+    running the library against a server without installing Photoprism.
+    It covers sessions, photos, files, albums, share links, uploads and
+    downloads. Each request is handled on its own thread and connections
+    are kept alive, so it also works for load and throughput tests.
+
+    >>> with MockServer(photos = 10000, latency = 0.02) as server:
+    ...     with photoprysm.user_session(server.user, server.server_api) as session:
+    ...         photos = photoprysm.get_photos(session, server.server_api, count = 100)
+
+    Latency, bandwidth and error rate can be changed while the server is
+    running. The server can also be started on its own with ``python -m
+    photoprysm.testing``.
+
+    :param library: (optional) Library to serve. Defaults to a new :class:`MockLibrary` built from ``photos``, ``albums``, ``file_size`` and ``seed``.
+    :type library: MockLibrary
+    :param str username: (optional) Username to accept. Defaults to ``'admin'``.
+    :param str password: (optional) Password to accept. Defaults to ``'photoprism'``.
+    :param float latency: (optional) Seconds to wait before answering each request. Defaults to 0.
+    :param float bandwidth: (optional) Maximum bytes per second for each request and response body. Unlimited by default.
+    :param float error_rate: (optional) Fraction of requests to answer with a 500 error instead. Defaults to 0.
+    :param str host: (optional) Host to listen on. Defaults to ``'127.0.0.1'``.
+    :param int port: (optional) Port to listen on. Defaults to a free port.
+    '''
+    def __init__(
+            self,
+            library: Optional[MockLibrary] = None, *,
+            photos: int = 100,
+            albums: int = 10,
+            file_size: int = 4096,
+            seed: int = 0,
+            username: str = 'admin',
+            password: str = 'photoprism',
+            latency: float = 0.0,
+            bandwidth: Optional[float] = None,
+            error_rate: float = 0.0,
+            host: str = '127.0.0.1',
+            port: int = 0):
+        self.library = library or MockLibrary(
+            photos, albums, file_size = file_size, seed = seed)
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.user_uid = self.library.uid('u')
+        self.download_token = secrets.token_hex(4)
+        self.preview_token = secrets.token_hex(4)
+        self.request_count = 0
+        self._sessions: set[str] = set()
+        self._uploads: dict[str, list[tuple[str, bytes]]] = {}
+        self._errors = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        '''Base URL of the server'''
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def server_api(self) -> str:
+        '''Base URL of the API, to pass wherever a ``server_api`` is needed'''
+        return self.url + API_PATH
+
+    @property
+    def user(self):
+        ''':class:`User` with the credentials the server accepts'''
+        from .core import User
+        return User(self.username, self.password)
+
+    def start(self) -> 'MockServer':
+        '''Start serving from a background thread'''
+        self._thread = threading.Thread(
+            target = self._httpd.serve_forever, kwargs = {'poll_interval': 0.1},
+            daemon = True, name = 'photoprysm-mock-server')
+        self._thread.start()
+        logger.info(f'Mock server listening on {self.url}.')
+        return self
+
+    def stop(self) -> None:
+        '''Stop serving and close the socket'''
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'MockServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _inject_error(self) -> bool:
+        with self._lock:
+            self.request_count += 1
+            return self.error_rate > 0 and self._errors.random() < self.error_rate
+
+    # Sessions
+    def _session(self, token: str) -> dict[str, Any]:
+        return {
+            'id': token, 'access_token': token, 'token_type': 'Bearer',
+            'status': 'ok', 'provider': 'local',
+            'user': {'UID': self.user_uid, 'Name': self.username,
+                     'Role': 'admin'},
+            'config': {'downloadToken': self.download_token,
+                       'previewToken': self.preview_token,
+                       'count': self.library.counts()}}
+
+    def _new_session(self) -> str:
+        token = secrets.token_hex(16)
+        with self._lock: self._sessions.add(token)
+        return token
+
+    def post_session(self, req: '_Request'):
+        body = req.json()
+        if (body.get('username'), body.get('password')) != (self.username, self.password):
+            raise _HTTPError(401, 'Invalid credentials')
+        return self._session(self._new_session())
+
+    def get_session(self, req: '_Request'):
+        return self._session(req.token)
+
+    def delete_session(self, req: '_Request'):
+        with self._lock: self._sessions.discard(req.token)
+        return {'status': 'deleted'}
+
+    def post_oauth_token(self, req: '_Request'):
+        if not req.headers.get('Authorization', '').startswith('Basic '):
+            raise _HTTPError(401, 'Invalid client credentials')
+        token = self._new_session()
+        return {'access_token': token, 'token_type': 'Bearer',
+                'expires_in': 86400, 'scope': '*'}
+
+    def post_oauth_revoke(self, req: '_Request'):
+        return {'status': 'deleted'}
+
+    def get_config(self, req: '_Request'):
+        return {'count': self.library.counts(),
+                'downloadToken': self.download_token,
+                'previewToken': self.preview_token}
+
+    def get_status(self, req: '_Request'):
+        return {'status': 'operational'}
+
+    # Photos
+    def get_photos(self, req: '_Request'):
+        lib = self.library
+        count, offset = req.int('count', 100), req.int('offset', 0)
+        with lib.lock:
+            photos = lib.photos.values()
+            album = req.query.get('s')
+            if album:
+                members = lib.members.get(album, {})
+                photos = (lib.photos[uid] for uid in members if uid in lib.photos)
+            photos = _filter_photos(photos, req.query.get('q', ''))
+            order = req.query.get('order')
+            if order == 'edited':
+                photos = sorted(photos, key = lambda p: parse_timestamp(p['UpdatedAt']),
+                                reverse = True)
+            elif order in ('newest', 'oldest'):
+                photos = sorted(photos, key = lambda p: p['TakenAt'],
+                                reverse = order == 'newest')
+            elif order in ('title', 'name'):
+                photos = sorted(photos, key = lambda p: p['Title'])
+            # Unsorted searches stop as soon as the page is full
+            return list(itertools.islice(photos, offset, offset + count))
+
+    def _photo(self, uid: str) -> dict[str, Any]:
+        try:
+            return self.library.photos[uid]
+        except KeyError:
+            raise _HTTPError(404, 'Photo not found') from None
+
+    def get_photo(self, req: '_Request', uid: str):
+        return self._photo(uid)
+
+    def put_photo(self, req: '_Request', uid: str):
+        with self.library.lock:
+            photo = self._photo(uid)
+            for key, value in req.json().items():
+                if key == 'Details':
+                    photo.setdefault('Details', {}).update(value)
+                else: photo[key] = value
+            photo['UpdatedAt'] = photo['EditedAt'] = _now()
+            return photo
+
+    def post_photo_like(self, req: '_Request', uid: str):
+        self._photo(uid)['Favorite'] = True
+        return _ok()
+
+    def delete_photo_like(self, req: '_Request', uid: str):
+        self._photo(uid)['Favorite'] = False
+        return _ok()
+
+    def post_photo_approve(self, req: '_Request', uid: str):
+        photo = self._photo(uid)
+        photo['Quality'] = max(photo['Quality'], 3)
+        return dict(_ok(), photo = photo)
+
+    def post_batch_photos(self, req: '_Request', action: str):
+        lib = self.library
+        with lib.lock:
+            for uid in req.json().get('photos', []):
+                photo = lib.photos.get(uid)
+                if photo is None: continue
+                if action == 'archive': photo['DeletedAt'] = _now()
+                elif action == 'restore': photo['DeletedAt'] = None
+                elif action == 'private': photo['Private'] = True
+                elif action == 'delete' and photo['DeletedAt']:
+                    del lib.photos[uid]
+                    for members in lib.members.values(): members.pop(uid, None)
+                    for raw_file in photo['Files']: lib.files.pop(raw_file['Hash'], None)
+        return _ok()
+
+    def get_file(self, req: '_Request', hashbrown: str):
+        try:
+            return self.library.files[hashbrown]
+        except KeyError:
+            raise _HTTPError(404, 'File not found') from None
+
+    # Downloads
+    def _check_download_token(self, req: '_Request') -> None:
+        if req.query.get('t') != self.download_token:
+            raise _HTTPError(401, 'Invalid download token')
+
+    def get_dl(self, req: '_Request', hashbrown: str):
+        self._check_download_token(req)
+        content = self.library.content(hashbrown)
+        if content is None: raise _HTTPError(404, 'File not found')
+        return _Body(content, 'image/jpeg', ranged = True)
+
+    def get_photo_dl(self, req: '_Request', uid: str):
+        self._check_download_token(req)
+        photo = self._photo(uid)
+        return _Body(self.library.content(photo['Hash']), 'image/jpeg', ranged = True)
+
+    def get_album_dl(self, req: '_Request', uid: str):
+        self._check_download_token(req)
+        lib = self.library
+        buf = io.BytesIO()
+        # Built on the fly like the real thing, so ranges are ignored
+        with lib.lock, zipfile.ZipFile(buf, 'w', zipfile.ZIP_STORED) as archive:
+            for photo_uid in self._album_members(uid):
+                photo = lib.photos.get(photo_uid)
+                if photo is None: continue
+                raw_file = photo['Files'][0]
+                archive.writestr(raw_file['Name'].rsplit('/', 1)[-1],
+                                 lib.content(raw_file['Hash']))
+        return _Body(buf.getvalue(), 'application/zip')
+
+    def get_thumbnail(self, req: '_Request', hashbrown: str, token: str, size: str):
+        if token != self.preview_token: raise _HTTPError(403, 'Invalid preview token')
+        if hashbrown not in self.library.files: raise _HTTPError(404, 'File not found')
+        seed = int(hashlib.sha1(f'{hashbrown}/{size}'.encode()).hexdigest()[:8], 16)
+        return _Body(fake_jpeg(seed, 1024), 'image/jpeg')
+
+    # Uploads
+    def post_upload(self, req: '_Request', user_uid: str, token: str):
+        files = _parse_multipart(req.body, req.headers.get('Content-Type', ''))
+        with self._lock: self._uploads.setdefault(token, []).extend(files)
+        return _ok()
+
+    def put_upload(self, req: '_Request', user_uid: str, token: str):
+        lib = self.library
+        with self._lock: files = self._uploads.pop(token, [])
+        albums = req.json().get('albums') or []
+        with lib.lock:
+            for name, content in files:
+                hashbrown = hashlib.sha1(content).hexdigest()
+                raw_file = lib.files.get(hashbrown)
+                if raw_file is None:
+                    title = name.rsplit('.', 1)[0] or 'Upload'
+                    uid = lib.add_photo(title, content, name or None)['UID']
+                else: uid = raw_file['PhotoUID']
+                for album in albums:
+                    if album in lib.members: lib.members[album][uid] = None
+        return _ok()
+
+    def post_job(self, req: '_Request', name: str):
+        # Imports and indexing answer once they are done, like the real thing
+        time.sleep(self.latency)
+        return _ok(f'{name.title()} completed')
+
+    def delete_job(self, req: '_Request', name: str):
+        return _ok()
+
+    # Albums
+    def get_albums(self, req: '_Request'):
+        lib = self.library
+        count, offset = req.int('count', 100), req.int('offset', 0)
+        query = req.query.get('q', '').lower()
+        with lib.lock:
+            albums = [a for a in lib.albums.values()
+                      if not query or query in a['Title'].lower()]
+            order = req.query.get('order')
+            if order == 'edited':
+                albums.sort(key = lambda a: parse_timestamp(a['UpdatedAt']), reverse = True)
+            elif order == 'added':
+                albums.sort(key = lambda a: parse_timestamp(a['CreatedAt']), reverse = True)
+            elif order in ('title', 'name'):
+                albums.sort(key = lambda a: a['Title'])
+            elif order == 'favorites':
+                albums.sort(key = lambda a: not a['Favorite'])
+            return albums[offset:offset+count]
+
+    def _album(self, uid: str) -> dict[str, Any]:
+        try:
+            return self.library.albums[uid]
+        except KeyError:
+            raise _HTTPError(404, 'Album not found') from None
+
+    def _album_members(self, uid: str) -> dict[str, None]:
+        self._album(uid)
+        return self.library.members[uid]
+
+    def post_albums(self, req: '_Request'):
+        body = req.json()
+        title = body.get('Title')
+        if not title: raise _HTTPError(400, 'Title must not be empty')
+        return self.library.add_album(title, bool(body.get('Favorite')))
+
+    def get_album(self, req: '_Request', uid: str):
+        return self._album(uid)
+
+    def put_album(self, req: '_Request', uid: str):
+        with self.library.lock:
+            album = self._album(uid)
+            album.update(req.json())
+            album['UpdatedAt'] = _now()
+            return album
+
+    def post_batch_albums_delete(self, req: '_Request'):
+        lib = self.library
+        with lib.lock:
+            for uid in req.json().get('albums', []):
+                lib.albums.pop(uid, None)
+                lib.members.pop(uid, None)
+                lib.links.pop(uid, None)
+        return _ok()
+
+    def post_album_clone(self, req: '_Request', uid: str):
+        lib = self.library
+        with lib.lock:
+            members = self._album_members(uid)
+            for other in req.json().get('albums', []):
+                members.update(self._album_members(other))
+            album = self._touch_album(uid)
+        return dict(_ok(), album = album)
+
+    def _touch_album(self, uid: str) -> dict[str, Any]:
+        album = self._album(uid)
+        album['UpdatedAt'] = _now()
+        return album
+
+    def post_album_photos(self, req: '_Request', uid: str):
+        lib = self.library
+        with lib.lock:
+            members = self._album_members(uid)
+            for photo_uid in req.json().get('photos', []):
+                if photo_uid in lib.photos: members[photo_uid] = None
+            album = self._touch_album(uid)
+        return dict(_ok(), album = album)
+
+    def delete_album_photos(self, req: '_Request', uid: str):
+        with self.library.lock:
+            members = self._album_members(uid)
+            for photo_uid in req.json().get('photos', []):
+                members.pop(photo_uid, None)
+            album = self._touch_album(uid)
+        return dict(_ok(), album = album)
+
+    def post_album_like(self, req: '_Request', uid: str):
+        self._album(uid)['Favorite'] = True
+        return _ok()
+
+    def delete_album_like(self, req: '_Request', uid: str):
+        self._album(uid)['Favorite'] = False
+        return _ok()
+
+    # Share links
+    def get_album_links(self, req: '_Request', uid: str):
+        self._album(uid)
+        return list(self.library.links[uid].values())
+
+    def post_album_links(self, req: '_Request', uid: str):
+        lib = self.library
+        with lib.lock:
+            album = self._album(uid)
+            now = _now()
+            link = {
+                'UID': lib.uid('s'), 'ShareUID': uid, 'Slug': album['Slug'],
+                'Token': ''.join(secrets.choice(_UID_ALPHABET) for _ in range(10)),
+                'Expires': 0, 'Views': 0, 'MaxViews': 0, 'HasPassword': False,
+                'Comment': '', 'Perm': 0, 'CreatedBy': self.user_uid,
+                'CreatedAt': now, 'ModifiedAt': now}
+            lib.links[uid][link['UID']] = link
+            return link
+
+    def _link(self, uid: str, link_uid: str) -> dict[str, Any]:
+        self._album(uid)
+        try:
+            return self.library.links[uid][link_uid]
+        except KeyError:
+            raise _HTTPError(404, 'Link not found') from None
+
+    def put_album_link(self, req: '_Request', uid: str, link_uid: str):
+        with self.library.lock:
+            link = self._link(uid, link_uid)
+            for key in ('Token', 'Slug', 'Expires', 'MaxViews', 'Comment'):
+                if key in req.json(): link[key] = req.json()[key]
+            if 'Password' in req.json(): link['HasPassword'] = bool(req.json()['Password'])
+            link['ModifiedAt'] = _now()
+            return link
+
+    def delete_album_link(self, req: '_Request', uid: str, link_uid: str):
+        with self.library.lock:
+            link = self._link(uid, link_uid)
+            del self.library.links[uid][link_uid]
+            return link
+
+# Method, path pattern under the API, name of the MockServer method, and
+# whether it can be called without an access token
+_ROUTES: list[tuple[str, re.Pattern, str, bool]] = [
+    (method, re.compile(pattern), handler, public)
+    for method, pattern, handler, public in [
+        ('POST', r'session', 'post_session', True),
+        ('GET', r'session', 'get_session', False),
+        ('DELETE', r'session', 'delete_session', False),
+        ('POST', r'oauth/token', 'post_oauth_token', True),
+        ('POST', r'oauth/revoke', 'post_oauth_revoke', True),
+        ('GET', r'config', 'get_config', False),
+        ('GET', r'status', 'get_status', True),
+        ('GET', r'photos', 'get_photos', False),
+        ('GET', r'photos/([^/]+)', 'get_photo', False),
+        ('PUT', r'photos/([^/]+)', 'put_photo', False),
+        ('POST', r'photos/([^/]+)/like', 'post_photo_like', False),
+        ('DELETE', r'photos/([^/]+)/like', 'delete_photo_like', False),
+        ('POST', r'photos/([^/]+)/approve', 'post_photo_approve', False),
+        ('GET', r'photos/([^/]+)/dl', 'get_photo_dl', True),
+        ('POST', r'batch/photos/(archive|restore|delete|private)', 'post_batch_photos', False),
+        ('GET', r'files/([0-9a-f]+)', 'get_file', False),
+        ('GET', r'dl/([0-9a-f]+)', 'get_dl', True),
+        ('GET', r't/([0-9a-f]+)/([^/]+)/([^/]+)', 'get_thumbnail', True),
+        ('POST', r'users/([^/]+)/upload/([^/]+)', 'post_upload', False),
+        ('PUT', r'users/([^/]+)/upload/([^/]+)', 'put_upload', False),
+        ('POST', r'(import|index)(?:/.*)?', 'post_job', False),
+        ('DELETE', r'(import|index)(?:/.*)?', 'delete_job', False),
+        ('GET', r'albums', 'get_albums', False),
+        ('POST', r'albums', 'post_albums', False),
+        ('GET', r'albums/([^/]+)', 'get_album', False),
+        ('PUT', r'albums/([^/]+)', 'put_album', False),
+        ('POST', r'batch/albums/delete', 'post_batch_albums_delete', False),
+        ('POST', r'albums/([^/]+)/clone', 'post_album_clone', False),
+        ('POST', r'albums/([^/]+)/photos', 'post_album_photos', False),
+        ('DELETE', r'albums/([^/]+)/photos', 'delete_album_photos', False),
+        ('POST', r'albums/([^/]+)/like', 'post_album_like', False),
+        ('DELETE', r'albums/([^/]+)/like', 'delete_album_like', False),
+        ('GET', r'albums/([^/]+)/dl', 'get_album_dl', True),
+        ('GET', r'albums/([^/]+)/links', 'get_album_links', False),
+        ('POST', r'albums/([^/]+)/links', 'post_album_links', False),
+        ('PUT', r'albums/([^/]+)/links/([^/]+)', 'put_album_link', False),
+        ('DELETE', r'albums/([^/]+)/links/([^/]+)', 'delete_album_link', False),
+    ]]
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class _Body:
+    # Raw response body, as opposed to JSON
+    def __init__(self, content: bytes, content_type: str, ranged: bool = False):
+        self.content = content
+        self.content_type = content_type
+        self.ranged = ranged
+
+class _Request:
+    def __init__(self, handler: '_Handler', query: dict[str, str], body: bytes):
+        self.headers = handler.headers
+        self.query = query
+        self.body = body
+        self._json = None
+
+    @property
+    def token(self) -> str:
+        auth = self.headers.get('Authorization', '')
+        return auth.removeprefix('Bearer ') if auth.startswith('Bearer ') else ''
+
+    def json(self) -> dict[str, Any]:
+        if self._json is None:
+            try:
+                self._json = json.loads(self.body or b'{}')
+            except ValueError:
+                raise _HTTPError(400, 'Invalid JSON') from None
+        return self._json
+
+    def int(self, key: str, default: int) -> int:
+        try:
+            return int(self.query.get(key, default))
+        except ValueError:
+            raise _HTTPError(400, f'Invalid {key}') from None
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PhotoprismMock/1.0'
+    # Headers and body are written separately, which Nagle's algorithm
+    # would hold up until the client acknowledges the headers
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self): self._handle('GET')
+    def do_POST(self): self._handle('POST')
+    def do_PUT(self): self._handle('PUT')
+    def do_DELETE(self): self._handle('DELETE')
+
+    def _handle(self, method: str) -> None:
+        mock: MockServer = self.server.mock
+        body = self._read_body(mock.bandwidth)
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if mock.latency: time.sleep(mock.latency)
+        try:
+            if mock._inject_error():
+                raise _HTTPError(500, 'Injected error')
+            if not url.path.startswith(API_PATH):
+                raise _HTTPError(404, 'Not found')
+            func, args, public = self._route(method, unquote(url.path[len(API_PATH):]))
+            req = _Request(self, query, body)
+            if not public and req.token not in mock._sessions:
+                raise _HTTPError(401, 'Unauthorized')
+            rv = func(mock, req, *args)
+        except _HTTPError as err:
+            self._send(err.status, _Body(json.dumps({'error': str(err)}).encode(),
+                                         'application/json'), mock.bandwidth)
+            return
+        if not isinstance(rv, _Body):
+            rv = _Body(json.dumps(rv).encode(), 'application/json')
+        self._send(200, rv, mock.bandwidth)
+
+    def _route(self, method: str, path: str) -> tuple[Callable, tuple, bool]:
+        path = path.rstrip('/')
+        for route_method, pattern, name, public in _ROUTES:
+            match = pattern.fullmatch(path)
+            if match and route_method == method:
+                return getattr(MockServer, name), match.groups(), public
+        raise _HTTPError(404, 'Not found')
+
+    def _read_body(self, bandwidth: Optional[float]) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if size == 0: break
+                chunks.append(self._read(size, bandwidth))
+                self.rfile.readline()
+            # Skip the trailers up to the blank line
+            while self.rfile.readline() not in (b'\r\n', b'\n', b''): pass
+            return b''.join(chunks)
+        return self._read(int(self.headers.get('Content-Length') or 0), bandwidth)
+
+    def _read(self, size: int, bandwidth: Optional[float]) -> bytes:
+        chunks = []
+        while size > 0:
+            chunk = self.rfile.read(min(size, _BLOCK_SIZE))
+            if not chunk: break
+            chunks.append(chunk)
+            size -= len(chunk)
+            if bandwidth: time.sleep(len(chunk) / bandwidth)
+        return b''.join(chunks)
+
+    def _send(self, status: int, body: _Body, bandwidth: Optional[float]) -> None:
+        content = body.content
+        start, end = 0, len(content)
+        byte_range = self.headers.get('Range') if body.ranged and status == 200 else None
+        if byte_range:
+            match = re.fullmatch(r'bytes=(\d+)-(\d*)', byte_range.strip())
+            if match and int(match.group(1)) < len(content):
+                start = int(match.group(1))
+                if match.group(2): end = min(int(match.group(2)) + 1, end)
+                status = 206
+            elif match:
+                # Starts past the end, which Photoprism answers like this
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(content)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header('Content-Type', body.content_type)
+        self.send_header('Content-Length', str(end - start))
+        if body.ranged: self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end-1}/{len(content)}')
+        self.end_headers()
+        view = memoryview(content)[start:end]
+        for i in range(0, len(view), _BLOCK_SIZE):
+            block = view[i:i+_BLOCK_SIZE]
+            # Wait first, so no block arrives sooner than the limit allows
+            if bandwidth: time.sleep(len(block) / bandwidth)
+            self.wfile.write(block)
+
+_BLOCK_SIZE = 64 * 1024
+
+def _now() -> str:
+    return format_timestamp(datetime.now(timezone.utc))
+
+def _ok(message: str = 'Changes successfully saved') -> dict[str, Any]:
+    return {'code': 200, 'message': message}
+
+def _filter_photos(photos: Iterable[dict[str, Any]], query: str) -> Iterator[dict[str, Any]]:
+    # A small part of the search filters: key:value pairs on a few fields and
+    # plain words matched against the title
+    archived = False
+    tests = []
+    for term in query.split():
+        key, _, value = term.partition(':')
+        if not value:
+            tests.append(lambda p, word = key.lower(): word in p['Title'].lower())
+        elif key == 'archived':
+            archived = value == 'true'
+        elif key in ('year', 'month', 'day'):
+            tests.append(lambda p, key = key.title(), value = value: str(p[key]) == value)
+        elif key in ('favorite', 'private'):
+            tests.append(lambda p, key = key.title(), value = value == 'true': p[key] == value)
+        elif key in ('uid', 'type', 'title', 'name'):
+            tests.append(lambda p, key = key.upper() if key == 'uid' else key.title(),
+                         value = value.lower(): str(p[key]).lower() == value)
+    return (p for p in photos if bool(p['DeletedAt']) == archived
+            and all(test(p) for test in tests))
+
+def _parse_multipart(body: bytes, content_type: str) -> list[tuple[str, bytes]]:
+    # Returns the filename and contents of each part
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if match is None: raise _HTTPError(400, 'Missing multipart boundary')
+    delimiter = b'--' + match.group(1).encode()
+    rv = []
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b'--'): break
+        head, _, content = part.partition(b'\r\n\r\n')
+        name = re.search(rb'filename="([^"]*)"', head)
+        rv.append((name.group(1).decode() if name else '',
+                   content.removesuffix(b'\r\n')))
+    return rv
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description = 'Photoprism mock server')
+    parser.add_argument('--host', default = '127.0.0.1',
+                        help = 'Host to listen on')
+    parser.add_argument('--port', type = int, default = 2342,
+                        help = 'Port to listen on')
+    parser.add_argument('--photos', type = int, default = 1000,
+                        help = 'Number of photos to generate')
+    parser.add_argument('--albums', type = int, default = 20,
+                        help = 'Number of albums to generate')
+    parser.add_argument('--file-size', type = int, default = 4096,
+                        help = 'Size of each generated file in bytes')
+    parser.add_argument('--seed', type = int, default = 0,
+                        help = 'Seed for the generated library')
+    parser.add_argument('--username', default = 'admin',
+                        help = 'Username to accept')
+    parser.add_argument('--password', default = 'photoprism',
+                        help = 'Password to accept')
+    parser.add_argument('--latency', type = float, default = 0.0,
+                        help = 'Seconds to wait before answering each request')
+    parser.add_argument('--bandwidth', type = float,
+                        help = 'Maximum bytes per second for each body')
+    parser.add_argument('--error-rate', type = float, default = 0.0,
+                        help = 'Fraction of requests to answer with an error')
+    args = parser.parse_args(argv)
+    server = MockServer(
+        photos = args.photos, albums = args.albums, file_size = args.file_size,
+        seed = args.seed, username = args.username, password = args.password,
+        latency = args.latency, bandwidth = args.bandwidth,
+        error_rate = args.error_rate, host = args.host, port = args.port)
+    print(f'Serving {args.photos} photos at {server.server_api}', flush = True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,12 @@
 import re
 import json
 import pytest
+import responses
 from pathlib import Path
 from typing import Any
-import requests
+from urllib.parse import urljoin, urlsplit, parse_qsl
 from responses.matchers import multipart_matcher
+from photoprysm.testing import MockServer, fake_jpeg
 
 __MOCK_RESPONSE_BASE_PATH__ = Path(__file__).resolve().with_name(
     'mock_responses')
@@ -42,12 +44,41 @@ def mock_photo(request):
     return mock_this(body)
 
 @pytest.fixture
-def mock_file_path():
-    f = requests.get('https://picsum.photos/200', stream = True)
-    p = Path('mock_file_path.jpg')
-    p.write_bytes(f.content)
-    yield p
-    p.unlink()
+def mock_file_path(tmp_path):
+    p = tmp_path/'mock_file_path.jpg'
+    p.write_bytes(fake_jpeg(seed = 200))
+    return p
+
+@pytest.fixture
+def mock_server():
+    with MockServer(photos = 50, albums = 3) as server:
+        yield server
+
+@pytest.fixture
+def photo_search():
+    '''Registers a photo search that pages like Photoprism does. Takes the
+    base URL and (photo UID, file JSON) pairs, one per file. Searches return
+    a row for each file. Merged searches page by those rows and then fold
+    the files of each photo into one result, so their pages can come back
+    short while more photos remain.'''
+    def register(server_api: str, files: list[tuple[str, dict[str, Any]]]):
+        def callback(request):
+            query = dict(parse_qsl(urlsplit(request.url).query))
+            offset = int(query.get('offset', 0))
+            rows = files[offset:offset + int(query.get('count', 100))]
+            if query.get('merged') == 'true':
+                merged = {}
+                for uid, raw_file in rows:
+                    merged.setdefault(uid, {'UID': uid, 'Files': []})
+                    merged[uid]['Files'].append(raw_file)
+                body = list(merged.values())
+            else:
+                body = [{'UID': uid, 'Hash': raw_file['Hash'],
+                         'FileName': raw_file['Name']} for uid, raw_file in rows]
+            return (200, {}, json.dumps(body))
+        return responses.add_callback(
+            responses.GET, urljoin(server_api, 'photos'), callback = callback)
+    return register
 
 @pytest.fixture(params=list(
     (__MOCK_RESPONSE_BASE_PATH__/'file').glob('body*.json')
@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 import json
+import zipfile
 import pytest
+import requests
 import responses
 from urllib.parse import urljoin
 from dataclasses import asdict
 from pprint import pprint as pp
 
+import photoprysm
 from photoprysm import core
 from photoprysm import albums
+from photoprysm.models.links import ShareLink
 
 from .test_core import *
 
@@ -143,3 +147,264 @@ def test_get_albums(mock_album, server_api, session, count, query, offset, order
 # @responses.activate
 # def test_get_share_links(user, server_api, session):
 #     pass
+
+@responses.activate
+def test_get_member_uids_multiple_files(server_api, session, photo_search):
+    # p1 has three files, which would fill a merged page on its own
+    files = [('p1', {'Hash': 'h1', 'Name': 'a.jpg', 'Primary': True}),
+             ('p1', {'Hash': 'h1a', 'Name': 'a.mov', 'Primary': False}),
+             ('p1', {'Hash': 'h1b', 'Name': 'a.xmp', 'Primary': False})]
+    files += [(f'p{i}', {'Hash': f'h{i}', 'Name': f'{i}.jpg', 'Primary': True})
+              for i in range(2, 6)]
+    photo_search(server_api, files)
+    uids = albums.get_member_uids(session, server_api, 'a1', page_size = 3)
+    assert uids == {'p1', 'p2', 'p3', 'p4', 'p5'}
+
+@responses.activate
+def test_sync_members(server_api, session):
+    uid = 'aqoe4m9204aigugh'
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        match = [responses.matchers.query_param_matcher(
+            {'count': 2, 'offset': 0, 's': uid, 'quality': 0})],
+        json = [{'UID': 'p1'}, {'UID': 'p2'}])
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        match = [responses.matchers.query_param_matcher(
+            {'count': 2, 'offset': 2, 's': uid, 'quality': 0})],
+        json = [{'UID': 'p3'}])
+    add = responses.post(
+        url = urljoin(server_api, f'albums/{uid}/photos'),
+        json = {'code': 200})
+    remove = responses.delete(
+        url = urljoin(server_api, f'albums/{uid}/photos'),
+        match = [responses.matchers.json_params_matcher({'photos': ['p1']})],
+        json = {'code': 200})
+    desired = ['p2', 'p3', 'p4', 'p5', 'p6']
+    uids = albums.get_member_uids(session, server_api, uid, page_size = 2)
+    assert uids == {'p1', 'p2', 'p3'}
+    results = albums.sync_members(session, server_api, uid, desired,
+                                  current = uids, chunk_size = 2)
+    assert all(r.ok for r in results)
+    assert [r.item for r in results] == [
+        ('add', ['p4', 'p5']), ('add', ['p6']), ('remove', ['p1'])]
+    assert add.call_count == 2
+    assert remove.call_count == 1
+    # Nothing to do once the album matches
+    results = albums.sync_members(session, server_api, uid, desired,
+                                  current = desired)
+    assert results == []
+
+def _album_pages(server_api, albums_json, page_size, order = None):
+    for offset in range(0, len(albums_json) + 1, page_size):
+        params = {'count': page_size, 'offset': offset}
+        if order is not None: params['order'] = order
+        responses.get(
+            url = urljoin(server_api, 'albums'),
+            match = [responses.matchers.query_param_matcher(params)],
+            json = albums_json[offset:offset+page_size])
+
+@pytest.mark.parametrize('prefetch', [True, False])
+@responses.activate
+def test_iter_all(server_api, session, prefetch):
+    albums_json = [{'UID': f'a{i}', 'Title': f'Album {i}'} for i in range(5)]
+    _album_pages(server_api, albums_json, 2)
+    rv = list(albums.iter_all(session, server_api, page_size = 2,
+                              prefetch = prefetch))
+    assert [album.uid for album in rv] == [f'a{i}' for i in range(5)]
+    assert len(responses.calls) == 3
+
+@responses.activate
+def test_album_index(server_api, session):
+    albums_json = [
+        {'UID': 'a2', 'Title': 'Renamed', 'UpdatedAt': '2024-03-01T00:00:00Z'},
+        {'UID': 'a1', 'Title': 'Same', 'UpdatedAt': '2024-02-01T00:00:00Z'},
+        {'UID': 'a0', 'Title': 'Same', 'UpdatedAt': '2024-01-01T00:00:00Z'}]
+    _album_pages(server_api, albums_json, 2, order = 'edited')
+    index = albums.AlbumIndex(session, server_api, page_size = 2)
+    assert len(index) == 2
+    # The most recently edited album wins
+    assert index['Same'] == 'a1'
+    assert 'Renamed' in index
+    calls = len(responses.calls)
+    assert index.get('Missing') is None
+    assert len(responses.calls) == calls
+    # Only the albums edited since the last scan are read again
+    responses.reset()
+    albums_json = [
+        {'UID': 'a2', 'Title': 'New title', 'UpdatedAt': '2024-04-01T00:00:00Z'},
+        {'UID': 'a3', 'Title': 'New', 'UpdatedAt': '2024-03-15T00:00:00Z'},
+        {'UID': 'a1', 'Title': 'Same', 'UpdatedAt': '2024-02-01T00:00:00Z'}]
+    _album_pages(server_api, albums_json, 2, order = 'edited')
+    assert index.refresh() == 2
+    assert len(responses.calls) == 2
+    assert 'Renamed' not in index
+    assert index['New title'] == 'a2'
+    assert index['New'] == 'a3'
+    index.discard('a3')
+    assert 'New' not in index
+
+@responses.activate
+def test_create_many(server_api, session):
+    _album_pages(server_api, [{'UID': 'a0', 'Title': 'Existing'}], 10, order = 'edited')
+    index = albums.AlbumIndex(session, server_api, page_size = 10)
+    for i, title in enumerate(['New 1', 'New 2']):
+        responses.post(
+            url = urljoin(server_api, 'albums'),
+            match = [responses.matchers.json_params_matcher(
+                {'Title': title, 'Favorite': False})],
+            json = {'UID': f'a{i+1}', 'Title': title})
+    results = albums.create_many(session, server_api,
+                                 ['Existing', 'New 1', 'New 2'], index = index)
+    assert [r.value.uid for r in results] == ['a0', 'a1', 'a2']
+    assert [r.skipped for r in results] == [True, False, False]
+    assert index['New 2'] == 'a2'
+
+@responses.activate
+def test_clone_many(server_api, session):
+    for uid in ('a1', 'a2'):
+        responses.post(
+            url = urljoin(server_api, f'albums/{uid}/clone'),
+            match = [responses.matchers.json_params_matcher({'albums': ['a0']})],
+            json = {'code': 200, 'album': {'UID': uid}})
+    responses.post(
+        url = urljoin(server_api, 'albums/a3/clone'),
+        status = 404,
+        json = {'error': 'Album not found'})
+    results = albums.clone_many(session, server_api,
+                                [(uid, ['a0']) for uid in ('a1', 'a2', 'a3')])
+    assert [r.value.uid for r in results[:2]] == ['a1', 'a2']
+    assert isinstance(results[2].error, requests.HTTPError)
+    with pytest.raises(TypeError):
+        albums.clone_many(session, server_api, [('a1', [None])])
+
+def _share_link(i, **kwargs):
+    return dict({'Token': f'token{i}', 'ShareUID': f'a{i}', 'Slug': 'album',
+                 'UID': f's{i}', 'CreatedAt': '2024-01-01T00:00:00Z'}, **kwargs)
+
+@responses.activate
+def test_share_link_inventory(server_api, session):
+    links = {'a0': [_share_link(0, Views = 3, MaxViews = 3)],
+             'a1': [_share_link(1, Expires = 60)],
+             'a2': [],
+             # Edited later, which restarts the expiry
+             'a3': [_share_link(3, Expires = 60,
+                                ModifiedAt = '2024-01-02T00:00:00Z')]}
+    for uid, body in links.items():
+        responses.get(url = urljoin(server_api, f'albums/{uid}/links'), json = body)
+    responses.get(url = urljoin(server_api, 'albums/a4/links'), status = 500)
+    errors = {}
+    inventory = albums.scan_share_links(session, server_api, [*links, 'a4'],
+                                        errors = errors)
+    # The album that failed doesn't stop the others
+    assert list(inventory) == ['a0', 'a1', 'a2', 'a3']
+    assert list(errors) == ['a4']
+    assert isinstance(errors['a4'], requests.HTTPError)
+    assert inventory['a2'] == []
+    assert inventory['a3'][0].expires_at.isoformat() == '2024-01-02T00:01:00+00:00'
+    link0, link1 = inventory['a0'][0], inventory['a1'][0]
+    assert link0.expired and link0.expires_at is None
+    assert link1.expired
+    assert link1.expires_at.isoformat() == '2024-01-01T00:01:00+00:00'
+    assert not ShareLink('t', 'a', 'slug', 's').expired
+    # Bulk maintenance
+    for i, link in enumerate((link0, link1)):
+        responses.put(
+            url = urljoin(server_api, f'albums/a{i}/links/s{i}'),
+            match = [responses.matchers.json_params_matcher({'Expires': 1})],
+            json = _share_link(i, Expires = 1))
+    results = albums.expire_share_links(session, server_api, [link0, link1])
+    assert [r.value.expires for r in results] == [1, 1]
+    rotate = responses.put(
+        url = urljoin(server_api, 'albums/a0/links/s0'),
+        json = _share_link(0, Token = 'rotated'))
+    results = albums.rotate_share_links(session, server_api, [link0])
+    token = json.loads(rotate.calls[0].request.body)['Token']
+    assert len(token) == 10 and token != link0.token
+    delete = responses.delete(
+        url = urljoin(server_api, 'albums/a1/links/s1'),
+        json = _share_link(1))
+    results = albums.delete_share_links(session, server_api, [link1])
+    assert results[0].ok and delete.call_count == 1
+
+@pytest.mark.parametrize('honors_range', [True, False])
+@responses.activate
+def test_download(server_api, session, tmp_path, honors_range):
+    content = bytes(range(256)) * 64
+    url = urljoin(server_api, 'albums/a1/dl')
+    responses.get(
+        url = url,
+        match = [responses.matchers.query_param_matcher({'t': 'token'}),
+                 responses.matchers.header_matcher({'Range': 'bytes=1000-'})],
+        status = 206 if honors_range else 200,
+        body = content[1000:] if honors_range else content)
+    # The archive is built again when the download is started over
+    rebuilt = bytes(reversed(content))
+    restart = responses.get(
+        url = url,
+        match = [lambda req: ('Range' not in req.headers, 'Range was sent')],
+        body = rebuilt)
+    path = tmp_path/'album.zip'
+    # Resume from a download that was interrupted after 1000 bytes
+    (tmp_path/'album.zip.part').write_bytes(content[:1000])
+    rv = albums.download(session, server_api, 'a1', path,
+                         chunk_size = 300, download_token = 'token')
+    assert rv == path
+    assert path.read_bytes() == (content if honors_range else rebuilt)
+    assert restart.call_count == (0 if honors_range else 1)
+    assert not (tmp_path/'album.zip.part').exists()
+    if not honors_range:
+        with pytest.raises(ValueError):
+            list(albums.iter_download(session, server_api, 'a1', offset = 1000,
+                                      download_token = 'token'))
+
+@pytest.mark.parametrize('part_size', [1000, 1200])
+@responses.activate
+def test_download_complete_part(server_api, session, tmp_path, part_size):
+    content = bytes(range(200)) * 5
+    url = urljoin(server_api, 'albums/a1/dl')
+    # The range starts at the end of the archive, or past it
+    responses.get(
+        url = url,
+        match = [responses.matchers.header_matcher({'Range': f'bytes={part_size}-'})],
+        status = 416,
+        headers = {'Content-Range': f'bytes */{len(content)}'})
+    restart = responses.get(
+        url = url,
+        match = [lambda req: ('Range' not in req.headers, 'Range was sent')],
+        body = content)
+    path = tmp_path/'album.zip'
+    (tmp_path/'album.zip.part').write_bytes((content * 2)[:part_size])
+    rv = albums.download(session, server_api, 'a1', path, download_token = 'token')
+    assert rv.read_bytes() == content
+    # A .part file of the whole archive is done, a bigger one is started over
+    assert restart.call_count == (part_size != len(content))
+    assert not (tmp_path/'album.zip.part').exists()
+
+def test_download_rebuilt_archive(mock_server, tmp_path):
+    # The mock server builds the ZIP on every request and ignores the range
+    api = mock_server.server_api
+    library = mock_server.library
+    album_uid = next(iter(library.albums))
+    with photoprysm.user_session(mock_server.user, api) as session:
+        old = albums.download(session, api, album_uid, tmp_path/'old.zip')
+        (tmp_path/'album.zip.part').write_bytes(old.read_bytes()[:1000])
+        # The album changes before the download is resumed, so the new
+        # archive differs from the start
+        members = library.members[album_uid]
+        extra = next(uid for uid in library.photos if uid not in members)
+        library.members[album_uid] = {extra: None, **members}
+        path = albums.download(session, api, album_uid, tmp_path/'album.zip')
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert len(archive.namelist()) == len(library.members[album_uid])
+
+@responses.activate
+def test_iter_download(server_api, session):
+    responses.get(
+        url = urljoin(server_api, 'albums/a1/dl'),
+        body = b'x' * 2500)
+    chunks = list(albums.iter_download(session, server_api, 'a1',
+                                       chunk_size = 1000,
+                                       download_token = 'token'))
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import pytest
+import responses
+from urllib.parse import urljoin
+
+from photoprysm import photos
+from photoprysm.models import batch as batch_module
+from photoprysm.models.batch import PhotoBatch, StringColumn, IntColumn
+
+from .test_core import *
+
+def test_columns():
+    strings = StringColumn(['a', None, 'ünïcode', ''])
+    assert list(strings) == ['a', None, 'ünïcode', '']
+    assert strings[-2] == 'ünïcode'
+    assert list(strings.take([2, 0])) == ['ünïcode', 'a']
+    ints = IntColumn([3, None, 1])
+    assert list(ints) == [3, None, 1]
+    assert list(ints.values) == [3, 0, 1]
+
+def test_batch(mock_photo):
+    djsons = [dict(mock_photo['json'], Width = w) for w in (300, None, 100)]
+    batch = PhotoBatch.fromjson(djsons)
+    assert len(batch) == 3
+    photo = batch[0]
+    assert photo == photos.Photo.fromjson(dict(djsons[0]))
+    assert [p.width for p in batch.sort('width')] == [100, 300, None]
+    assert [p.width for p in batch.sort('width', reverse = True)] == [300, 100, None]
+    assert len(batch[[True, False, True]]) == 2
+    assert len(batch[1:]) == 2
+    assert len(batch.filter(lambda w: w is not None, 'width')) == 2
+    assert len(PhotoBatch.concat([batch, batch])) == 6
+
+def test_batch_numpy(mock_photo):
+    np = pytest.importorskip('numpy')
+    djsons = [dict(mock_photo['json'], Width = w) for w in (300, 5000, 100)]
+    batch = PhotoBatch.fromjson(djsons)
+    wide = batch[batch.column('width').numpy() > 200]
+    assert [p.width for p in wide] == [300, 5000]
+    assert [p.width for p in batch[np.array([2, 0])]] == [100, 300]
+
+@pytest.mark.parametrize('with_numpy', [True, False])
+def test_take_and_sort(monkeypatch, with_numpy):
+    if with_numpy: pytest.importorskip('numpy')
+    else: monkeypatch.setattr(batch_module, '_numpy', lambda: None)
+    titles = ['pear', None, 'äpfel', '', 'apple', 'pear', 'zebra', None]
+    widths = [5, None, 3, 1, 8, 2, None, 4]
+    batch = PhotoBatch({'uid': StringColumn(f'p{i}' for i in range(8)),
+                        'title': StringColumn(titles),
+                        'width': IntColumn(widths)})
+    indices = [6, -1, 0, 2, 2]
+    taken = batch.take(indices)
+    assert list(taken.column('title')) == [titles[i] for i in indices]
+    assert list(taken.column('width')) == [widths[i] for i in indices]
+    assert list(batch[2:6].column('title')) == titles[2:6]
+    assert list(batch[::3].column('width')) == widths[::3]
+    assert len(batch[5:2]) == 0
+    # Strings sort like Python strings do, missing values go last
+    present = sorted(t for t in titles if t is not None)
+    assert list(batch.sort('title').column('title')) == present + [None, None]
+    assert (list(batch.sort('title', reverse = True).column('title'))
+            == present[::-1] + [None, None])
+    assert list(batch.sort('width').column('width')) == [1, 2, 3, 4, 5, 8, None, None]
+    with pytest.raises(IndexError):
+        batch.take([8])
+
+@responses.activate
+def test_get_batch(mock_photo, server_api, session):
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        status = 200,
+        json = [mock_photo['json']] * 3)
+    batch = photos.get(session, server_api, count = 3, batch = True)
+    assert isinstance(batch, PhotoBatch)
+    assert batch[2].uid == mock_photo['json']['UID']
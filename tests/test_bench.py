@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import json
+import pytest
+import responses
+from urllib.parse import urljoin
+
+from photoprysm import bench
+from photoprysm.__main__ import main
+
+from .test_core import *
+from .test_cli import _mock_login
+
+_PHOTO = {'UID': 'p1', 'Title': 'Cat',
+          'Files': [{'Hash': 'abc', 'Primary': True}]}
+
+def _mock_photos(server_api):
+    responses.get(url = urljoin(server_api, 'photos'), json = [_PHOTO])
+    responses.get(url = urljoin(server_api, 'photos/p1'), json = _PHOTO)
+    update = responses.put(
+        url = urljoin(server_api, 'photos/p1'),
+        match = [responses.matchers.json_params_matcher({'Title': 'Cat'})],
+        json = _PHOTO)
+    responses.get(url = urljoin(server_api, 'dl/abc'), body = b'x' * 100)
+    return update
+
+@responses.activate
+def test_run(server_api, session):
+    session_json = {'id': 'token',
+                    'config': {'downloadToken': 'dl', 'previewToken': 'pv'}}
+    responses.get(url = urljoin(server_api, 'session'), json = session_json)
+    update = _mock_photos(server_api)
+    logins = []
+    results = bench.run(session, server_api,
+                        login = lambda: logins.append(1),
+                        counts = (1, 10),
+                        iterations = 5,
+                        concurrency = 2)
+    by_name = {r.name: r for r in results}
+    assert list(by_name) == ['login', 'search[count=1]', 'search[count=10]',
+                             'get', 'update', 'download']
+    assert len(logins) == 5
+    assert update.call_count == 5
+    for r in results:
+        assert r.requests == 5 and r.errors == 0
+        assert r.p50 <= r.p95 <= r.p99
+        assert r.rps > 0
+    assert by_name['download'].bytes_per_second > 0
+    assert by_name['get'].bytes_per_second is None
+    assert json.loads(json.dumps(bench.results_json(results)))[0]['name'] == 'login'
+    assert 'search[count=10]' in bench.format_results(results)
+
+@responses.activate
+def test_run_errors(server_api, session):
+    responses.get(url = urljoin(server_api, 'photos'), status = 500)
+    results = bench.run(session, server_api, operations = ['search'],
+                        counts = [1], iterations = 3)
+    assert results[0].errors == 3
+    assert results[0].p50 == 0.0
+    with pytest.raises(ValueError):
+        bench.run(session, server_api, operations = ['frobnicate'])
+
+def test_percentile():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert bench._percentile(values, 50) == 2.5
+    assert bench._percentile(values, 100) == 4.0
+    assert bench._percentile([], 99) == 0.0
+
+@responses.activate
+def test_main_bench(server_api, tmp_path, capsys):
+    _mock_login(server_api)
+    _mock_photos(server_api)
+    path = tmp_path/'bench.json'
+    rv = main(['localhost', '2342', 'user', 'admin', 'password', 'bench',
+               '--ops', 'login', 'search', 'download', '--counts', '5',
+               '-n', '3', '-c', '2', '--json', str(path)])
+    assert rv == 0
+    assert 'p99 ms' in capsys.readouterr().out
+    results = json.loads(path.read_text())
+    assert [r['name'] for r in results] == ['login', 'search[count=5]', 'download']
+    assert all(r['requests'] == 3 for r in results)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+from pathlib import Path
+
+from photoprysm.cache import DiskCache
+
+def test_get_put(tmp_path):
+    cache = DiskCache(tmp_path)
+    assert cache.get('abc123_tile_224') is None
+    cache.put('abc123_tile_224', b'thumbnail')
+    assert cache.get('abc123_tile_224') == b'thumbnail'
+    assert 'abc123_tile_224' in cache
+    assert cache.size == len(b'thumbnail')
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_size = 20)
+    cache.put('aa', b'0' * 8)
+    cache.put('bb', b'1' * 8)
+    # Touch the first entry so the second one is the oldest
+    cache.get('aa')
+    cache.put('cc', b'2' * 8)
+    assert 'aa' in cache
+    assert 'bb' not in cache
+    assert cache.size == 16
+
+def test_reload_index(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.put('aa', b'thumbnail')
+    cache = DiskCache(tmp_path)
+    assert cache.get('aa') == b'thumbnail'
+    cache.clear()
+    assert len(cache) == 0
+    assert len(DiskCache(tmp_path)) == 0
+
+def test_get_evicted_after_read(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path)
+    cache.put('aa', b'thumbnail')
+    read_bytes = Path.read_bytes
+    def read_then_evict(path):
+        # Another process evicts the entry right after it was read
+        content = read_bytes(path)
+        path.unlink()
+        return content
+    monkeypatch.setattr(Path, 'read_bytes', read_then_evict)
+    assert cache.get('aa') == b'thumbnail'
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import gzip
+import time
+import pytest
+import requests
+
+import photoprysm
+from photoprysm.cassette import Cassette, ReplayAdapter
+
+def _workload(session, server_api, path):
+    photos = photoprysm.get_photos(session, server_api, count = 20, merged = True)
+    photo = photoprysm.update_photo(session, server_api, photos[0],
+                                    photoprysm.PhotoProperties(title = 'Renamed'))
+    content = photoprysm.download_file(session, server_api, photo, path).read_bytes()
+    return [p.uid for p in photos], photo.title, content
+
+def test_record_replay(mock_server, tmp_path):
+    api = mock_server.server_api
+    cassette_path = tmp_path/'job.cassette'
+    with photoprysm.user_session(mock_server.user, api) as session:
+        adapters = dict(session.adapters)
+        with photoprysm.record_requests(session, cassette_path) as cassette:
+            recorded = _workload(session, api, tmp_path/'recorded.jpg')
+        assert session.adapters == adapters
+    assert len(cassette) >= 4 and cassette.duration > 0
+    # The access token of the session is not in the cassette
+    raw = gzip.decompress(cassette_path.read_bytes()).decode()
+    assert any(i['url'].endswith('/session') for i in cassette.interactions)
+    assert session.auth.token not in raw
+    count = mock_server.request_count
+    session = requests.Session()
+    with photoprysm.replay_requests(session, cassette_path, speed = None) as adapter:
+        replayed = _workload(session, api, tmp_path/'replayed.jpg')
+    assert replayed == recorded
+    assert adapter.misses == []
+    assert mock_server.request_count == count
+    assert not isinstance(session.get_adapter(api), ReplayAdapter)
+
+def test_replay_range(mock_server, tmp_path):
+    api = mock_server.server_api
+    def download(session, name, resume_first = False):
+        # Once in full, and once resumed from a .part file
+        photo = photoprysm.get_photos(session, api, count = 1)[0]
+        prefix = mock_server.library.content(photo.files[0]['Hash'])[:100]
+        full = tmp_path/f'{name}-full.jpg'
+        resumed = tmp_path/f'{name}-resumed.jpg'
+        resumed.with_name(resumed.name + '.part').write_bytes(prefix)
+        paths = [resumed, full] if resume_first else [full, resumed]
+        for path in paths:
+            photoprysm.download_file(session, api, photo, path)
+        return full.read_bytes(), resumed.read_bytes()
+    cassette_path = tmp_path/'range.cassette'
+    with photoprysm.user_session(mock_server.user, api) as session:
+        with photoprysm.record_requests(session, cassette_path) as cassette:
+            recorded = download(session, 'recorded')
+    assert recorded[0] == recorded[1]
+    assert 'bytes=100-' in [i['range'] for i in cassette.interactions]
+    # In the other order, so matching by URL alone would give the ranged
+    # request the full response and the full request the partial one
+    session = requests.Session()
+    with photoprysm.replay_requests(session, cassette_path, speed = None) as adapter:
+        replayed = download(session, 'replayed', resume_first = True)
+    assert replayed == recorded
+    assert adapter.misses == []
+
+def test_replay_speed(tmp_path):
+    cassette = Cassette([{
+        'method': 'GET',
+        'url': 'http://localhost:2342/api/v1/photos?count=1&quality=0',
+        'size': 0, 'start': 0.0, 'elapsed': 0.2, 'status': 200, 'reason': 'OK',
+        'headers': {'Content-Type': 'application/json'}, 'text': '[]'}])
+    path = cassette.save(tmp_path/'slow.cassette')
+    session = requests.Session()
+    for speed, low, high in [(1, 0.2, 1.0), (10, 0.02, 0.15)]:
+        with photoprysm.replay_requests(session, path, speed = speed):
+            start = time.perf_counter()
+            assert photoprysm.get_photos(session, 'http://localhost:2342/api/v1/') == []
+            assert low <= time.perf_counter() - start < high
+    with pytest.raises(ValueError):
+        ReplayAdapter(cassette, speed = 0)
+
+def test_replay_missing(tmp_path):
+    path = Cassette().save(tmp_path/'empty.cassette')
+    session = requests.Session()
+    with photoprysm.replay_requests(session, path) as adapter:
+        with pytest.raises(requests.ConnectionError):
+            photoprysm.get_photos(session, 'http://localhost:2342/api/v1/')
+    assert adapter.misses == [('GET', 'http://localhost:2342/api/v1/photos?count=1&quality=0', None)]
+    (tmp_path/'bad.cassette').write_bytes(gzip.compress(b'{"version": 99}\n'))
+    with pytest.raises(ValueError):
+        Cassette.load(tmp_path/'bad.cassette')
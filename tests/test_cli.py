@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+import io
+import re
+import hashlib
+import json
+import responses
+from urllib.parse import urljoin
+
+from photoprysm.__main__ import PhotoprysmCLI, main
+
+from .test_core import *
+
+@responses.activate
+def test_batch(server_api, session):
+    commander = PhotoprysmCLI()
+    commander.server_api = server_api
+    commander.workers = 4
+    commander.mode = 'user'
+    commander.user = type('User', (), {'login': lambda self, api: session,
+                                       'logout': lambda self: None})()
+    commander.preloop()
+    responses.get(url = urljoin(server_api, 'status'), json = {'status': 'operational'})
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        match = [responses.matchers.query_param_matcher({'count': '2', 'q': 'cat'})],
+        json = [{'UID': 'p1'}, {'UID': 'p2'}])
+    responses.put(
+        url = urljoin(server_api, 'photos/p1'),
+        match = [responses.matchers.json_params_matcher({'Title': 'Cat'})],
+        json = {'UID': 'p1', 'Title': 'Cat'})
+    responses.delete(url = urljoin(server_api, 'albums/a1'), status = 404,
+                     json = {'error': 'Album not found'})
+    lines = [
+        '# Comments and blank lines are skipped',
+        'status',
+        '',
+        'get photos -p count=2 q=cat',
+        json.dumps({'id': 'rename', 'method': 'PUT', 'endpoint': 'photos/p1',
+                    'data': {'Title': 'Cat'}}),
+        'delete albums/a1',
+        'frobnicate photos',
+    ]
+    out = io.StringIO()
+    failed = commander.run_batch(lines, out)
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert failed == 2
+    assert [r['line'] for r in results] == [2, 4, 5, 6, 7]
+    assert results[0]['result'] == {'status': 'operational'}
+    assert results[1]['result'] == [{'UID': 'p1'}, {'UID': 'p2'}]
+    assert results[2]['id'] == 'rename' and results[2]['ok']
+    assert results[3]['status'] == 404 and not results[3]['ok']
+    assert 'frobnicate' in results[4]['error']
+
+@responses.activate
+def test_main_batch(server_api, tmp_path, capsys):
+    responses.post(url = urljoin(server_api, 'session'),
+                   json = {'id': 'token', 'user': {'UID': 'u1'}})
+    logout = responses.delete(url = urljoin(server_api, 'session'), json = {})
+    responses.get(url = urljoin(server_api, 'status'), json = {'status': 'operational'})
+    batch = tmp_path/'commands.txt'
+    batch.write_text('status\nstatus\n')
+    rv = main(['localhost', '2342', '--batch', str(batch), '--workers', '2',
+               'user', 'admin', 'password'])
+    assert rv == 0
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r['ok'] for r in results] == [True, True]
+    assert responses.calls[1].request.headers['Authorization'] == 'Bearer token'
+    assert logout.call_count == 1
+
+def _mock_login(server_api):
+    session_json = {'id': 'token', 'user': {'UID': 'u1'},
+                    'config': {'downloadToken': 'dl', 'previewToken': 'pv'}}
+    responses.post(url = urljoin(server_api, 'session'), json = session_json)
+    responses.get(url = urljoin(server_api, 'session'), json = session_json)
+    responses.delete(url = urljoin(server_api, 'session'), json = {})
+
+@responses.activate
+def test_main_download(server_api, tmp_path, capsys):
+    _mock_login(server_api)
+    contents = {hashlib.sha1(c).hexdigest(): c for c in (b'one', b'two')}
+    hashes = list(contents)
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        match = [responses.matchers.query_param_matcher(
+            {'count': 1000, 'offset': 0, 'q': 'cat', 'quality': 0})],
+        json = [{'UID': 'p1', 'Files': [{'Hash': hashes[0], 'Name': '2024/a.jpg',
+                                         'Primary': True}]},
+                {'UID': 'p2', 'Files': [{'Hash': hashes[1], 'Name': '../../b.jpg'}]}])
+    for hashbrown, content in contents.items():
+        responses.get(url = urljoin(server_api, f'dl/{hashbrown}'), body = content)
+    dest = tmp_path/'dest'
+    rv = main(['localhost', '2342', 'user', 'admin', 'password', 'download',
+               '--query', 'cat', '--dest', str(dest), '--workers', '2'])
+    assert rv == 0
+    report = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r['ok'] for r in report] == [True, True]
+    assert (dest/'2024'/'a.jpg').read_bytes() == b'one'
+    # Paths from the server can't escape the destination
+    assert (dest/'b.jpg').read_bytes() == b'two'
+    # Files that are already there are skipped
+    rv = main(['localhost', '2342', 'user', 'admin', 'password', 'download',
+               '--query', 'cat', '--dest', str(dest)])
+    report = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert all(r['skipped'] for r in report)
+
+@responses.activate
+def test_main_download_multiple_files(server_api, tmp_path, capsys, photo_search):
+    _mock_login(server_api)
+    # A photo with three files and more than a page of photos after it
+    contents = {f'p{i}': f'photo {i}'.encode() for i in range(1001)}
+    files = []
+    for uid, content in contents.items():
+        hashbrown = hashlib.sha1(content).hexdigest()
+        files.append((uid, {'Hash': hashbrown, 'Name': f'{uid}.jpg', 'Primary': True}))
+        if uid == 'p0':
+            files += [(uid, {'Hash': f'{uid}-{ext}', 'Name': f'{uid}.{ext}'})
+                      for ext in ('mov', 'xmp')]
+    photo_search(server_api, files)
+    by_hash = {hashlib.sha1(c).hexdigest(): c for c in contents.values()}
+    responses.add_callback(
+        responses.GET, re.compile(urljoin(server_api, 'dl/') + '.*'),
+        callback = lambda r: (200, {}, by_hash[r.url.rsplit('/', 1)[-1].split('?')[0]]))
+    dest = tmp_path/'dest'
+    rv = main(['localhost', '2342', 'user', 'admin', 'password', 'download',
+               '--dest', str(dest), '--workers', '8'])
+    assert rv == 0
+    report = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    # Every photo once, with its primary file
+    assert sorted(r['uid'] for r in report) == sorted(contents)
+    assert all(r['ok'] for r in report)
+    assert (dest/'p0.jpg').read_bytes() == contents['p0']
+    assert not (dest/'p0.mov').exists()
+
+@responses.activate
+def test_main_upload(server_api, tmp_path, capsys):
+    _mock_login(server_api)
+    (tmp_path/'dir').mkdir()
+    paths = [tmp_path/'dir'/'a.jpg', tmp_path/'b.jpg']
+    for i, path in enumerate(paths):
+        path.write_bytes(f'photo {i}'.encode())
+        hashbrown = hashlib.sha1(path.read_bytes()).hexdigest()
+        responses.get(url = urljoin(server_api, f'files/{hashbrown}'),
+                      json = {'PhotoUID': f'p{i}'})
+        responses.get(url = urljoin(server_api, f'photos/p{i}'),
+                      json = {'UID': f'p{i}'})
+    upload_url = urljoin(server_api, 'users/u1/upload/dl')
+    uploaded = []
+    def _post(request):
+        # Read the streamed body like the server would
+        uploaded.append(b''.join(request.body))
+        return (200, {}, json.dumps({'code': 200}))
+    responses.add_callback(responses.POST, upload_url, _post)
+    put = responses.put(
+        url = upload_url,
+        match = [responses.matchers.json_params_matcher({'albums': ['a1']})],
+        json = {'code': 200})
+    report_path = tmp_path/'report.jsonl'
+    rv = main(['localhost', '2342', 'user', 'admin', 'password', 'upload',
+               str(tmp_path/'dir'), str(paths[1]), '--albums', 'a1',
+               '--report', str(report_path)])
+    assert rv == 0
+    report = [json.loads(line) for line in report_path.read_text().splitlines()]
+    assert [r['uid'] for r in report] == ['p0', 'p1']
+    assert len(uploaded) == 2 and put.call_count == 1
+    assert any(b'filename="a.jpg"' in body and b'photo 0' in body for body in uploaded)
@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
+import json
 import pytest
+import requests
 import responses
+import threading
+import subprocess
+import sys
 from urllib.parse import urljoin
 from photoprysm import core
 from pathlib import Path
@@ -95,7 +100,8 @@ def test_import(mock_i18n_response, mock_album, server_api, session, count):
         url = urljoin(server_api, 'import'),
         match=[responses.matchers.json_params_matcher(req_kwargs)],
         **mock_i18n_response)
-    core.start_import(session, server_api, path, False, *albums_list)
+    job = core.start_import(session, server_api, path, False, *albums_list)
+    assert job.wait(timeout = 5) == mock_i18n_response['json']
 
 @pytest.mark.parametrize(
     ('path', 'cleanup', 'rescan'),
@@ -115,4 +121,63 @@ def test_index(mock_i18n_response, server_api, session, path, cleanup, rescan):
         url = urljoin(server_api, 'index'),
         match=[responses.matchers.json_params_matcher(req_kwargs)],
         **mock_i18n_response)
-    core.start_index(session, server_api, path, cleanup, rescan)
+    job = core.start_index(session, server_api, path, cleanup, rescan)
+    assert job.wait(timeout = 5) == mock_i18n_response['json']
+
+@responses.activate
+def test_job_wait(server_api, session):
+    finished = threading.Event()
+    counts = iter([{'files': 1}, {'files': 2}, {'files': 2}, {'files': 3}])
+    progress = []
+    def _index(request):
+        # Finish once the progress has been checked a few times
+        finished.wait(5)
+        return (200, {}, json.dumps({'message': 'indexing completed'}))
+    def _config(request):
+        count = next(counts)
+        if count['files'] == 3: finished.set()
+        return (200, {}, json.dumps({'count': count}))
+    responses.add_callback(responses.POST, urljoin(server_api, 'index'), _index)
+    responses.add_callback(responses.GET, urljoin(server_api, 'config'), _config)
+    job = core.start_index(session, server_api)
+    assert not job.done()
+    rv = job.wait(timeout = 5, on_progress = progress.append,
+                  min_interval = 0.01, max_interval = 0.05)
+    assert rv == {'message': 'indexing completed'}
+    assert job.done()
+    assert progress == [{'files': 1}, {'files': 2}, {'files': 2}, {'files': 3}]
+
+@responses.activate
+def test_job_timeout_and_error(server_api, session, caplog):
+    release = threading.Event()
+    def _import(request):
+        release.wait(5)
+        return (500, {}, json.dumps({'error': 'Something went wrong'}))
+    responses.add_callback(responses.POST, urljoin(server_api, 'import'), _import)
+    job = core.start_import(session, server_api)
+    with pytest.raises(TimeoutError):
+        job.wait(timeout = 0.05)
+    with pytest.raises(RuntimeError):
+        job.result()
+    release.set()
+    with pytest.raises(requests.HTTPError):
+        job.wait(timeout = 5)
+    # Logged when it happens, not only once someone waits for the job
+    assert any(r.levelname == 'ERROR' and 'import failed' in r.getMessage()
+               for r in caplog.records)
+
+def test_lazy_exports():
+    import photoprysm
+    from photoprysm.api import photos
+    assert photoprysm.get_photos is photos.get
+    assert photoprysm.photos is photos
+    assert 'Album' in dir(photoprysm)
+    with pytest.raises(AttributeError):
+        photoprysm.frobnicate
+    # Nothing heavy is imported with the package or the CLI
+    code = ('import sys, photoprysm, photoprysm.__main__\n'
+            'for name in ("requests", "photoprysm.core", "photoprysm.api.photos"):\n'
+            '    print(name in sys.modules)')
+    out = subprocess.run([sys.executable, '-c', code], capture_output = True,
+                         text = True, check = True).stdout
+    assert out.split() == ['False'] * 3
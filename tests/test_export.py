@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import sys
+import pytest
+import responses
+from urllib.parse import urljoin
+
+from photoprysm import export
+
+from .test_core import *
+
+@pytest.fixture
+def mock_photo_list(mock_photo):
+    return {'status': mock_photo['status'], 'json': [mock_photo['json']] * 3}
+
+@responses.activate
+def test_export_columns(mock_photo_list, server_api, session):
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        **mock_photo_list)
+    columns = export.export_columns(session, server_api, page_size = 5)
+    assert set(columns) == set(export.COLUMNS)
+    assert columns['uid'] == [mock_photo_list['json'][0]['UID']] * 3
+    assert len(columns['size']) == 3
+    with pytest.raises(ValueError):
+        export.export_columns(session, server_api, columns = ['not real'])
+
+@responses.activate
+def test_export_pages(mock_photo, server_api, session):
+    # A full page means there might be more, so a second page is requested
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        status = 200,
+        json = [mock_photo['json']] * 2)
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        status = 200,
+        json = [mock_photo['json']])
+    columns = export.export_columns(session, server_api, columns = ['uid'],
+                                    page_size = 2)
+    assert len(columns['uid']) == 3
+
+@pytest.mark.parametrize('suffix', ['.npy', '.parquet', '.arrow'])
+@responses.activate
+def test_export(mock_photo_list, server_api, session, tmp_path, suffix):
+    np = pytest.importorskip('numpy')
+    if suffix != '.npy': pytest.importorskip('pyarrow')
+    responses.get(
+        url = urljoin(server_api, 'photos'),
+        **mock_photo_list)
+    path = export.export(session, server_api, tmp_path/f'library{suffix}')
+    assert path.exists()
+    if suffix == '.npy':
+        rows = np.load(path)
+        assert rows['uid'][0] == mock_photo_list['json'][0]['UID']
+        assert rows['width'].dtype == np.int64
+
+@responses.activate
+def test_export_without_pyarrow(server_api, session, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(ImportError):
+        export.export(session, server_api, tmp_path/'library.parquet')
+    # Nothing was fetched or written
+    assert len(responses.calls) == 0
+    assert not list(tmp_path.iterdir())
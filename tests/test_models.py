@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+import json
+import pickle
+import pytest
+from dataclasses import fields
+
+from photoprysm.models import base
+from photoprysm.models.base import camel
+from photoprysm.models.albums import Album, AlbumProperties, CompactAlbum
+from photoprysm.models.links import ShareLink, ShareLinkProperties, CompactShareLink
+from photoprysm.models.photos import Photo, PhotoFile, PhotoDetails, PhotoProperties
+from photoprysm.models.photos import CompactPhoto, CompactPhotoFile
+from photoprysm.models.photos import LazyPhoto, LazyPhotoFile
+from photoprysm.models.albums import LazyAlbum
+
+@pytest.mark.parametrize('model', [Album, AlbumProperties, ShareLink,
+                                   ShareLinkProperties, Photo, PhotoFile,
+                                   PhotoDetails, PhotoProperties, CompactAlbum,
+                                   CompactShareLink, CompactPhoto,
+                                   CompactPhotoFile, LazyAlbum, LazyPhoto,
+                                   LazyPhotoFile])
+def test_field_maps(model):
+    # The maps are built before the dataclass decorator runs, so make sure
+    # they agree with what it ended up with
+    names = [attr.name for attr in fields(model)]
+    assert list(model.__json_keys__) == names
+    setters = model.__json_setters__ + tuple(
+        (key, name) for key, name, _ in model.__json_converters__)
+    assert sorted(setters) == sorted((camel(n), n) for n in names)
+    assert {n for _, n in model.__json_required__} == model.__required_attrs__
+
+def test_fromjson_missing_required(mock_file):
+    djson = dict(mock_file['json'])
+    del djson['PhotoUID']
+    with pytest.raises(TypeError):
+        PhotoFile.fromjson(djson)
+
+@pytest.mark.parametrize(('model', 'compact_model'),
+                         [(Photo, CompactPhoto), (PhotoFile, CompactPhotoFile)])
+def test_compact(mock_file, mock_photo, model, compact_model):
+    djson = mock_file['json'] if model is PhotoFile else mock_photo['json']
+    inst = model.fromjson(dict(djson))
+    compact_inst = compact_model.fromjson(dict(djson))
+    assert not hasattr(compact_inst, '__dict__')
+    assert compact_model.__required_attrs__ == model.__required_attrs__
+    for attr in fields(model):
+        if attr.name == 'files': continue
+        assert getattr(inst, attr.name) == getattr(compact_inst, attr.name)
+    if model is Photo:
+        # Files are decoded into compact files, with their strings interned
+        expected = [CompactPhotoFile.fromjson(dict(f)) for f in inst.files or []]
+        assert compact_inst.files == (expected or None)
+        if compact_inst.files:
+            other = compact_model.fromjson(json.loads(json.dumps(djson)))
+            assert compact_inst.files[0].mime is other.files[0].mime
+        assert compact_model.fromjson(json.loads(compact_inst.json)) == compact_inst
+    else:
+        assert compact_inst.json == inst.json
+
+def test_interned(mock_file):
+    a = PhotoFile.fromjson(json.loads(json.dumps(mock_file['json'])))
+    b = CompactPhotoFile.fromjson(json.loads(json.dumps(mock_file['json'])))
+    assert a.mime is b.mime
+
+def test_lazy(mock_photo):
+    djson = mock_photo['json']
+    photo = LazyPhoto.fromjson(djson)
+    assert isinstance(photo, Photo)
+    assert photo.uid == djson['UID']
+    # Nothing else has been decoded yet
+    assert set(vars(photo)) == {'_djson', 'uid'}
+    eager = Photo.fromjson(dict(djson))
+    for attr in fields(Photo):
+        if attr.name == 'files': continue
+        assert getattr(photo, attr.name) == getattr(eager, attr.name)
+    assert json.loads(photo.json)['UID'] == djson['UID']
+
+def test_lazy_files(mock_photo):
+    photo = LazyPhoto.fromjson(mock_photo['json'])
+    raw_files = mock_photo['json'].get('Files')
+    if raw_files is None:
+        assert photo.files is None
+        return
+    assert len(photo.files) == len(raw_files)
+    assert all(f is None for f in photo.files._items)
+    first = photo.files[0]
+    assert isinstance(first, LazyPhotoFile)
+    assert first.hash == raw_files[0]['Hash']
+    assert photo.files[0] is first
+
+def test_lazy_missing_required():
+    with pytest.raises(TypeError):
+        LazyAlbum.fromjson({'Title': 'No UID'})
+
+@pytest.mark.parametrize('backend', ['orjson', 'msgspec', 'json'])
+def test_json_backends(mock_photo, monkeypatch, backend):
+    if backend != 'json': pytest.importorskip(backend)
+    for name in ('orjson', 'msgspec'):
+        if name != backend: monkeypatch.setattr(base, name, None)
+    photo = Photo.fromjson(dict(mock_photo['json']))
+    djson = base.loads(photo.json)
+    assert djson == json.loads(photo.json)
+    assert Photo.fromjson(djson).uid == photo.uid
+    # Integers past 64 bits, which some mocks have, stay integers
+    big = {'Duration': -9223372036854776000, 'Size': 2**64}
+    assert base.loads(json.dumps(big)) == big
+    assert base.loads(json.dumps(big).encode()) == big
+    # Nested models are written with their JSON keys, not their attribute names
+    files = [f for f in mock_photo['json'].get('Files') or []
+             if isinstance(f, dict)]
+    nested = [PhotoFile.fromjson(dict(f)) for f in files]
+    assert json.loads(base.dumps({'Files': nested})) == \
+        {'Files': [json.loads(f.json) for f in nested]}
+    # Round trip back through the model
+    assert Photo.fromjson(json.loads(photo.json)) == photo
+
+@pytest.mark.parametrize('model', [Photo, CompactPhoto, LazyPhoto])
+def test_pickle(mock_photo, model):
+    photo = model.fromjson(dict(mock_photo['json']))
+    data = pickle.dumps(photo)
+    restored = pickle.loads(data)
+    assert type(restored) is model
+    assert restored == photo
+    # Pickled as the compact tuple of values, so the field names aren't
+    # repeated in the pickle
+    restore, (cls, version, values) = photo.__reduce__()
+    assert restore is base._restore and cls is model
+    assert version == model.__state_version__
+    assert values == photo._astuple()
+    assert {'title', 'description'} <= set(model.__field_order__)
+    assert b'title' not in data and b'description' not in data
+
+def test_pickle_version(mock_file):
+    f = PhotoFile.fromjson(mock_file['json'])
+    restore, (cls, version, values) = f.__reduce__()
+    with pytest.raises(ValueError):
+        restore(cls, version + 1, values)
+
+@pytest.mark.parametrize('model', [PhotoFile, CompactPhotoFile, LazyPhotoFile])
+def test_msgpack(mock_file, model):
+    pytest.importorskip('msgpack')
+    from photoprysm.models.base import dumpb, loadb
+    f = model.fromjson(mock_file['json'])
+    link = ShareLink('token', 'share_uid', 'slug', 'uid',
+                     created_at = '2023-04-23T06:18:25Z')
+    album = Album.fromjson({'UID': 'aqoe4m9204aigugh', 'Title': 'Album'})
+    restored = loadb(dumpb({'files': [f], 'link': link, 'album': album}))
+    assert restored['files'] == [f]
+    assert type(restored['files'][0]) is model
+    assert restored['link'] == link
+    assert restored['album'] == album
+    assert len(dumpb(f)) < len(f.json)
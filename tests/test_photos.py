@@ -7,7 +7,9 @@ import responses
 from hashlib import sha1
 from urllib.parse import urljoin, quote as urlquote
 from dataclasses import asdict
+from datetime import datetime, timezone
 
+import photoprysm
 from photoprysm import core
 from photoprysm import photos
 
@@ -83,6 +85,50 @@ def test_update(mock_photo, server_api, session):
     photo = photos.update(session, server_api, uid, props)
     assert photo.uid == uid
     
+@responses.activate
+def test_update_many(mock_photo, server_api, session):
+    uid = mock_photo['json']['UID']
+    title = mock_photo['json'].get('Title')
+    known = {uid: dict(mock_photo['json'], Title = 'Old title')}
+    put = responses.put(
+        url = urljoin(server_api, f'photos/{uid}'),
+        match = [responses.matchers.json_params_matcher({'Title': title})],
+        **mock_photo)
+    props = photos.PhotoProperties(title = title)
+    results = photos.update_many(session, server_api, [(uid, props)], known = known)
+    assert results[0].ok and not results[0].skipped
+    assert results[0].value.uid == uid
+    # Nothing changed since the last update, so no request should be sent
+    results = photos.update_many(session, server_api, [(uid, props)], known = known)
+    assert results[0].skipped
+    assert put.call_count == 1
+
+@responses.activate
+def test_update_many_bad_timestamp(mock_photo, server_api, session):
+    uid = mock_photo['json']['UID']
+    taken_at = datetime(2024, 5, 1, 12, tzinfo = timezone.utc)
+    known = {uid: dict(mock_photo['json'], TakenAt = 'not a timestamp'),
+             'p2': {'UID': 'p2', 'TakenAt': '2024-05-01T12:00:00Z'}}
+    put = responses.put(url = urljoin(server_api, f'photos/{uid}'), **mock_photo)
+    props = photos.PhotoProperties(taken_at = taken_at)
+    results = photos.update_many(session, server_api,
+                                 [(uid, props), ('p2', props)], known = known)
+    # The malformed one counts as changed, without failing the rest
+    assert results[0].ok and not results[0].skipped
+    assert results[1].skipped
+    assert put.call_count == 1
+
+@responses.activate
+def test_update_many_error(mock_photo, server_api, session):
+    uid = mock_photo['json']['UID']
+    responses.put(
+        url = urljoin(server_api, f'photos/{uid}'),
+        status = 404,
+        json = {'error': 'Photo not found'})
+    props = photos.PhotoProperties(title = 'TEST')
+    results = photos.update_many(session, server_api, [(uid, props)] * 3)
+    assert all(isinstance(r.error, requests.HTTPError) for r in results)
+
 @responses.activate
 def test_upload(mock_file_path, mock_session, mock_i18n_response, mock_file, mock_photo, server_api, session):
     user_uid = mock_session['json']['user']['UID']
@@ -119,3 +165,71 @@ def test_download(mock_session, mock_photo, mock_file_path, server_api, session)
         status = 200,
         body = mock_file_path.read_bytes())
     assert photos.download(session, server_api, photo) == mock_file_path.read_bytes()
+
+def test_download_file_complete_part(mock_server, tmp_path):
+    api = mock_server.server_api
+    with photoprysm.user_session(mock_server.user, api) as session:
+        photo = photos.get(session, api, count = 1)[0]
+        content = mock_server.library.content(photo.files[0]['Hash'])
+        # Interrupted after the last byte, before the .part file was renamed
+        (tmp_path/'photo.jpg.part').write_bytes(content)
+        path = photos.download_file(session, api, photo, tmp_path/'photo.jpg')
+    assert path.read_bytes() == content
+    assert not (tmp_path/'photo.jpg.part').exists()
+
+@pytest.mark.parametrize('count', list(range(1,4)))
+@responses.activate
+def test_thumbnails(mock_session, server_api, session, tmp_path, count):
+    token = mock_session['json']['config']['previewToken']
+    session_get = responses.get(
+        url = urljoin(server_api, 'session'),
+        **mock_session)
+    hashes = [sha1(str(i).encode()).hexdigest() for i in range(count + 1)]
+    thumbs = [responses.get(
+        url = urljoin(server_api, f't/{hashbrown}/{token}/tile_224'),
+        status = 200,
+        body = hashbrown.encode()) for hashbrown in hashes]
+    cache = photos.DiskCache(tmp_path)
+    # Cold, everything is downloaded with one look-up of the preview token
+    images = photos.thumbnails(session, server_api, *hashes[:count], cache = cache)
+    assert images == [h.encode() for h in hashes[:count]]
+    assert session_get.call_count == 1
+    assert [t.call_count for t in thumbs] == [1] * count + [0]
+    # Warm, nothing is requested at all, not even the preview token
+    images = photos.thumbnails(session, server_api, *hashes[:count], cache = cache)
+    assert images == [h.encode() for h in hashes[:count]]
+    assert session_get.call_count == 1
+    assert [t.call_count for t in thumbs] == [1] * count + [0]
+    # Only the missing thumbnail is downloaded
+    images = photos.thumbnails(session, server_api, *hashes, cache = cache)
+    assert images == [h.encode() for h in hashes]
+    assert session_get.call_count == 2
+    assert [t.call_count for t in thumbs] == [1] * (count + 1)
+
+def test_thumbnail_url(mock_file, server_api):
+    photo = photos.PhotoFile.fromjson(mock_file['json'])
+    with pytest.raises(ValueError):
+        photos.get_thumbnail_url(server_api, photo, 'token', 'not real')
+    url = photos.get_thumbnail_url(server_api, 'abc123', 'token', 'fit_720')
+    assert url == urljoin(server_api, 't/abc123/token/fit_720')
+
+@responses.activate
+def test_download_file(server_api, session, tmp_path):
+    content = b'photo' * 1000
+    hashbrown = sha1(content).hexdigest()
+    responses.get(
+        url = urljoin(server_api, f'dl/{hashbrown}'),
+        match = [responses.matchers.header_matcher({'Range': 'bytes=100-'})],
+        status = 206,
+        body = content[100:])
+    path = tmp_path/'photo.jpg'
+    (tmp_path/'photo.jpg.part').write_bytes(content[:100])
+    photos.download_file(session, server_api, hashbrown, path,
+                         download_token = 'token')
+    assert path.read_bytes() == content
+    # A corrupt download is thrown away instead of kept for resuming
+    responses.get(url = urljoin(server_api, 'dl/0000'), body = content)
+    with pytest.raises(ValueError):
+        photos.download_file(session, server_api, '0000', tmp_path/'bad.jpg',
+                             download_token = 'token')
+    assert not (tmp_path/'bad.jpg.part').exists()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import os
+import json
+import pytest
+import hashlib
+import responses
+from urllib.parse import urljoin
+
+from photoprysm import staging
+
+from .test_core import *
+
+@pytest.fixture
+def source_files(tmp_path):
+    src = tmp_path/'src'
+    (src/'a').mkdir(parents = True)
+    (src/'b').mkdir()
+    paths = [src/'a'/'IMG_0001.jpg', src/'b'/'IMG_0001.jpg',
+             src/'a'/'IMG_0002.jpg', src/'b'/'copy.jpg', src/'a'/'IMG_0003.jpg']
+    contents = [b'one', b'two', b'three', b'one', b'four' * 100000]
+    for path, content in zip(paths, contents):
+        path.write_bytes(content)
+    return paths
+
+def test_stage(source_files, tmp_path):
+    import_path = tmp_path/'import'
+    skip = {hashlib.sha1(b'three').hexdigest()}
+    result = staging.stage_import(source_files, import_path, prefix = 'batch',
+                                  partition_size = 2, skip_hashes = skip)
+    assert [r.skipped for r in result.files] == [False, False, True, True, False]
+    staged = [r.value for r in result.files if r.value is not None]
+    assert [p.relative_to(import_path).parent.as_posix() for p in staged] == [
+        'batch/0000', 'batch/0000', 'batch/0001']
+    # Same name from different directories
+    assert staged[0].name == 'IMG_0001.jpg'
+    assert staged[1].name != 'IMG_0001.jpg'
+    for r in result.files:
+        if r.value: assert r.value.read_bytes() == r.item.read_bytes()
+    assert result.jobs == []
+
+def test_stage_link(source_files, tmp_path):
+    result = staging.stage_import(source_files[:1], tmp_path/'import', link = True)
+    assert os.path.samefile(result.files[0].value, source_files[0])
+
+def test_copy_fallback(source_files, tmp_path, monkeypatch):
+    monkeypatch.delattr(os, 'copy_file_range', raising = False)
+    monkeypatch.delattr(os, 'sendfile', raising = False)
+    dst = tmp_path/'copy.jpg'
+    staging._copy_file(source_files[-1], dst)
+    assert dst.read_bytes() == source_files[-1].read_bytes()
+
+@responses.activate
+def test_stage_import(source_files, tmp_path, server_api, session):
+    imports = []
+    def _import(request):
+        imports.append(json.loads(request.body)['path'])
+        return (200, {}, json.dumps({'message': 'import completed'}))
+    responses.add_callback(responses.POST, urljoin(server_api, 'import'), _import)
+    result = staging.stage_import(source_files, tmp_path/'import', prefix = 'batch',
+                                  partition_size = 2, session = session,
+                                  server_api = server_api)
+    result.wait(timeout = 5)
+    assert imports == ['batch/0000', 'batch/0001']
+    with pytest.raises(ValueError):
+        staging.stage_import(source_files, tmp_path/'import', session = session)
+
+@responses.activate
+def test_stage_import_failed(source_files, tmp_path, server_api, session):
+    imports = []
+    def _import(request):
+        imports.append(json.loads(request.body)['path'])
+        if len(imports) == 1: raise RuntimeError('Server went away')
+        return (200, {}, json.dumps({'message': 'import completed'}))
+    responses.add_callback(responses.POST, urljoin(server_api, 'import'), _import)
+    result = staging.stage_import(source_files, tmp_path/'import', prefix = 'batch',
+                                  partition_size = 2, session = session,
+                                  server_api = server_api)
+    # The failed import is reported, and the next one is still started
+    result.jobs[1].wait(timeout = 5)
+    assert imports == ['batch/0000', 'batch/0001']
+    assert list(result.errors) == [result.jobs[0]]
+    assert isinstance(result.errors[result.jobs[0]], RuntimeError)
+    assert all(r.ok for r in result.files if not r.skipped)
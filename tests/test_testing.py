@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import time
+import zipfile
+import hashlib
+import pytest
+import requests
+
+import photoprysm
+from photoprysm import bench
+from photoprysm.testing import MockLibrary, fake_jpeg
+
+def test_library():
+    library = MockLibrary(20, 2, file_size = 100, seed = 1)
+    assert len(library.photos) == 20 and len(library.albums) == 2
+    # Same seed, same library
+    assert list(MockLibrary(20, 2, seed = 1).photos) == list(library.photos)
+    for hashbrown, raw_file in library.files.items():
+        content = library.content(hashbrown)
+        assert len(content) == 100 and content.startswith(b'\xff\xd8')
+        assert hashlib.sha1(content).hexdigest() == hashbrown
+    assert library.counts()['photos'] == 20
+    assert fake_jpeg(1) == fake_jpeg(1) != fake_jpeg(2)
+
+def test_login(mock_server):
+    api = mock_server.server_api
+    with pytest.raises(requests.HTTPError):
+        photoprysm.User('admin', 'wrong').login(api)
+    with photoprysm.user_session(mock_server.user, api) as session:
+        assert photoprysm.get_tokens_from_session(session, api)['download_token']
+    # The session is gone once logged out
+    with pytest.raises(requests.HTTPError):
+        photoprysm.get_photos(session, api)
+    with photoprysm.client_session(photoprysm.Client('id', 'secret'), api) as session:
+        assert photoprysm.get_photos(session, api)
+
+def test_photos(mock_server, tmp_path):
+    api = mock_server.server_api
+    with photoprysm.user_session(mock_server.user, api) as session:
+        pages = list(photoprysm.iter_photo_pages(session, api, page_size = 20))
+        assert [len(page) for page in pages] == [20, 20, 10]
+        photo = photoprysm.get_photos(session, api, count = 1, merged = True)[0]
+        photo = photoprysm.update_photo(session, api, photo,
+                                        photoprysm.PhotoProperties(title = 'Renamed'))
+        assert photoprysm.get_photo_by_uid(session, api, photo.uid).title == 'Renamed'
+        assert photoprysm.get_photos(session, api, count = 10, query = 'renamed')[0].uid == photo.uid
+        path = photoprysm.download_file(session, api, photo, tmp_path/'photo.jpg')
+        assert path.read_bytes() == mock_server.library.content(photo.files[0]['Hash'])
+        # Resumes from the part that is already there
+        part = tmp_path/'resumed.jpg.part'
+        part.write_bytes(path.read_bytes()[:1000])
+        photoprysm.download_file(session, api, photo, tmp_path/'resumed.jpg')
+        assert (tmp_path/'resumed.jpg').read_bytes() == path.read_bytes()
+        (tmp_path/'new.jpg').write_bytes(fake_jpeg(seed = 99))
+        album = photoprysm.create_album(session, api, 'Uploads')
+        results = photoprysm.upload_files(session, api, [tmp_path/'new.jpg'], albums = [album])
+        assert results[0].ok
+        assert photoprysm.get_album_member_uids(session, api, album) == {results[0].value.uid}
+        photoprysm.archive_photo(session, api, photo)
+        assert mock_server.library.counts()['archived'] == 1
+
+def test_albums(mock_server, tmp_path):
+    api = mock_server.server_api
+    with photoprysm.user_session(mock_server.user, api) as session:
+        index = photoprysm.AlbumIndex(session, api)
+        assert len(index) == 3
+        album = photoprysm.create_album(session, api, 'Holidays')
+        uids = [p.uid for p in photoprysm.get_photos(session, api, count = 5)]
+        photoprysm.sync_album_members(session, api, album, uids)
+        assert photoprysm.get_album_member_uids(session, api, album) == set(uids)
+        index.refresh()
+        assert index['Holidays'] == album.uid
+        link = photoprysm.add_album_share_link(session, api, album)
+        rotated = photoprysm.rotate_album_share_links(session, api, [link])[0].value
+        assert rotated.token != link.token
+        assert photoprysm.scan_album_share_links(session, api, [album])[album.uid] == [rotated]
+        path = photoprysm.download_album(session, api, album, tmp_path/'album.zip')
+        assert len(zipfile.ZipFile(path).namelist()) == 5
+
+def test_faults(mock_server):
+    api = mock_server.server_api
+    with photoprysm.user_session(mock_server.user, api) as session:
+        mock_server.latency = 0.05
+        start = time.monotonic()
+        photoprysm.get_photos(session, api)
+        assert time.monotonic() - start >= 0.05
+        mock_server.latency = 0
+        mock_server.bandwidth = 100_000
+        start = time.monotonic()
+        content = b''.join(photoprysm.iter_download_file(
+            session, api, next(iter(mock_server.library.files))))
+        assert time.monotonic() - start >= len(content) / 100_000
+        mock_server.bandwidth = None
+        mock_server.error_rate = 0.5
+        results = bench.run(session, api, operations = ['search'],
+                            counts = [1], iterations = 40)
+        assert 0 < results[0].errors < 40
+        mock_server.error_rate = 0
+
+def test_bench(mock_server):
+    api = mock_server.server_api
+    with photoprysm.user_session(mock_server.user, api) as session:
+        results = bench.run(session, api, counts = [1, 10], iterations = 5,
+                            concurrency = 4)
+    assert [r.name for r in results] == ['search[count=1]', 'search[count=10]',
+                                         'get', 'update', 'download']
+    assert not any(r.errors for r in results)
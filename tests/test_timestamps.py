@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import pytest
+from datetime import datetime, timezone
+
+from photoprysm.models import timestamps
+from photoprysm.models.photos import PhotoFile, PhotoProperties
+from photoprysm.models.links import ShareLink
+
+@pytest.mark.parametrize(('value', 'expected'), [
+    ('2023-04-23T06:18:25Z',
+     datetime(2023, 4, 23, 6, 18, 25, tzinfo = timezone.utc)),
+    ('2025-02-01T18:00:11.271759938Z',
+     datetime(2025, 2, 1, 18, 0, 11, 271759, tzinfo = timezone.utc)),
+    ('2023-04-23T06:18:25',
+     datetime(2023, 4, 23, 6, 18, 25, tzinfo = timezone.utc)),
+])
+def test_parse_timestamp(value, expected):
+    assert timestamps.parse_timestamp(value) == expected
+
+def test_parse_epoch():
+    value = '2025-02-01T18:00:11.271759938Z'
+    assert timestamps.parse_epoch(value) == 1738432811
+    assert timestamps.parse_epoch(value, 'ms') == 1738432811271
+    assert timestamps.parse_epoch(value, 'ns') == 1738432811271759938
+    assert timestamps.parse_epoch('2025-02-01T19:00:11+01:00') == 1738432811
+    with pytest.raises(ValueError):
+        timestamps.parse_epoch(value, 'days')
+
+def test_format_timestamp():
+    value = '2025-02-01T18:00:11.271759Z'
+    assert timestamps.format_timestamp(timestamps.parse_timestamp(value)) == value
+
+def test_parse_timestamps():
+    np = pytest.importorskip('numpy')
+    values = ['2025-02-01T18:00:11.271759938Z', None, timestamps.ZERO_TIME,
+              '2023-04-23T06:18:25Z']
+    rv = timestamps.parse_timestamps(values)
+    assert rv.dtype == np.dtype('datetime64[ns]')
+    assert rv[0].astype(np.int64) == 1738432811271759938
+    assert np.isnat(rv[1]) and np.isnat(rv[2])
+    # Offsets and junk go through the slow path
+    rv = timestamps.parse_timestamps(['2025-02-01T19:00:11+01:00', 'string'], 's')
+    assert rv[0].astype(np.int64) == 1738432811
+    assert np.isnat(rv[1])
+
+def test_model_timestamps(mock_file):
+    f = PhotoFile.fromjson(mock_file['json'])
+    assert isinstance(f.created_at, datetime)
+    assert f.created_at == timestamps.parse_timestamp(mock_file['json']['CreatedAt'])
+    props = PhotoProperties(taken_at = f.created_at)
+    assert props.json == '{"TakenAt":"%s"}' % timestamps.format_timestamp(f.created_at)
+
+def test_share_link_timestamps():
+    link = ShareLink('token', 'share_uid', 'slug', 'uid',
+                     created_at = '2023-04-23T06:18:25Z')
+    assert link.created_at == datetime(2023, 4, 23, 6, 18, 25, tzinfo = timezone.utc)